@@ -42,6 +42,18 @@ TELEGRAM_CONFIG_FILE = os.path.join(os.path.dirname(__file__), 'telegram_config.
 # ФИКСИРОВАННОЕ РАСПИСАНИЕ - запросы в :14, :29, :44, :59 каждого часа
 SCHEDULE_MINUTES = [14, 29, 44, 59]
 
+# Обучение должно завершиться за столько секунд до следующего слота
+TRAINING_DEADLINE_MARGIN = 60
+
+def next_schedule_slot(now: datetime = None) -> datetime:
+    """Время следующего слота расписания (без побочных эффектов)"""
+    now = now or datetime.now()
+    for minute in SCHEDULE_MINUTES:
+        if now.minute < minute:
+            return now.replace(minute=minute, second=0, microsecond=0)
+    # Все слоты часа прошли - первый слот следующего часа
+    return (now + timedelta(hours=1)).replace(minute=SCHEDULE_MINUTES[0], second=0, microsecond=0)
+
 class FileLock:
     """Класс для блокировки файлов"""
     def __init__(self, filename):
@@ -467,22 +479,11 @@ class AutoLearningService:
     def calculate_next_run_time(self):
         """🎯 РАСЧЕТ СЛЕДУЮЩЕГО ВРЕМЕНИ ЗАПУСКА С БУФЕРОМ"""
         now = datetime.now()
-        current_minute = now.minute
         
         # Находим следующий временной слот
-        next_minute = None
-        for minute in SCHEDULE_MINUTES:
-            if current_minute < minute:
-                next_minute = minute
-                break
-        
-        # Если все слоты прошли в этом часе, берем первый слот следующего часа
-        if next_minute is None:
-            next_time = now.replace(hour=now.hour+1, minute=SCHEDULE_MINUTES[0], second=0, microsecond=0)
-            time_until_next = (next_time - now).total_seconds() / 60
-        else:
-            next_time = now.replace(minute=next_minute, second=0, microsecond=0)
-            time_until_next = (next_time - now).total_seconds() / 60
+        next_time = next_schedule_slot(now)
+        next_minute = next_time.minute
+        time_until_next = (next_time - now).total_seconds() / 60
         
         # 🔧 ПРИМЕНЯЕМ ЛОГИКУ БУФЕРА И КРИТИЧЕСКИХ ИНТЕРВАЛОВ
         if time_until_next <= 2:
@@ -803,18 +804,26 @@ class AutoLearningService:
             logger.error(f"❌ Ошибка при проверке синхронизации тиражей: {e}")
             return False
     
+    def get_training_deadline(self) -> float:
+        """Дедлайн обучения (метка time.time()): следующий слот минус запас"""
+        return next_schedule_slot().timestamp() - TRAINING_DEADLINE_MARGIN
+    
     def add_data_and_retrain(self, new_combination: str, retrain_epochs: int = 3):
         """🔧 ИСПРАВЛЕННЫЙ МЕТОД: Добавление данных и дообучение модели"""
         try:
             logger.info("🧠 Добавление данных и дообучение модели...")
             
+            # ⏰ Обучение не должно наезжать на следующий слот расписания
+            deadline = self.get_training_deadline()
+            logger.info(f"⏰ Дедлайн обучения: {datetime.fromtimestamp(deadline).strftime('%H:%M:%S')}")
+            
             # 🔧 ПЕРЕЗАГРУЗКА МОДЕЛИ ПЕРЕД КАЖДОЙ ОБРАБОТКОЙ
             if not self.system.load():
                 logger.error("❌ Не удалось загрузить модель для дообучения")
                 return []
             
             # 🔧 ВСЕГДА ТОЛЬКО ДООБУЧЕНИЕ (5 эпох для лучшей точности)
-            predictions = self.system.add_data_and_retrain(new_combination, retrain_epochs)
+            predictions = self.system.add_data_and_retrain(new_combination, retrain_epochs, deadline=deadline)
             
             # 🔧 СОХРАНЯЕМ ПРОГНОЗЫ В ОБЩИЙ ФАЙЛ ДЛЯ ВЕБ-ВЕРСИИ
             if predictions:
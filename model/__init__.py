@@ -5,6 +5,8 @@
 
 # Импорты для обратной совместимости
 from .data_loader import load_dataset, save_dataset, validate_group, compare_groups, save_predictions, load_predictions
+from .data_loader import load_dataset_array, append_group, export_dataset_json, migrate_dataset_to_binary
+from .data_loader import get_dataset_view, get_recent_numbers
 
 __version__ = "4.0.0"
 __author__ = "AI Prediction System"
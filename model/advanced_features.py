@@ -3,32 +3,214 @@
 Продвинутые features для анализа временных рядов
 """
 
+import os
+import math
+import hashlib
 import numpy as np
-from scipy import stats
-from typing import List, Dict
+from collections import Counter, OrderedDict, deque
+from typing import List, Dict, Optional, Tuple
 import torch
 
+# Лаги автокорреляции в analyze_time_series и максимальный лаг оценки Херста
+AUTOCORR_LAGS = (1, 2, 3, 5, 7)
+HURST_MAX_LAG = 19
+
+class _SeriesState:
+    """Окно ряда целых чисел с суммами для analyze_time_series, обновление O(HURST_MAX_LAG)
+    
+    Хранит сумму, сумму квадратов, сумму i * x[i] (наклон тренда), суммы
+    x[i] * x[i + lag] для лагов 1..HURST_MAX_LAG и гистограмму значений.
+    Все суммы целочисленные - точные при любом числе обновлений.
+    """
+    
+    def __init__(self, values: np.ndarray):
+        # Начальные суммы одним проходом NumPy, дальше - push/pop_left
+        values = np.asarray(values, dtype=np.int64)
+        self.values = deque(values.tolist())
+        self.total = int(values.sum())
+        self.squares = int(np.dot(values, values))
+        self.weighted = int(np.dot(np.arange(len(values)), values))  # sum(i * x[i])
+        # cross[lag] = sum(x[i] * x[i + lag])
+        self.cross = [0] + [int(np.dot(values[:-lag], values[lag:])) if lag < len(values) else 0
+                            for lag in range(1, HURST_MAX_LAG + 1)]
+        self.counts = Counter(self.values)
+    
+    def push(self, value: int):
+        """Новое значение в конец окна"""
+        values = self.values
+        n = len(values)
+        for lag in range(1, min(n, HURST_MAX_LAG) + 1):
+            self.cross[lag] += values[n - lag] * value
+        
+        values.append(value)
+        self.total += value
+        self.squares += value * value
+        self.weighted += n * value
+        self.counts[value] += 1
+    
+    def pop_left(self):
+        """Самое старое значение выходит из окна"""
+        values = self.values
+        old = values.popleft()
+        for lag in range(1, min(len(values), HURST_MAX_LAG) + 1):
+            self.cross[lag] -= old * values[lag - 1]
+        
+        self.total -= old
+        self.squares -= old * old
+        # Индексы оставшихся значений уменьшаются на 1
+        self.weighted -= self.total
+        self.counts[old] -= 1
+        if not self.counts[old]:
+            del self.counts[old]
+    
+    def _edge_sums(self, lag: int) -> Tuple[int, int, int, int]:
+        """Суммы и суммы квадратов первых и последних lag значений"""
+        head = [self.values[i] for i in range(lag)]
+        tail = [self.values[-1 - i] for i in range(lag)]
+        return sum(head), sum(v * v for v in head), sum(tail), sum(v * v for v in tail)
+    
+    def autocorrelation(self, lag: int) -> Optional[float]:
+        """np.corrcoef(x[:-lag], x[lag:]) по суммам; None, если не определена"""
+        pairs = len(self.values) - lag
+        if pairs < 2:
+            return None
+        
+        head, head_squares, tail, tail_squares = self._edge_sums(lag)
+        sum_a, sum_b = self.total - tail, self.total - head
+        var_a = pairs * (self.squares - tail_squares) - sum_a * sum_a
+        var_b = pairs * (self.squares - head_squares) - sum_b * sum_b
+        if var_a <= 0 or var_b <= 0:
+            return None
+        
+        corr = (pairs * self.cross[lag] - sum_a * sum_b) / math.sqrt(var_a * var_b)
+        return max(-1.0, min(1.0, corr))
+    
+    def linear_trend(self) -> float:
+        """Наклон МНК-прямой по индексам (как scipy.stats.linregress(arange(n), x).slope)"""
+        n = len(self.values)
+        index_sum = n * (n - 1) // 2
+        index_squares = (n - 1) * n * (2 * n - 1) // 6
+        return (n * self.weighted - index_sum * self.total) / (n * index_squares - index_sum * index_sum)
+    
+    def std(self) -> float:
+        n = len(self.values)
+        return math.sqrt(max(0, n * self.squares - self.total * self.total)) / n
+    
+    def hurst(self) -> float:
+        """Экспонента Херста: std разностей на лагах 2..19 и наклон в log-log, все лаги сразу"""
+        n = len(self.values)
+        if n < 20:
+            return 0.5
+        
+        lags = np.arange(2, min(20, n // 2))
+        if len(lags) < 2:
+            return 0.5
+        
+        ordered = np.fromiter(self.values, dtype=np.float64, count=n)
+        prefix = np.concatenate([[0.0], np.cumsum(ordered)])
+        prefix_squares = np.concatenate([[0.0], np.cumsum(ordered * ordered)])
+        cross = np.array([self.cross[lag] for lag in lags], dtype=np.float64)
+        
+        # Разности d = x[lag:] - x[:-lag]: их сумма и сумма квадратов через префиксные суммы
+        count = n - lags
+        diff_sum = (prefix[n] - prefix[lags]) - prefix[count]
+        diff_squares = (prefix_squares[n] - prefix_squares[lags]) + prefix_squares[count] - 2 * cross
+        variance = np.maximum(diff_squares / count - (diff_sum / count) ** 2, 0.0)
+        
+        tau = np.sqrt(variance)
+        if np.any(tau <= 0):
+            # log(0) - np.polyfit в прежней реализации давал nan
+            return float('nan')
+        
+        x, y = np.log(lags), np.log(tau)
+        x_centered = x - x.mean()
+        return float(np.dot(x_centered, y - y.mean()) / np.dot(x_centered, x_centered))
+    
+    def mean_reversion(self) -> float:
+        """Среднее абсолютное отклонение / std по гистограмме значений"""
+        n = len(self.values)
+        mean = self.total / n
+        deviation = sum(count * abs(value - mean) for value, count in self.counts.items()) / n
+        return float(deviation / (self.std() + 1e-8))
+
 class AdvancedPatternAnalyzer:
+    """Анализ временного ряда с кэшем по отпечатку истории и инкрементальными суммами
+    
+    Одинаковая история (ансамбль анализирует ее из нескольких предсказателей)
+    берется из LRU-кэша. Если история - прежнее окно, сдвинутое на несколько
+    новых чисел, суммы обновляются только по вошедшим и вышедшим числам.
+    """
+    
+    CACHE_SIZE = 64
+    # Наибольший сдвиг окна, который обновляется инкрементально (иначе окно строится заново)
+    MAX_SHIFT = 32
+    
     def __init__(self):
         self.patterns = {}
+        self._cache = OrderedDict()
+        self._state = None
+        self._stats = {'hits': 0, 'incremental': 0, 'rebuilds': 0}
+    
+    def cache_info(self) -> Dict[str, int]:
+        """Попадания в кэш, инкрементальные обновления и полные пересчеты окна"""
+        return dict(self._stats, size=len(self._cache))
     
     def analyze_time_series(self, history: List[int]) -> Dict:
         """Глубокий анализ временных рядов"""
         if len(history) < 10:
             return {}
         
-        ts = np.array(history)
+        # История - целые числа 1-26, суммы по ним считаются точно
+        ts = np.asarray(history).astype(np.int64)
+        key = hashlib.sha1(ts.tobytes()).hexdigest()
+        
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            self._stats['hits'] += 1
+        else:
+            cached = self._analyze(ts)
+            self._cache[key] = cached
+            if len(self._cache) > self.CACHE_SIZE:
+                self._cache.popitem(last=False)
+        
+        # Копия: вызывающий код не должен менять закэшированный результат
+        return dict(cached, autocorrelation=dict(cached['autocorrelation']))
+    
+    def _advance_state(self, ts: np.ndarray) -> _SeriesState:
+        """Состояние для окна ts: сдвиг прежнего окна или новое"""
+        state = self._state
+        if state is not None:
+            previous = np.fromiter(state.values, dtype=np.int64, count=len(state.values))
+            # Дописанные числа: прежнее окно - начало нового
+            if len(previous) < len(ts) and np.array_equal(ts[:len(previous)], previous):
+                for value in ts[len(previous):].tolist():
+                    state.push(value)
+                self._stats['incremental'] += 1
+                return state
+            # Скользящее окно той же длины, сдвинутое на shift чисел
+            if len(previous) == len(ts):
+                for shift in range(1, min(self.MAX_SHIFT, len(ts) - 1) + 1):
+                    if np.array_equal(previous[shift:], ts[:-shift]):
+                        for value in ts[-shift:].tolist():
+                            state.pop_left()
+                            state.push(value)
+                        self._stats['incremental'] += 1
+                        return state
+        
+        self._stats['rebuilds'] += 1
+        self._state = _SeriesState(ts)
+        return self._state
+    
+    def _analyze(self, ts: np.ndarray) -> Dict:
+        state = self._advance_state(ts)
         
         # Автокорреляция на разных лагах
         autocorr = {}
-        for lag in [1, 2, 3, 5, 7]:
-            if len(ts) > lag:
-                try:
-                    corr = np.corrcoef(ts[:-lag], ts[lag:])[0,1]
-                    if not np.isnan(corr):
-                        autocorr[f"autocorr_lag_{lag}"] = corr
-                except:
-                    autocorr[f"autocorr_lag_{lag}"] = 0.0
+        for lag in AUTOCORR_LAGS:
+            corr = state.autocorrelation(lag)
+            if corr is not None:
+                autocorr[f"autocorr_lag_{lag}"] = corr
         
         # Сезонность (периодичность)
         try:
@@ -39,86 +221,182 @@ class AdvancedPatternAnalyzer:
         except:
             dominant_freq = 0
         
-        # Тренды
-        x = np.arange(len(ts))
-        try:
-            linear_trend = stats.linregress(x, ts).slope if len(ts) > 1 else 0
-        except:
-            linear_trend = 0
-        
         return {
             'autocorrelation': autocorr,
             'dominant_frequency': dominant_freq,
-            'linear_trend': linear_trend,
-            'volatility': np.std(ts) if len(ts) > 1 else 0,
-            'hurst_exponent': self._calculate_hurst(ts),
-            'mean_reversion': self._check_mean_reversion(ts)
+            'linear_trend': state.linear_trend(),
+            'volatility': state.std(),
+            'hurst_exponent': state.hurst(),
+            'mean_reversion': state.mean_reversion()
         }
+
+_shared_analyzer = None
+
+def get_pattern_analyzer() -> AdvancedPatternAnalyzer:
+    """Общий анализатор процесса: предсказатели ансамбля делят один кэш анализа"""
+    global _shared_analyzer
+    if _shared_analyzer is None:
+        _shared_analyzer = AdvancedPatternAnalyzer()
+    return _shared_analyzer
+
+class FrequencyBasedPredictor:
+    """Частотный предсказатель с инкрементальными счетчиками в массивах NumPy"""
     
-    def _calculate_hurst(self, ts: np.ndarray) -> float:
-        """Вычисление экспоненты Херста для определения персистентности"""
-        if len(ts) < 20:
-            return 0.5
+    def __init__(self, snapshot_path: str = None):
+        self.position_counts = np.zeros((4, 26), dtype=np.int64)
+        self.pair_counts = np.zeros((26, 26), dtype=np.int64)  # индекс (min-1, max-1)
+        self.number_counts = np.zeros(26, dtype=np.int64)
+        self.total_groups = 0
+        self.last_group = None
+        self._prefix_hasher = hashlib.sha1()
         
-        try:
-            lags = range(2, min(20, len(ts)//2))
-            tau = [np.std(np.subtract(ts[lag:], ts[:-lag])) for lag in lags]
-            if len(tau) < 2:
-                return 0.5
-            poly = np.polyfit(np.log(lags), np.log(tau), 1)
-            return poly[0]
-        except:
-            return 0.5
+        self.snapshot_path = snapshot_path
+        self._snapshot_checked = False
     
-    def _check_mean_reversion(self, ts: np.ndarray) -> float:
-        """Проверка mean reversion (возвращения к среднему)"""
-        if len(ts) < 10:
-            return 0.0
-        
-        mean = np.mean(ts)
-        deviations = np.abs(ts - mean)
-        return float(np.mean(deviations) / (np.std(ts) + 1e-8))
-
-class FrequencyBasedPredictor:
-    def __init__(self):
-        self.number_frequencies = {}
-        self.pair_frequencies = {}
-        self.position_frequencies = {0: {}, 1: {}, 2: {}, 3: {}}
+    def reset(self):
+        """Сброс всех счетчиков"""
+        self.position_counts[:] = 0
+        self.pair_counts[:] = 0
+        self.number_counts[:] = 0
         self.total_groups = 0
+        self.last_group = None
+        self._prefix_hasher = hashlib.sha1()
     
-    def update_frequencies(self, dataset: List[str]):
-        """Обновление частотных характеристик"""
-        # Сбрасываем частоты
-        self.position_frequencies = {0: {}, 1: {}, 2: {}, 3: {}}
-        self.pair_frequencies = {}
-        self.number_frequencies = {}
-        
-        all_numbers = []
-        self.total_groups = len(dataset)
+    @staticmethod
+    def _parse_groups(groups) -> np.ndarray:
+        """Группы (строки или массив [N, 4]) -> массив валидных групп [K, 4]"""
+        if isinstance(groups, np.ndarray):
+            return groups.reshape(-1, 4).astype(np.int64)
         
-        for group_str in dataset:
+        rows = []
+        for group_str in groups:
             try:
                 numbers = [int(x) for x in group_str.strip().split()]
-                if len(numbers) != 4:
-                    continue
-                    
-                all_numbers.extend(numbers)
-                
-                # Частоты чисел по позициям
-                for i, num in enumerate(numbers):
-                    self.position_frequencies[i][num] = self.position_frequencies[i].get(num, 0) + 1
-                
-                # Частоты пар
-                pair1 = tuple(sorted(numbers[:2]))
-                pair2 = tuple(sorted(numbers[2:]))
-                self.pair_frequencies[pair1] = self.pair_frequencies.get(pair1, 0) + 1
-                self.pair_frequencies[pair2] = self.pair_frequencies.get(pair2, 0) + 1
+                if len(numbers) == 4 and all(1 <= x <= 26 for x in numbers):
+                    rows.append(numbers)
             except:
                 continue
+        return np.array(rows, dtype=np.int64).reshape(-1, 4)
+    
+    def add_groups(self, groups):
+        """Инкрементальное добавление новых групп: O(количество новых групп)"""
+        if len(groups) == 0:
+            return
+        
+        array = self._parse_groups(groups) - 1
+        self.total_groups += len(groups)
+        
+        if len(array) > 0:
+            for i in range(4):
+                self.position_counts[i] += np.bincount(array[:, i], minlength=26)
+            self.number_counts += np.bincount(array.ravel(), minlength=26)
+            
+            for pair in (array[:, :2], array[:, 2:]):
+                low, high = pair.min(axis=1), pair.max(axis=1)
+                np.add.at(self.pair_counts, (low, high), 1)
+        
+        # Хэш префикса ведется цепочкой, сохранение снимка не требует прохода по истории
+        for group in groups:
+            self.last_group = self._group_key(group)
+            self._prefix_hasher.update(repr(self.last_group).encode('utf-8'))
+    
+    def update_frequencies(self, dataset):
+        """Обновление частотных характеристик (полный пересчет)"""
+        self.reset()
+        self.add_groups(dataset)
+    
+    def sync(self, dataset) -> int:
+        """Синхронизация с датасетом: досчитываются только новые группы
+        
+        Возвращает количество обработанных групп. Сверяется последняя учтенная
+        группа: если она не совпадает (история переписана), выполняется полный
+        пересчет. Полная сверка префикса выполняется при загрузке снимка.
+        """
+        if not self._snapshot_checked:
+            self._snapshot_checked = True
+            self.load_snapshot(dataset)
+        
+        count = self.total_groups
+        if count <= len(dataset) and (count == 0 or self._group_key(dataset[count - 1]) == self.last_group):
+            new_groups = dataset[count:]
+            self.add_groups(new_groups)
+            processed = len(new_groups)
+        else:
+            self.update_frequencies(dataset)
+            processed = len(dataset)
+        
+        if processed:
+            self.save_snapshot()
+        return processed
+    
+    @staticmethod
+    def _group_key(group) -> tuple:
+        """Нормализованное представление группы для сравнения"""
+        if isinstance(group, str):
+            try:
+                return tuple(int(x) for x in group.strip().split())
+            except:
+                return (group,)
+        return tuple(int(x) for x in group)
+    
+    def _prefix_hash(self, groups) -> str:
+        """Хэш последовательности групп (тот же, что ведется в add_groups)"""
+        hasher = hashlib.sha1()
+        for group in groups:
+            hasher.update(repr(self._group_key(group)).encode('utf-8'))
+        return hasher.hexdigest()
+    
+    def save_snapshot(self) -> None:
+        """Сохранение счетчиков на диск, чтобы не пересчитывать их после перезапуска"""
+        if not self.snapshot_path:
+            return
         
-        # Общие частоты чисел
-        for num in all_numbers:
-            self.number_frequencies[num] = self.number_frequencies.get(num, 0) + 1
+        try:
+            # Снимок сохраняют несколько процессов (веб, автообучение, бэктест) - временный файл свой у каждого
+            tmp_path = f"{self.snapshot_path}.{os.getpid()}.tmp.npz"
+            np.savez(
+                tmp_path,
+                position_counts=self.position_counts,
+                pair_counts=self.pair_counts,
+                number_counts=self.number_counts,
+                total_groups=np.int64(self.total_groups),
+                prefix_sha1=np.array(self._prefix_hasher.hexdigest()),
+            )
+            os.replace(tmp_path, self.snapshot_path)
+        except Exception as e:
+            print(f"⚠️  Ошибка сохранения частот: {e}")
+    
+    def load_snapshot(self, dataset) -> bool:
+        """Загрузка счетчиков, если снимок соответствует началу датасета"""
+        if not self.snapshot_path or not os.path.exists(self.snapshot_path):
+            return False
+        
+        try:
+            with np.load(self.snapshot_path) as snapshot:
+                total_groups = int(snapshot['total_groups'])
+                if total_groups > len(dataset):
+                    return False
+                
+                # Проверка при старте: снимок посчитан по тому же началу истории
+                prefix = dataset[:total_groups]
+                if str(snapshot['prefix_sha1']) != self._prefix_hash(prefix):
+                    print("⚠️  Снимок частот устарел, выполняем полный пересчет")
+                    return False
+                
+                self.reset()
+                self.position_counts[:] = snapshot['position_counts']
+                self.pair_counts[:] = snapshot['pair_counts']
+                self.number_counts[:] = snapshot['number_counts']
+                self.total_groups = total_groups
+            
+            for group in prefix:
+                self._prefix_hasher.update(repr(self._group_key(group)).encode('utf-8'))
+            self.last_group = self._group_key(prefix[total_groups - 1]) if total_groups else None
+            return True
+        except Exception as e:
+            print(f"⚠️  Ошибка загрузки снимка частот: {e}")
+            self.reset()
+            return False
     
     def get_probability_scores(self, group: tuple) -> float:
         """Вычисление вероятностного score для группы"""
@@ -129,22 +407,59 @@ class FrequencyBasedPredictor:
         
         # Вероятности по позициям
         for i, num in enumerate(group):
-            pos_freq = self.position_frequencies[i].get(num, 0)
+            pos_freq = int(self.position_counts[i, num - 1]) if 1 <= num <= 26 else 0
             # Additive smoothing (Laplace)
             score *= (pos_freq + 1) / (self.total_groups + 26)
         
         # Вероятности пар
-        pair1 = tuple(sorted(group[:2]))
-        pair2 = tuple(sorted(group[2:]))
+        pair1 = sorted(group[:2])
+        pair2 = sorted(group[2:])
         
         total_pairs = self.total_groups
-        pair1_prob = (self.pair_frequencies.get(pair1, 0) + 1) / (total_pairs + 325)  # 26*25/2 = 325
-        pair2_prob = (self.pair_frequencies.get(pair2, 0) + 1) / (total_pairs + 325)
+        pair1_prob = (self._pair_count(pair1) + 1) / (total_pairs + 325)  # 26*25/2 = 325
+        pair2_prob = (self._pair_count(pair2) + 1) / (total_pairs + 325)
         
         score *= pair1_prob * pair2_prob
         
         # Нормализация и логарифмирование для стабильности
         return max(1e-10, score)
+    
+    def _pair_scores(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Множители score первой и второй пары [26, 26]: score = first[a, b] * second[c, d]"""
+        positional = (self.position_counts + 1) / (self.total_groups + 26)
+        
+        # Счетчики пар симметричны: (a, b) и (b, a) - одна пара
+        pairs = self.pair_counts + self.pair_counts.T - np.diag(np.diag(self.pair_counts))
+        pair_probs = (pairs + 1) / (self.total_groups + 325)
+        
+        first = positional[0][:, None] * positional[1][None, :] * pair_probs
+        second = positional[2][:, None] * positional[3][None, :] * pair_probs
+        return first, second
+    
+    def score_tensor(self) -> np.ndarray:
+        """get_probability_scores сразу для всех групп 26^4 -> [26, 26, 26, 26]"""
+        if self.total_groups == 0:
+            return np.full((26, 26, 26, 26), 0.001)
+        
+        first, second = self._pair_scores()
+        return np.maximum(first[:, :, None, None] * second[None, None, :, :], 1e-10)
+    
+    def top_k(self, k: int) -> List[Tuple[Tuple[int, int, int, int], float]]:
+        """Точный top-k групп по частотному score без построения тензора 26^4"""
+        from model.simple_nn.candidate_scoring import top_k_groups, top_k_pair_product
+        
+        if self.total_groups == 0:
+            return top_k_groups(self.score_tensor(), k)
+        
+        first, second = self._pair_scores()
+        return top_k_pair_product(first, second, k, floor=1e-10)
+    
+    def _pair_count(self, pair) -> int:
+        """Частота неупорядоченной пары"""
+        low, high = pair
+        if 1 <= low <= 26 and 1 <= high <= 26:
+            return int(self.pair_counts[low - 1, high - 1])
+        return 0
 
 class SmartNumberSelector:
     def __init__(self, memory_size: int = 50):
@@ -0,0 +1,310 @@
+# [file name]: model/backtest.py
+"""
+Walk-forward бэктест предсказателей на истории dataset.json
+
+Для каждого из последних N тиражей предсказание строится только по группам,
+предшествующим тиражу, и сравнивается с фактической группой через compare_groups.
+Шаги делятся на непрерывные отрезки, которые считаются параллельно в процессах.
+
+Запуск:
+    python -m model.backtest --predictor frequency --draws 1000
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Tuple, Dict
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+try:
+    from .data_loader import get_dataset_view, compare_groups
+except ImportError:
+    from data_loader import get_dataset_view, compare_groups
+
+PREDICTORS = ('neural', 'ensemble', 'frequency', 'pattern', 'statistical')
+
+# Размер истории (в группах) как в SimpleNeuralSystem: 25 для нейросети, 30 для ансамбля
+DEFAULT_HISTORY_GROUPS = {
+    'neural': 25,
+    'ensemble': 30,
+    'frequency': 30,
+    'pattern': 30,
+    'statistical': 30,
+}
+
+NEURAL_BATCH_SIZE = 64
+
+# Состояние процесса-исполнителя (заполняется в _init_worker)
+_worker = {}
+
+def _peak_rss_mb() -> float:
+    """Пиковое потребление памяти текущим процессом, МБ"""
+    if resource is None:
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux отдает КБ, macOS - байты
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+class _BatchNeuralMember:
+    """Нейросеть как член ансамбля для бэктеста: детерминированный predict_batch"""
+    
+    def __init__(self, predictor):
+        self.predictor = predictor
+    
+    def predict(self, history: List[int], top_k: int = 10) -> List[Tuple[Tuple[int, int, int, int], float]]:
+        return self.predictor.predict_batch([history], top_k)[0]
+
+def _load_neural_predictor(model_path: str):
+    """Загрузка нейросети без обновления ансамбля по полной истории"""
+    import torch
+    from model.simple_nn.predictor import EnhancedPredictor
+    
+    # Процессов и так по числу ядер
+    torch.set_num_threads(1)
+    
+    predictor = EnhancedPredictor(model_path)
+    if not predictor.load_model(update_ensemble=False):
+        raise RuntimeError(f"Не удалось загрузить модель: {model_path}")
+    return predictor
+
+def _init_worker(groups: np.ndarray, config: Dict):
+    """Инициализация процесса: данные и тяжелые объекты загружаются один раз"""
+    _worker.clear()
+    _worker['groups'] = groups
+    _worker['config'] = config
+    
+    name = config['predictor']
+    if name in ('neural', 'ensemble'):
+        _worker['neural'] = _load_neural_predictor(config['model_path'])
+
+def _make_predictor(name: str):
+    """Свежий предсказатель для отрезка шагов"""
+    from model.advanced_features import FrequencyBasedPredictor
+    from model.ensemble_predictor import EnsemblePredictor, PatternBasedPredictor, StatisticalPredictor
+    
+    if name == 'frequency':
+        # Без snapshot_path: снимок реальной истории не перезаписывается
+        return FrequencyBasedPredictor()
+    if name == 'pattern':
+        return PatternBasedPredictor()
+    if name == 'statistical':
+        return StatisticalPredictor()
+    if name == 'ensemble':
+        # Члены по очереди: случайные стратегии детерминированы seed шага, процессов и так по числу ядер
+        ensemble = EnsemblePredictor(concurrent=False)
+        ensemble.predictors['frequency'] = FrequencyBasedPredictor()
+        ensemble.set_neural_predictor(_BatchNeuralMember(_worker['neural']))
+        return ensemble
+    return None
+
+def _score_step(candidates: List[tuple], actual: Tuple[int, int, int, int]) -> Dict:
+    """Лучшее совпадение среди кандидатов шага"""
+    best_total, best_exact = 0, 0
+    for group, _ in candidates:
+        comparison = compare_groups(group, actual)
+        best_total = max(best_total, comparison['total_matches'])
+        best_exact = max(best_exact, comparison['exact_matches'])
+    return {'best_matches': best_total, 'best_exact': best_exact, 'candidates': len(candidates)}
+
+def _run_chunk(bounds: Tuple[int, int]) -> List[Dict]:
+    """Прогон шагов [start, end): шаг t предсказывает группу t по группам [0, t)"""
+    start, end = bounds
+    groups = _worker['groups']
+    config = _worker['config']
+    name, top_k = config['predictor'], config['top_k']
+    
+    steps = []
+    
+    if name == 'neural':
+        predictor = _worker['neural']
+        for batch_start in range(start, end, NEURAL_BATCH_SIZE):
+            batch_end = min(batch_start + NEURAL_BATCH_SIZE, end)
+            histories = [groups[max(0, t - config['history_groups']):t].ravel().tolist()
+                         for t in range(batch_start, batch_end)]
+            
+            began = time.perf_counter()
+            batch = predictor.predict_batch(histories, top_k, use_patterns=config['use_patterns'])
+            # Время пакета делится поровну между его шагами
+            step_ms = (time.perf_counter() - began) * 1000 / len(histories)
+            
+            for t, candidates in zip(range(batch_start, batch_end), batch):
+                step = _score_step(candidates, tuple(groups[t]))
+                step.update(index=t, time_ms=step_ms, peak_rss_mb=_peak_rss_mb())
+                steps.append(step)
+        return steps
+    
+    predictor = _make_predictor(name)
+    frequency = predictor if name == 'frequency' else (
+        predictor.predictors['frequency'] if name == 'ensemble' else None)
+    if frequency is not None:
+        frequency.add_groups(groups[:start])
+    
+    for t in range(start, end):
+        # Случайные стратегии детерминированы номером шага, а не разбиением на процессы
+        random.seed(config['seed'] + t)
+        np.random.seed((config['seed'] + t) % (2 ** 32))
+        
+        began = time.perf_counter()
+        if name == 'frequency':
+            candidates = predictor.top_k(top_k)
+        else:
+            history = groups[max(0, t - config['history_groups']):t].ravel().tolist()
+            if name == 'ensemble':
+                candidates = predictor.predict_ensemble(history, top_k)
+            else:
+                candidates = predictor.predict(history, top_k)
+        elapsed_ms = (time.perf_counter() - began) * 1000
+        
+        step = _score_step(candidates, tuple(groups[t]))
+        step.update(index=t, time_ms=elapsed_ms, peak_rss_mb=_peak_rss_mb())
+        steps.append(step)
+        
+        if frequency is not None:
+            frequency.add_groups(groups[t:t + 1])
+    
+    return steps
+
+class WalkForwardBacktest:
+    """Walk-forward бэктест одного предсказателя
+    
+    Нейросеть не переобучается по ходу прогона: для честной оценки модель
+    (model_path) должна быть обучена на истории до первого проверяемого тиража.
+    """
+    
+    def __init__(self, predictor: str = 'frequency', draws: int = 1000, top_k: int = 10,
+                 workers: int = 0, history_groups: int = None, model_path: str = None,
+                 use_patterns: bool = True, seed: int = 42):
+        if predictor not in PREDICTORS:
+            raise ValueError(f"Неизвестный предсказатель: {predictor} (доступны: {', '.join(PREDICTORS)})")
+        
+        self.predictor = predictor
+        self.draws = draws
+        self.top_k = top_k
+        self.workers = workers or os.cpu_count() or 1
+        self.history_groups = history_groups or DEFAULT_HISTORY_GROUPS[predictor]
+        # Путь модели как в SimpleNeuralSystem
+        self.model_path = model_path or "data/simple_model.pth"
+        self.use_patterns = use_patterns
+        self.seed = seed
+    
+    def _chunks(self, start: int, end: int) -> List[Tuple[int, int]]:
+        """Непрерывные отрезки шагов, по несколько на процесс для балансировки"""
+        count = min(end - start, self.workers * 4)
+        edges = np.linspace(start, end, count + 1).astype(int)
+        return [(int(a), int(b)) for a, b in zip(edges[:-1], edges[1:]) if b > a]
+    
+    def run(self, groups: np.ndarray = None) -> Dict:
+        """Прогон бэктеста; groups [N, 4] по умолчанию берется из датасета"""
+        groups = np.asarray(get_dataset_view() if groups is None else groups, dtype=np.int64).reshape(-1, 4)
+        
+        if self.predictor in ('neural', 'ensemble') and not os.path.exists(self.model_path):
+            raise FileNotFoundError(f"Файл модели не найден: {self.model_path}")
+        
+        start = max(self.history_groups, len(groups) - self.draws)
+        if start >= len(groups):
+            raise ValueError(f"Недостаточно данных: {len(groups)} групп при истории {self.history_groups}")
+        
+        config = {
+            'predictor': self.predictor,
+            'top_k': self.top_k,
+            'history_groups': self.history_groups,
+            'model_path': self.model_path,
+            'use_patterns': self.use_patterns,
+            'seed': self.seed,
+        }
+        chunks = self._chunks(start, len(groups))
+        
+        print(f"🔁 Бэктест '{self.predictor}': {len(groups) - start} тиражей, процессов: {self.workers}")
+        began = time.perf_counter()
+        
+        if self.workers == 1:
+            _init_worker(groups, config)
+            results = [_run_chunk(chunk) for chunk in chunks]
+        else:
+            with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                     initargs=(groups, config)) as executor:
+                results = list(executor.map(_run_chunk, chunks))
+        
+        steps = [step for chunk_steps in results for step in chunk_steps]
+        report = self.summarize(steps)
+        report.update(config)
+        report.update(workers=self.workers, wall_clock_sec=time.perf_counter() - began)
+        return report
+    
+    @staticmethod
+    def summarize(steps: List[Dict]) -> Dict:
+        """Распределения совпадений, время и память по шагам"""
+        best = np.array([step['best_matches'] for step in steps], dtype=np.int64)
+        exact = np.array([step['best_exact'] for step in steps], dtype=np.int64)
+        times = np.array([step['time_ms'] for step in steps], dtype=np.float64)
+        memory = np.array([step['peak_rss_mb'] for step in steps], dtype=np.float64)
+        
+        return {
+            'steps': len(steps),
+            'matches_distribution': {str(k): int(v) for k, v in enumerate(np.bincount(best, minlength=5))},
+            'exact_distribution': {str(k): int(v) for k, v in enumerate(np.bincount(exact, minlength=5))},
+            'hit_rate': {f'>={k}': float(np.mean(best >= k)) for k in range(1, 5)},
+            'mean_best_matches': float(best.mean()),
+            'empty_predictions': int(sum(1 for step in steps if step['candidates'] == 0)),
+            'step_time_ms': {
+                'mean': float(times.mean()),
+                'p50': float(np.percentile(times, 50)),
+                'p95': float(np.percentile(times, 95)),
+                'max': float(times.max()),
+            },
+            'peak_rss_mb': float(memory.max()),
+            'per_step': steps,
+        }
+
+def print_report(report: Dict):
+    """Краткий отчет бэктеста в консоль"""
+    steps = report['steps']
+    print(f"📊 Бэктест '{report['predictor']}' (top-{report['top_k']}): {steps} тиражей "
+          f"за {report['wall_clock_sec']:.1f} сек, процессов: {report['workers']}")
+    print("🎯 Лучшее совпадение по парам:")
+    for matches, count in report['matches_distribution'].items():
+        print(f"   {matches}: {count:5d} ({count / steps:.1%})")
+    print("📈 Hit-rate: " + ", ".join(f"{k}: {v:.1%}" for k, v in report['hit_rate'].items()))
+    timing = report['step_time_ms']
+    print(f"⏱️  Шаг: среднее {timing['mean']:.1f} мс, p50 {timing['p50']:.1f} мс, "
+          f"p95 {timing['p95']:.1f} мс, макс {timing['max']:.1f} мс")
+    print(f"💾 Пиковая память процесса: {report['peak_rss_mb']:.0f} МБ")
+    if report['empty_predictions']:
+        print(f"⚠️  Шагов без предсказаний: {report['empty_predictions']}")
+
+if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Walk-forward backtest over dataset.json')
+    parser.add_argument('--predictor', choices=PREDICTORS, default='frequency', help='Predictor to evaluate')
+    parser.add_argument('--draws', type=int, default=1000, help='Number of last draws to replay')
+    parser.add_argument('--top-k', type=int, default=10, help='Predictions per draw')
+    parser.add_argument('--workers', type=int, default=0, help='Worker processes (0 = all CPU cores)')
+    parser.add_argument('--history', type=int, default=None, help='History length in groups')
+    parser.add_argument('--model-path', default=None, help='Model checkpoint for neural/ensemble')
+    parser.add_argument('--no-patterns', action='store_true', help='Neural: rank by softmax product only')
+    parser.add_argument('--seed', type=int, default=42, help='Seed for randomized predictors')
+    parser.add_argument('--output', default=None, help='Write full JSON report (with per-step records)')
+    
+    args = parser.parse_args()
+    
+    backtest = WalkForwardBacktest(
+        predictor=args.predictor, draws=args.draws, top_k=args.top_k, workers=args.workers,
+        history_groups=args.history, model_path=args.model_path,
+        use_patterns=not args.no_patterns, seed=args.seed,
+    )
+    report = backtest.run()
+    print_report(report)
+    
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"💾 Отчет сохранен: {args.output}")
@@ -6,6 +6,7 @@
 import json
 import os
 import sys
+import numpy as np
 from typing import List, Tuple, Dict
 
 # Добавляем родительскую директорию в путь для импортов
@@ -18,40 +19,186 @@ DATA_DIR = os.path.join(parent_dir, 'data')
 DATASET_PATH = os.path.join(DATA_DIR, 'dataset.json')
 STATE_PATH = os.path.join(DATA_DIR, 'predictions_state.json')
 
+# Бинарное хранилище: строки фиксированной ширины по 4 числа uint8
+GROUP_SIZE = 4
+
 def ensure_data_dir():
     """Создание директории данных если не существует"""
     os.makedirs(DATA_DIR, exist_ok=True)
 
-def load_dataset() -> List[str]:
-    """Загрузка dataset.json"""
+def get_data_path(filename: str) -> str:
+    """Путь к служебному файлу в директории данных"""
+    return os.path.join(DATA_DIR, filename)
+
+def get_dataset_bin_path() -> str:
+    """Путь к бинарному хранилищу рядом с dataset.json"""
+    return os.path.splitext(DATASET_PATH)[0] + '.bin'
+
+def _groups_to_array(data: List[str]) -> np.ndarray:
+    """Преобразование строковых групп в массив [N, 4] uint8 (невалидные пропускаются)"""
+    rows = []
+    skipped = 0
+    for group_str in data:
+        try:
+            numbers = [int(x) for x in group_str.strip().split()]
+            if len(numbers) == GROUP_SIZE and all(1 <= x <= 26 for x in numbers):
+                rows.append(numbers)
+                continue
+        except:
+            pass
+        skipped += 1
+    
+    if skipped:
+        print(f"⚠️  Пропущено невалидных групп: {skipped}")
+    
+    return np.array(rows, dtype=np.uint8).reshape(-1, GROUP_SIZE)
+
+def _write_dataset_bin(array: np.ndarray) -> None:
+    """Атомарная запись бинарного хранилища"""
+    bin_path = get_dataset_bin_path()
+    tmp_path = bin_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(np.ascontiguousarray(array, dtype=np.uint8).tobytes())
+    os.replace(tmp_path, bin_path)
+
+def _load_dataset_json() -> List[str]:
+    """Чтение dataset.json"""
+    with open(DATASET_PATH, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    
+    if not isinstance(data, list):
+        raise ValueError("Неверный формат dataset.json")
+    
+    return data
+
+def migrate_dataset_to_binary(force: bool = False) -> bool:
+    """Одноразовая миграция dataset.json в бинарное хранилище
+    
+    Выполняется, только если бинарного хранилища еще нет. После миграции
+    источник истины - dataset.bin: группы, дописанные append_group, есть
+    только в нем, а dataset.json может обновиться сам (git pull, восстановление
+    из резервной копии, сохранение в редакторе). Переимпорт вручную
+    измененного dataset.json - только явно, force=True.
+    """
     ensure_data_dir()
+    bin_path = get_dataset_bin_path()
     
     if not os.path.exists(DATASET_PATH):
+        return os.path.exists(bin_path)
+    
+    if not force and os.path.exists(bin_path):
+        return True
+    
+    try:
+        array = _groups_to_array(_load_dataset_json())
+        _write_dataset_bin(array)
+        print(f"✅ dataset.json перенесен в бинарное хранилище: {len(array)} групп")
+        return True
+    except Exception as e:
+        print(f"❌ Ошибка миграции dataset.json: {e}")
+        return os.path.exists(bin_path)
+
+def load_dataset_array() -> np.ndarray:
+    """Загрузка датасета массивом [N, 4] uint8 без парсинга (memory-mapped)"""
+    ensure_data_dir()
+    
+    if not migrate_dataset_to_binary():
         print("❌ Файл dataset.json не найден, создаем новый")
-        return []
+        return np.empty((0, GROUP_SIZE), dtype=np.uint8)
+    
+    bin_path = get_dataset_bin_path()
+    rows = os.path.getsize(bin_path) // GROUP_SIZE
+    if rows == 0:
+        return np.empty((0, GROUP_SIZE), dtype=np.uint8)
+    
+    # Неполная последняя строка (прерванная запись) игнорируется
+    return np.memmap(bin_path, dtype=np.uint8, mode='r', shape=(rows, GROUP_SIZE))
+
+# Кэш датасета в памяти процесса, ключ - (путь, mtime, размер) бинарного файла
+_dataset_cache = {'key': None, 'array': None, 'groups': None}
+
+def get_dataset_view() -> np.ndarray:
+    """Общий кэшированный датасет [N, 4] int64 (только чтение)
     
+    Файл перечитывается, только если изменились его mtime или размер.
+    """
+    ensure_data_dir()
+    
+    if not migrate_dataset_to_binary():
+        empty = np.empty((0, GROUP_SIZE), dtype=np.int64)
+        _dataset_cache.update(key=None, array=empty, groups=None)
+        return empty
+    
+    bin_path = get_dataset_bin_path()
+    stat = os.stat(bin_path)
+    key = (bin_path, stat.st_mtime_ns, stat.st_size)
+    
+    if _dataset_cache['key'] != key:
+        array = np.array(load_dataset_array(), dtype=np.int64).reshape(-1, GROUP_SIZE)
+        array.setflags(write=False)
+        _dataset_cache.update(key=key, array=array, groups=None)
+    
+    return _dataset_cache['array']
+
+def get_recent_numbers(groups_count: int) -> List[int]:
+    """Плоский список чисел последних groups_count групп из кэша"""
+    view = get_dataset_view()
+    return view[-groups_count:].ravel().tolist() if groups_count > 0 else []
+
+def load_dataset() -> List[str]:
+    """Загрузка датасета списком строковых групп (совместимый формат, из кэша)"""
     try:
-        with open(DATASET_PATH, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        if not isinstance(data, list):
-            print("❌ Неверный формат dataset.json")
-            return []
-        
-        return data
-        
+        view = get_dataset_view()
+        if _dataset_cache['groups'] is None:
+            _dataset_cache['groups'] = [' '.join(map(str, row)) for row in view.tolist()]
+        # Копия списка: вызывающий код может его изменять
+        return list(_dataset_cache['groups'])
     except Exception as e:
-        print(f"❌ Ошибка загрузки dataset.json: {e}")
+        print(f"❌ Ошибка загрузки dataset: {e}")
         return []
 
+def append_group(group_str: str) -> bool:
+    """Дописывание одной группы в бинарное хранилище за O(1)"""
+    ensure_data_dir()
+    
+    array = _groups_to_array([group_str])
+    if len(array) == 0:
+        print(f"❌ Неверный формат группы: {group_str}")
+        return False
+    
+    try:
+        migrate_dataset_to_binary()
+        bin_path = get_dataset_bin_path()
+        with open(bin_path, 'ab') as f:
+            # Отбрасываем хвост прерванной записи, чтобы не сдвинуть строки
+            size = f.tell()
+            if size % GROUP_SIZE:
+                f.truncate(size - size % GROUP_SIZE)
+            f.write(array.tobytes())
+        return True
+    except Exception as e:
+        print(f"❌ Ошибка добавления группы в dataset: {e}")
+        return False
+
 def save_dataset(data: List[str]) -> None:
-    """Сохранение dataset.json"""
+    """Полная перезапись датасета (для новых групп используйте append_group)"""
     ensure_data_dir()
     try:
-        with open(DATASET_PATH, 'w', encoding='utf-8') as f:
+        _write_dataset_bin(_groups_to_array(data))
+    except Exception as e:
+        print(f"❌ Ошибка сохранения dataset: {e}")
+
+def export_dataset_json(path: str = None) -> bool:
+    """Экспорт бинарного хранилища в JSON для совместимости"""
+    path = path or DATASET_PATH
+    try:
+        data = load_dataset()
+        with open(path, 'w', encoding='utf-8') as f:
             json.dump(data, f, ensure_ascii=False, indent=2)
+        return True
     except Exception as e:
-        print(f"❌ Ошибка сохранения dataset.json: {e}")
+        print(f"❌ Ошибка экспорта dataset.json: {e}")
+        return False
 
 def validate_group(group_str: str) -> bool:
     """Валидация группы чисел"""
@@ -4,7 +4,10 @@
 """
 
 import numpy as np
-from typing import List, Tuple, Dict
+from typing import List, Tuple, Dict, Optional
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+import threading
+import time
 import sys
 import os
 
@@ -16,6 +19,9 @@ if current_dir not in sys.path:
 class StatisticalPredictor:
     """Статистический предсказатель на основе паттернов"""
     
+    # Стадии PredictionContext, которые читает predict_context
+    CONTEXT_STAGES = ('temporal_patterns',)
+    
     def __init__(self):
         self._pattern_analyzer = None
         self._max_history_length = 100  # ⚡ ОГРАНИЧИВАЕМ историю
@@ -24,8 +30,9 @@ class StatisticalPredictor:
         """Ленивая загрузка анализатора паттернов"""
         if self._pattern_analyzer is None:
             try:
-                from model.advanced_features import AdvancedPatternAnalyzer
-                self._pattern_analyzer = AdvancedPatternAnalyzer()
+                from model.advanced_features import get_pattern_analyzer
+                # Общий с EnhancedPredictor анализатор: история анализируется один раз на прогноз
+                self._pattern_analyzer = get_pattern_analyzer()
             except ImportError as e:
                 print(f"⚠️  Не удалось загрузить анализатор паттернов: {e}")
                 self._pattern_analyzer = None
@@ -36,11 +43,19 @@ class StatisticalPredictor:
         if len(history) < 20:
             return []
         
+        from model.prediction_context import build_context
+        return self.predict_context(build_context(history, self.CONTEXT_STAGES, analyzer=self._get_pattern_analyzer()), top_k)
+    
+    def predict_context(self, context, top_k: int = 10) -> List[Tuple[Tuple[int, int, int, int], float]]:
+        """Статистическое предсказание по временному анализу из контекста"""
+        history = list(context.history)
+        if len(history) < 20:
+            return []
+        
         # ⚡ ОГРАНИЧИВАЕМ размер истории для предотвращения утечек
         limited_history = history[-self._max_history_length:]
 
-        analyzer = self._get_pattern_analyzer()
-        patterns = analyzer.analyze_time_series(history) if analyzer else {}
+        patterns = context.temporal_patterns
         
         # Генерация кандидатов на основе статистических паттернов
         candidates = self._generate_statistical_candidates(history, patterns, top_k)
@@ -104,6 +119,12 @@ class StatisticalPredictor:
 class PatternBasedPredictor:
     """Предсказатель на основе паттернов последовательностей"""
     
+    # Последовательности ищутся по всей истории, стадии контекста не нужны
+    CONTEXT_STAGES = ()
+    
+    def predict_context(self, context, top_k: int = 10) -> List[Tuple[Tuple[int, int, int, int], float]]:
+        return self.predict(list(context.history), top_k)
+    
     def predict(self, history: List[int], top_k: int = 10) -> List[Tuple[Tuple[int, int, int, int], float]]:
         """Предсказание на основе паттернов последовательностей"""
         if len(history) < 15:
@@ -181,8 +202,14 @@ class PatternBasedPredictor:
         return (first_pair[0], first_pair[1], second_pair[0], second_pair[1])
 
 # [file name]: model/ensemble_predictor.py
+# Порядок членов ансамбля (и порядок агрегации их кандидатов)
+ENSEMBLE_MEMBERS = ['frequency', 'pattern', 'statistical', 'neural']
+# Срок ответа члена ансамбля от начала прогноза по умолчанию, секунды (None - без срока):
+# холодный член (первая загрузка модели) может отвечать дольше любого разумного срока
+MEMBER_TIMEOUT = None
+
 class EnsemblePredictor:
-    def __init__(self):
+    def __init__(self, concurrent: bool = True, member_timeout: Optional[float] = MEMBER_TIMEOUT):
         self.predictors = {
             'frequency': None,
             'pattern': None, 
@@ -196,50 +223,157 @@ class EnsemblePredictor:
             'neural': 0.20
         }
         
-        # ⚡ ДОБАВЛЯЕМ ЗАЩИТУ ОТ РЕКУРСИИ
-        self._in_prediction = False
+        # Члены выполняются параллельно в потоках; concurrent=False - по очереди
+        # в вызывающем потоке (детерминированно при фиксированном seed, для бэктеста)
+        self.concurrent = concurrent
+        # Срок ответа каждого члена (None - без срока); опоздавший член отбрасывается
+        self.member_timeouts = {name: member_timeout for name in ENSEMBLE_MEMBERS}
+        # Вызовы опоздавших членов, которые еще выполняются
+        self._late_calls = {}
+        # Задержка членов: последний прогноз и накопленная статистика
+        self.last_latency_ms = {}
+        self._latency = {}
+        
         self._number_selector = None
         self.dataset = []
 
-    def predict_ensemble(self, history: List[int], top_k: int = 15):
-        """Ансамблевое предсказание с защитой от рекурсии"""
-        # ⚡ ЗАЩИТА ОТ РЕКУРСИИ
-        if self._in_prediction:
-            print("⚠️  Обнаружена рекурсия, возвращаем пустой список")
-            return []
-        
-        self._in_prediction = True
-        all_predictions = []
+    def context_stages(self) -> set:
+        """Стадии PredictionContext, нужные членам ансамбля"""
+        stages = set()
+        for name in ENSEMBLE_MEMBERS:
+            stages.update(getattr(self._get_predictor(name), 'CONTEXT_STAGES', ()))
+        return stages
+    
+    def build_context(self, history: List[int]):
+        """Контекст прогноза со стадиями всех членов ансамбля"""
+        from model.prediction_context import build_context
         
+        analyzer = None
         try:
-            for name in ['frequency', 'pattern', 'statistical', 'neural']:
-                predictor = self._get_predictor(name)
-                if predictor is None:
-                    continue
-                
-                # ⚡ ОГРАНИЧИВАЕМ top_k для проблемных предсказателей
-                predictor_top_k = top_k
-                if name in ['pattern', 'statistical']:
-                    predictor_top_k = min(top_k, 5)  # Лимит для проблемных
-                
-                try:
-                    predictions = self._safe_predict(predictor, history, predictor_top_k)
-                    if predictions:
-                        weight = self.weights[name]
-                        weighted = [(group, score * weight) for group, score in predictions]
-                        all_predictions.extend(weighted)
-                        
-                except Exception as e:
-                    print(f"❌ Ошибка в {name}: {e}")
-                    continue
-        
-        finally:
-            self._in_prediction = False  # ⚡ ВСЕГДА сбрасываем флаг
+            from model.advanced_features import get_pattern_analyzer
+            analyzer = get_pattern_analyzer()
+        except ImportError as e:
+            print(f"⚠️  Не удалось загрузить анализатор паттернов: {e}")
+        
+        return build_context(history, self.context_stages(), analyzer=analyzer,
+                             neural=self.predictors['neural'], frequency=self._get_frequency_predictor())
+    
+    def predict_ensemble(self, history: List[int], top_k: int = 15, context=None):
+        """Ансамблевое предсказание по общему контексту
+        
+        Контекст (PredictionContext) строится один раз и передается всем
+        членам ансамбля; готовый контекст можно передать из вызывающего кода.
+        Члены выполняются параллельно, каждый со своим сроком (member_timeouts);
+        задержки - в last_latency_ms и latency_info(). Опоздавший член
+        отбрасывается. Его вес пропорционально перешел бы к ответившим, но
+        общий множитель не меняет ни порядок кандидатов, ни их отбор, поэтому
+        веса ответивших остаются прежними.
+        """
+        if context is None:
+            context = self.build_context(history)
+        self.last_latency_ms = {'context': sum(context.stage_ms.values())}
+        
+        results = self._run_members(context, top_k)
+        
+        all_predictions = []
+        for name, predictions in results.items():
+            if predictions:
+                weight = self.weights[name]
+                all_predictions.extend((group, score * weight) for group, score in predictions)
         
         # Агрегация результатов
         combined = self._aggregate_predictions(all_predictions)
         return combined[:top_k]
     
+    def _run_members(self, context, top_k: int) -> Dict[str, List[tuple]]:
+        """Кандидаты членов ансамбля: {имя: кандидаты или None, если член не уложился в срок}"""
+        members = {}
+        for name in ENSEMBLE_MEMBERS:
+            predictor = self._get_predictor(name)
+            if predictor is None:
+                continue
+            
+            # ⚡ ОГРАНИЧИВАЕМ top_k для проблемных предсказателей
+            predictor_top_k = top_k
+            if name in ['pattern', 'statistical']:
+                predictor_top_k = min(top_k, 5)  # Лимит для проблемных
+            members[name] = (predictor, predictor_top_k)
+        
+        results = {}
+        if not self.concurrent:
+            for name, (predictor, predictor_top_k) in members.items():
+                results[name], elapsed = self._timed_predict(predictor, context, predictor_top_k)
+                self._record_latency(name, elapsed)
+            return results
+        
+        started = time.perf_counter()
+        futures = {}
+        for name, (predictor, predictor_top_k) in members.items():
+            late_call = self._late_calls.get(name)
+            if late_call is not None and not late_call.done():
+                # Прошлый вызов еще не завершился (член завис) - новый не запускаем
+                results[name] = None
+                self._record_latency(name, 0.0, late=True)
+                continue
+            futures[name] = self._start_member(name, predictor, context, predictor_top_k)
+        
+        for name, future in futures.items():
+            timeout = self.member_timeouts.get(name)
+            remaining = None if timeout is None else max(0.0, started + timeout - time.perf_counter())
+            try:
+                results[name], elapsed = future.result(timeout=remaining)
+                self._record_latency(name, elapsed)
+            except FutureTimeoutError:
+                self._late_calls[name] = future
+                results[name] = None
+                self._record_latency(name, time.perf_counter() - started, late=True)
+                print(f"⏱️  {name} не уложился в {timeout:.2f} с, его вес перераспределен")
+            except Exception as e:
+                print(f"❌ Ошибка в {name}: {e}")
+                results[name] = []
+        
+        # Результаты в порядке членов: агрегация не зависит от того, кто ответил первым
+        return {name: results[name] for name in members if name in results}
+    
+    def _start_member(self, name: str, predictor, context, top_k: int) -> Future:
+        """Запуск члена ансамбля в отдельном потоке
+        
+        Потоки демонические: зависший член не задерживает ни ответ, ни
+        завершение процесса (рабочие потоки пула ожидаются при выходе).
+        """
+        future = Future()
+        
+        def run():
+            try:
+                future.set_result(self._timed_predict(predictor, context, top_k))
+            except BaseException as e:
+                future.set_exception(e)
+        
+        threading.Thread(target=run, name=f"ensemble-{name}", daemon=True).start()
+        return future
+    
+    def _timed_predict(self, predictor, context, top_k: int) -> Tuple[List[tuple], float]:
+        began = time.perf_counter()
+        predictions = self._safe_predict(predictor, context, top_k)
+        return predictions, time.perf_counter() - began
+    
+    def _record_latency(self, name: str, elapsed: float, late: bool = False):
+        elapsed_ms = elapsed * 1000
+        self.last_latency_ms[name] = elapsed_ms
+        stats = self._latency.setdefault(name, {'calls': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'timeouts': 0})
+        stats['calls'] += 1
+        stats['total_ms'] += elapsed_ms
+        stats['max_ms'] = max(stats['max_ms'], elapsed_ms)
+        stats['timeouts'] += int(late)
+    
+    def latency_info(self) -> Dict[str, Dict[str, float]]:
+        """Задержка членов ансамбля по всем прогнозам: вызовы, среднее и максимум (мс), опоздания"""
+        return {
+            name: {'calls': stats['calls'], 'mean_ms': stats['total_ms'] / stats['calls'],
+                   'max_ms': stats['max_ms'], 'timeouts': stats['timeouts']}
+            for name, stats in self._latency.items()
+        }
+    
     def _aggregate_predictions(self, all_predictions: List[Tuple[Tuple[int, int, int, int], float]]) -> List[Tuple[Tuple[int, int, int, int], float]]:
         """Агрегирует предсказания от всех моделей"""
         if not all_predictions:
@@ -271,13 +405,17 @@ class EnsemblePredictor:
             return self.predictors['neural']
         return None
     
-    def _safe_predict(self, predictor, history, top_k):
-        """Безопасный вызов predict с ограничениями"""
+    def _safe_predict(self, predictor, context, top_k):
+        """Безопасный вызов predict с ограничениями
+        
+        Члены ансамбля получают готовый контекст и не вызывают ансамбль
+        обратно (predict_group нейросети здесь не используется).
+        """
         try:
-            if hasattr(predictor, 'predict_group'):
-                return predictor.predict_group(history, top_k)
+            if hasattr(predictor, 'predict_context'):
+                return predictor.predict_context(context, top_k)
             elif hasattr(predictor, 'predict'):
-                return predictor.predict(history, top_k)
+                return predictor.predict(list(context.history), top_k)
             return []
         except Exception as e:
             print(f"❌ Ошибка в предсказателе {type(predictor).__name__}: {e}")
@@ -289,7 +427,8 @@ class EnsemblePredictor:
         if self.predictors['frequency'] is None:
             try:
                 from model.advanced_features import FrequencyBasedPredictor
-                self.predictors['frequency'] = FrequencyBasedPredictor()
+                from model.data_loader import get_data_path
+                self.predictors['frequency'] = FrequencyBasedPredictor(get_data_path('frequency_snapshot.npz'))
             except ImportError as e:
                 print(f"⚠️  Не удалось загрузить частотный предсказатель: {e}")
                 self.predictors['frequency'] = None
@@ -334,10 +473,15 @@ class EnsemblePredictor:
         """Обновление ансамбля с новыми данными"""
         self.dataset = dataset
         
-        # Обновляем частотный предсказатель
+        # Частотный предсказатель досчитывает только новые группы
         freq_predictor = self._get_frequency_predictor()
         if freq_predictor:
-            freq_predictor.update_frequencies(dataset)
+            freq_predictor.sync(dataset)
+        
+        # Рекуррентный бэкенд нейросети делает по одному шагу GRU на новую группу
+        neural = self.predictors['neural']
+        if neural is not None and hasattr(neural, 'sync_state'):
+            neural.sync_state(dataset)
     
     def _apply_temperature_adjustment(self, group: tuple, score: float, temperature: Dict) -> float:
         """Корректировка score на основе температуры чисел"""
@@ -0,0 +1,287 @@
+# [file name]: model/hyperparameter_search.py
+"""
+Подбор гиперпараметров нейросети: случайный поиск + successive halving
+
+Каждый trial обучается на истории до проверочного окна и оценивается
+walk-forward бэктестом (model.backtest) на последних validation_draws тиражах.
+На каждом раунде бюджет эпох растет в eta раз, а дальше проходит лучшая 1/eta
+часть trials. Trials считаются параллельно в процессах с фиксированным числом
+потоков torch, результаты каждого раунда дописываются в журнал trials (JSONL).
+
+Запуск:
+    python -m model.hyperparameter_search --trials 9 --workers 3
+    python -m model.hyperparameter_search --trials 9 --promote
+    python -m model.hyperparameter_search --promote-only
+"""
+
+import os
+import json
+import time
+import random
+import shutil
+import tempfile
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Optional
+
+try:
+    from .data_loader import get_dataset_view, get_data_path
+except ImportError:
+    from data_loader import get_dataset_view, get_data_path
+
+# Значения по каждому гиперпараметру; первый trial - всегда текущие значения по умолчанию
+SEARCH_SPACE = {
+    'hidden_size': [128, 192, 256, 384],
+    'learning_rate': [0.0003, 0.001, 0.002, 0.004],
+    'batch_size': [32, 64, 128, 256],
+    'history_size': [16, 20, 25, 32, 40],
+    'dropout': [0.1, 0.2, 0.3, 0.4],
+    'head_dropout': [0.1, 0.2, 0.3],
+}
+
+TRIAL_LOG_NAME = 'hyperparameter_trials.jsonl'
+
+# Состояние процесса-исполнителя (заполняется в _init_worker)
+_worker = {}
+
+def sample_configs(count: int, space: Dict[str, list] = None, seed: int = 42) -> List[Dict]:
+    """count различных конфигураций: значения по умолчанию + случайные из пространства"""
+    from model.simple_nn.trainer import DEFAULT_HYPERPARAMS
+    
+    space = space or SEARCH_SPACE
+    rng = random.Random(seed)
+    configs = [dict(DEFAULT_HYPERPARAMS)]
+    seen = {json.dumps(configs[0], sort_keys=True)}
+    
+    # Пространство может быть меньше count - число попыток ограничено
+    for _ in range(count * 50):
+        if len(configs) >= count:
+            break
+        config = dict(DEFAULT_HYPERPARAMS)
+        config.update({name: rng.choice(values) for name, values in space.items()})
+        key = json.dumps(config, sort_keys=True)
+        if key not in seen:
+            seen.add(key)
+            configs.append(config)
+    return configs
+
+def _init_worker(groups: np.ndarray, threads: int):
+    """Инициализация процесса: данные и число потоков torch"""
+    _worker.clear()
+    _worker['groups'] = groups
+    _worker['threads'] = threads
+
+def _run_trial(task: Dict) -> Dict:
+    """Обучение одной конфигурации с бюджетом эпох и оценка бэктестом"""
+    import torch
+    from model.backtest import WalkForwardBacktest
+    from model.simple_nn.trainer import EnhancedTrainer
+    
+    groups = _worker['groups']
+    params = task['params']
+    draws = task['validation_draws']
+    
+    random.seed(task['seed'])
+    np.random.seed(task['seed'] % (2 ** 32))
+    torch.manual_seed(task['seed'])
+    torch.set_num_threads(_worker['threads'])
+    
+    model_path = os.path.join(task['work_dir'], task['trial'], 'model.pth')
+    # Trials обучаются молча: ни сообщений, ни записей в журнал обучения сервиса
+    trainer = EnhancedTrainer(model_path, hyperparams=params, log_path=None)
+    trainer.set_progress_callback(lambda message: None)
+    
+    record = {key: task[key] for key in ('search_id', 'trial', 'rung', 'epochs', 'params')}
+    began = time.perf_counter()
+    train_groups = [" ".join(str(int(x)) for x in group) for group in groups[:-draws]]
+    trainer.train(train_groups, epochs=task['epochs'], batch_size=params['batch_size'], return_predictions=False)
+    record['train_sec'] = time.perf_counter() - began
+    
+    if not os.path.exists(model_path):
+        record.update(score=None, error='модель не обучена')
+        return record
+    
+    began = time.perf_counter()
+    report = WalkForwardBacktest('neural', draws=draws, top_k=task['top_k'], workers=1, model_path=model_path,
+                                 use_patterns=False, seed=task['seed']).run(groups)
+    # Бэктест в этом же процессе переключает torch на 1 поток
+    torch.set_num_threads(_worker['threads'])
+    
+    record.update(
+        score=report['mean_best_matches'],
+        hit_rate=report['hit_rate'],
+        eval_sec=time.perf_counter() - began,
+    )
+    return record
+
+def append_trial_log(path: str, records: List[Dict]):
+    """Дозапись результатов в журнал trials (одна строка JSON на trial и раунд)"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'a', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+def load_trial_log(path: str) -> List[Dict]:
+    """Все записи журнала trials"""
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def best_trial(records: List[Dict]) -> Optional[Dict]:
+    """Лучший trial: сначала наибольший бюджет эпох, затем score"""
+    scored = [record for record in records if record.get('score') is not None]
+    if not scored:
+        return None
+    return max(scored, key=lambda record: (record['epochs'], record['score']))
+
+def promote(params: Dict, epochs: int = 20, model_path: str = "data/simple_model.pth", groups: List[str] = None):
+    """Обучение продакшн-модели на всей истории с выбранными гиперпараметрами
+    
+    Гиперпараметры сохраняются в чекпоинт, поэтому следующие полные переобучения
+    (EnhancedTrainer без явных hyperparams) продолжают их использовать.
+    """
+    from model.simple_nn.trainer import EnhancedTrainer
+    
+    if groups is None:
+        groups = [" ".join(str(int(x)) for x in group) for group in get_dataset_view()]
+    
+    print(f"🚀 Продвижение конфигурации в {model_path}: {params}")
+    trainer = EnhancedTrainer(model_path, hyperparams=params)
+    return trainer.train(groups, epochs=epochs, batch_size=params['batch_size'])
+
+class HyperparameterSearch:
+    """Параллельный поиск гиперпараметров с successive halving
+    
+    Бюджеты раундов: min_epochs, min_epochs*eta, ... (не больше max_epochs).
+    Каждый раунд обучает выжившие конфигурации с нуля на своем бюджете.
+    """
+    
+    def __init__(self, trials: int = 9, eta: int = 3, min_epochs: int = 2, max_epochs: int = 18,
+                 workers: int = 0, threads_per_trial: int = 0, validation_draws: int = 300, top_k: int = 10,
+                 seed: int = 42, log_path: str = None, space: Dict[str, list] = None, work_dir: str = None):
+        if eta < 2:
+            raise ValueError("eta должно быть не меньше 2")
+        
+        self.trials = trials
+        self.eta = eta
+        self.min_epochs = min_epochs
+        self.max_epochs = max(min_epochs, max_epochs)
+        self.workers = workers or os.cpu_count() or 1
+        # Потоки делятся между процессами поровну, чтобы trials не мешали друг другу
+        self.threads_per_trial = threads_per_trial or max(1, (os.cpu_count() or 1) // self.workers)
+        self.validation_draws = validation_draws
+        self.top_k = top_k
+        self.seed = seed
+        self.log_path = log_path or get_data_path(TRIAL_LOG_NAME)
+        self.space = space or SEARCH_SPACE
+        self.work_dir = work_dir
+    
+    def rung_epochs(self) -> List[int]:
+        """Бюджет эпох по раундам"""
+        rungs = [self.min_epochs]
+        while rungs[-1] * self.eta <= self.max_epochs:
+            rungs.append(rungs[-1] * self.eta)
+        return rungs
+    
+    def _run_rung(self, executor, tasks: List[Dict]) -> List[Dict]:
+        if executor is None:
+            return [_run_trial(task) for task in tasks]
+        return list(executor.map(_run_trial, tasks))
+    
+    def run(self, groups: np.ndarray = None) -> Dict:
+        """Поиск; groups [N, 4] по умолчанию берется из датасета"""
+        groups = np.asarray(get_dataset_view() if groups is None else groups, dtype=np.int64).reshape(-1, 4)
+        if len(groups) <= self.validation_draws + 100:
+            raise ValueError(f"Недостаточно данных: {len(groups)} групп при проверке на {self.validation_draws}")
+        
+        search_id = time.strftime('%Y%m%d-%H%M%S')
+        alive = [(f"t{i:02d}", params) for i, params in enumerate(sample_configs(self.trials, self.space, self.seed))]
+        work_dir = self.work_dir or tempfile.mkdtemp(prefix='hpsearch_')
+        workers = min(self.workers, len(alive))
+        records = []
+        
+        print(f"🔍 Поиск гиперпараметров {search_id}: {len(alive)} конфигураций, раунды (эпох): {self.rung_epochs()}, "
+              f"процессов: {workers} x {self.threads_per_trial} потоков")
+        began = time.perf_counter()
+        
+        executor = None
+        if workers > 1:
+            executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                           initargs=(groups, self.threads_per_trial))
+        else:
+            _init_worker(groups, self.threads_per_trial)
+        
+        try:
+            rungs = self.rung_epochs()
+            for rung, epochs in enumerate(rungs):
+                tasks = [{
+                    'search_id': search_id, 'trial': trial, 'rung': rung, 'epochs': epochs, 'params': params,
+                    'validation_draws': self.validation_draws, 'top_k': self.top_k,
+                    'seed': self.seed, 'work_dir': work_dir,
+                } for trial, params in alive]
+                
+                rung_records = self._run_rung(executor, tasks)
+                append_trial_log(self.log_path, rung_records)
+                records.extend(rung_records)
+                
+                ranked = sorted(rung_records, key=lambda record: -1 if record['score'] is None else record['score'],
+                                reverse=True)
+                print(f"📊 Раунд {rung + 1}/{len(rungs)} ({epochs} эпох): " + ", ".join(
+                    f"{record['trial']}={record['score']:.3f}" if record['score'] is not None else f"{record['trial']}=—"
+                    for record in ranked))
+                
+                keep = max(1, len(ranked) // self.eta)
+                by_trial = dict(alive)
+                alive = [(record['trial'], by_trial[record['trial']]) for record in ranked[:keep]
+                         if record['score'] is not None]
+                if not alive:
+                    break
+        finally:
+            if executor is not None:
+                executor.shutdown()
+            if self.work_dir is None:
+                shutil.rmtree(work_dir, ignore_errors=True)
+        
+        best = best_trial(records)
+        if best:
+            print(f"🏆 Лучший trial {best['trial']} ({best['epochs']} эпох): score {best['score']:.3f}, {best['params']}")
+        print(f"⏱️  Поиск занял {time.perf_counter() - began:.0f} сек, журнал: {self.log_path}")
+        return {'search_id': search_id, 'best': best, 'records': records}
+
+if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Hyperparameter search with successive halving')
+    parser.add_argument('--trials', type=int, default=9, help='Configurations in the first rung')
+    parser.add_argument('--eta', type=int, default=3, help='Keep 1/eta of trials per rung, epochs grow eta times')
+    parser.add_argument('--min-epochs', type=int, default=2, help='Epoch budget of the first rung')
+    parser.add_argument('--max-epochs', type=int, default=18, help='Largest epoch budget')
+    parser.add_argument('--workers', type=int, default=0, help='Trial processes (0 = all CPU cores)')
+    parser.add_argument('--threads', type=int, default=0, help='torch threads per trial (0 = cores / workers)')
+    parser.add_argument('--validation-draws', type=int, default=300, help='Walk-forward draws to score a trial')
+    parser.add_argument('--seed', type=int, default=42, help='Sampling and training seed')
+    parser.add_argument('--log', default=None, help='Trial log (JSONL), default data/hyperparameter_trials.jsonl')
+    parser.add_argument('--promote', action='store_true', help='Retrain the production model with the best config')
+    parser.add_argument('--promote-only', action='store_true', help='Promote the best config from the trial log')
+    parser.add_argument('--model-path', default='data/simple_model.pth', help='Production checkpoint')
+    parser.add_argument('--epochs', type=int, default=20, help='Epochs for the promoted model')
+    
+    args = parser.parse_args()
+    
+    search = HyperparameterSearch(
+        trials=args.trials, eta=args.eta, min_epochs=args.min_epochs, max_epochs=args.max_epochs,
+        workers=args.workers, threads_per_trial=args.threads, validation_draws=args.validation_draws,
+        seed=args.seed, log_path=args.log,
+    )
+    
+    if args.promote_only:
+        best = best_trial(load_trial_log(search.log_path))
+    else:
+        best = search.run()['best']
+    
+    if args.promote or args.promote_only:
+        if best is None:
+            print("❌ Нет успешных trials для продвижения")
+        else:
+            promote(best['params'], epochs=args.epochs, model_path=args.model_path)
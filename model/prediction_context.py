@@ -0,0 +1,151 @@
+# [file name]: model/prediction_context.py
+"""
+Общий неизменяемый контекст одного прогноза
+
+Контекст строится один раз на запрос и передается всем предсказателям
+ансамбля через predict_context(context, top_k): предсказатели не вызывают
+друг друга, а временной анализ, features, softmax нейросети и частотные
+кандидаты считаются по одному разу. Стадии образуют DAG:
+
+    history -+- temporal_patterns --- pattern_analysis
+             +- features ------------ probabilities
+             +- frequency_candidates
+
+Выполняются только стадии, нужные предсказателям (их CONTEXT_STAGES), со
+всеми зависимостями, каждая ровно один раз.
+"""
+
+import time
+import numpy as np
+from types import MappingProxyType
+from typing import Dict, Iterable, List, Mapping, NamedTuple, Optional, Tuple
+
+# Стадия -> стадии, от которых она зависит; порядок ключей топологический
+STAGES = {
+    'temporal_patterns': (),
+    'pattern_analysis': ('temporal_patterns',),
+    'features': (),
+    'probabilities': ('features',),
+    'frequency_candidates': (),
+}
+
+# Частотные кандидаты для нейросети: точный top по всем группам
+FREQUENCY_CANDIDATES = 10
+# Окно горячих/холодных чисел и последовательностей
+RECENT_NUMBERS = 20
+
+class PredictionContext(NamedTuple):
+    """Результаты стадий одного прогноза (только чтение)"""
+    history: Tuple[int, ...]
+    temporal_patterns: Mapping = MappingProxyType({})
+    pattern_analysis: Mapping = MappingProxyType({})
+    features: Optional[np.ndarray] = None      # features окна [F], None для GRU
+    probabilities: Optional[np.ndarray] = None  # softmax модели [4, 26]
+    frequency_candidates: Tuple = ()
+    stage_ms: Mapping = MappingProxyType({})
+
+def required_stages(requested: Iterable[str]) -> List[str]:
+    """Запрошенные стадии со всеми зависимостями в порядке выполнения"""
+    needed = set()
+    
+    def visit(stage):
+        if stage not in needed:
+            needed.add(stage)
+            for dependency in STAGES[stage]:
+                visit(dependency)
+    
+    for stage in requested:
+        visit(stage)
+    return [stage for stage in STAGES if stage in needed]
+
+def freeze(value):
+    """Неизменяемая копия: dict -> MappingProxyType, list -> tuple, массив только для чтения"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    if isinstance(value, np.ndarray):
+        value = value.copy()
+        value.setflags(write=False)
+    return value
+
+def analyze_patterns(history: List[int], temporal_patterns: Mapping) -> Dict:
+    """Горячие/холодные числа и последовательности последних RECENT_NUMBERS чисел"""
+    if len(history) < 10:
+        return {}
+    
+    recent = list(history[-RECENT_NUMBERS:])
+    
+    # Анализ частот
+    freq = {}
+    for num in recent:
+        freq[num] = freq.get(num, 0) + 1
+    
+    # "Горячие" и "холодные" числа
+    avg_freq = len(recent) / 26
+    hot_numbers = [num for num, count in freq.items() if count > avg_freq * 1.5]
+    cold_numbers = [num for num in range(1, 27) if num not in freq or freq[num] < avg_freq * 0.5]
+    
+    # Анализ последовательностей
+    sequences = []
+    current_seq = [recent[0]]
+    for i in range(1, len(recent)):
+        if abs(recent[i] - recent[i-1]) <= 2:
+            current_seq.append(recent[i])
+        else:
+            if len(current_seq) >= 3:
+                sequences.append(current_seq)
+            current_seq = [recent[i]]
+    
+    if len(current_seq) >= 3:
+        sequences.append(current_seq)
+    
+    return {
+        'hot_numbers': hot_numbers,
+        'cold_numbers': cold_numbers,
+        'sequences': sequences,
+        'frequencies': freq,
+        'recent_numbers': recent,
+        'temporal_patterns': temporal_patterns
+    }
+
+def frequency_candidates(frequency, count: int = FREQUENCY_CANDIDATES) -> List[tuple]:
+    """Top групп по частотным таблицам (пусто, если таблицы не заполнены)"""
+    if frequency is None or not frequency.total_groups:
+        return []
+    return [(group, score) for group, score in frequency.top_k(count) if score > 1e-8]
+
+def build_context(history: List[int], stages: Iterable[str] = STAGES, analyzer=None, neural=None,
+                  frequency=None) -> PredictionContext:
+    """Выполнение стадий контекста, каждая один раз
+    
+    analyzer - AdvancedPatternAnalyzer, neural - предсказатель с
+    context_features/context_probabilities, frequency - FrequencyBasedPredictor.
+    Ошибка стадии не прерывает прогноз: стадия остается пустой.
+    """
+    history = tuple(int(x) for x in history)
+    
+    compute = {
+        'temporal_patterns': lambda: analyzer.analyze_time_series(list(history)) if analyzer else {},
+        'pattern_analysis': lambda: analyze_patterns(history, results['temporal_patterns']),
+        'features': lambda: neural.context_features(history) if hasattr(neural, 'context_features') else None,
+        'probabilities': lambda: (neural.context_probabilities(history, results['features'])
+                                  if hasattr(neural, 'context_probabilities') else None),
+        'frequency_candidates': lambda: frequency_candidates(frequency),
+    }
+    
+    results = {'temporal_patterns': {}, 'pattern_analysis': {}, 'features': None,
+               'probabilities': None, 'frequency_candidates': []}
+    stage_ms = {}
+    for stage in required_stages(stages):
+        began = time.perf_counter()
+        try:
+            value = compute[stage]()
+            if value is not None:
+                results[stage] = value
+        except Exception as e:
+            print(f"⚠️  Ошибка стадии {stage}: {e}")
+        stage_ms[stage] = (time.perf_counter() - began) * 1000
+    
+    return PredictionContext(history=history, stage_ms=MappingProxyType(stage_ms),
+                             **{stage: freeze(value) for stage, value in results.items()})
@@ -1,6 +1,6 @@
 # [file name]: model/simple_nn/__init__.py
 from .model import EnhancedNumberPredictor
-from .features import FeatureExtractor
+from .features import FeatureExtractor, RollingFeatureState
 from .data_processor import DataProcessor
 
 # Для обратной совместимости
@@ -0,0 +1,86 @@
+# [file name]: model/simple_nn/benchmark.py
+"""
+Бенчмарк шага обучения EnhancedNumberPredictor на CPU
+
+Запуск:
+    python -m model.simple_nn.benchmark
+    python -m model.simple_nn.benchmark --modes legacy:eager fused:eager fused:compile
+"""
+
+import os
+import time
+import tempfile
+import torch
+import torch.optim as optim
+from typing import List, Dict
+
+from .model import EnhancedNumberPredictor
+from .trainer import EnhancedTrainer, STEP_LEGACY, STEP_FUSED, COMPILE_EAGER, COMPILE_SCRIPT
+
+DEFAULT_MODES = [
+    (STEP_LEGACY, COMPILE_EAGER),
+    (STEP_FUSED, COMPILE_EAGER),
+    (STEP_FUSED, COMPILE_SCRIPT),
+]
+
+def benchmark_training_step(step_mode: str, compile_mode: str, samples: int = 12800, batch_size: int = 64,
+                            hidden_size: int = 256, warmup_batches: int = 20, seed: int = 0) -> Dict:
+    """Скорость обучения (примеров/сек) для одного режима на синтетических данных
+    
+    Замеряется тот же _train_epoch, что и при обучении. Прогрев (включая компиляцию)
+    измеряется отдельно.
+    """
+    torch.manual_seed(seed)
+    features = torch.rand(samples, 50)
+    targets = torch.randint(0, 26, (samples, 4))
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        trainer = EnhancedTrainer(os.path.join(tmp_dir, 'model.pth'), step_mode=step_mode, compile_mode=compile_mode,
+                                  log_path=None)
+        trainer.set_progress_callback(lambda message: None)
+        trainer.model = EnhancedNumberPredictor(input_size=50, hidden_size=hidden_size)
+        trainer.optimizer = optim.AdamW(trainer.model.parameters(), lr=0.001, weight_decay=1e-4)
+        trainer.model.train()
+        
+        began = time.perf_counter()
+        trainer._train_epoch(features[:warmup_batches * batch_size], targets[:warmup_batches * batch_size], batch_size)
+        warmup_sec = time.perf_counter() - began
+        
+        began = time.perf_counter()
+        total_loss, num_batches = trainer._train_epoch(features, targets, batch_size)
+        elapsed = time.perf_counter() - began
+    
+    return {
+        'step_mode': step_mode,
+        'compile_mode': compile_mode,
+        'samples_per_sec': samples / elapsed,
+        'epoch_sec': elapsed,
+        'warmup_sec': warmup_sec,
+        'loss': total_loss / max(num_batches, 1),
+    }
+
+def run_benchmark(modes: List[tuple] = None, **kwargs) -> List[Dict]:
+    """Сравнение режимов шага обучения, первый режим - базовый"""
+    results = [benchmark_training_step(step_mode, compile_mode, **kwargs)
+               for step_mode, compile_mode in (modes or DEFAULT_MODES)]
+    
+    baseline = results[0]['samples_per_sec']
+    print(f"🏁 Шаг обучения на CPU (потоков: {torch.get_num_threads()}):")
+    for result in results:
+        print(f"   {result['step_mode']:>6}:{result['compile_mode']:<7} "
+              f"{result['samples_per_sec']:8.0f} примеров/сек  x{result['samples_per_sec'] / baseline:.2f}  "
+              f"(прогрев {result['warmup_sec']:.1f} сек)")
+    return results
+
+if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Training step benchmark (CPU)')
+    parser.add_argument('--modes', nargs='+', default=None,
+                        help='step:compile pairs, e.g. legacy:eager fused:compile (first one is the baseline)')
+    parser.add_argument('--samples', type=int, default=12800, help='Samples per timed epoch')
+    parser.add_argument('--batch-size', type=int, default=64, help='Batch size')
+    
+    args = parser.parse_args()
+    modes = [tuple(mode.split(':')) for mode in args.modes] if args.modes else None
+    run_benchmark(modes, samples=args.samples, batch_size=args.batch_size)
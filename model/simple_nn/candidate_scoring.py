@@ -0,0 +1,187 @@
+# [file name]: model/simple_nn/candidate_scoring.py
+"""
+Векторизованная оценка всего пространства групп 26^4
+"""
+
+import numpy as np
+from typing import List, Tuple
+
+NUMBERS = np.arange(1, 27)
+SPACE_SHAPE = (26, 26, 26, 26)
+
+# Валидные группы: числа внутри каждой пары различны (a != b, c != d)
+_a, _b, _c, _d = np.meshgrid(NUMBERS, NUMBERS, NUMBERS, NUMBERS, indexing='ij', sparse=True)
+VALID_MASK = (_a != _b) & (_c != _d)
+# Все четыре числа различны
+DISTINCT_MASK = VALID_MASK & (_a != _c) & (_a != _d) & (_b != _c) & (_b != _d)
+VALID_COUNT = int(VALID_MASK.sum())
+
+def outer4(v0: np.ndarray, v1: np.ndarray, v2: np.ndarray, v3: np.ndarray) -> np.ndarray:
+    """Тензорное произведение четырех векторов по позициям -> [26, 26, 26, 26]"""
+    return (v0[:, None, None, None] * v1[None, :, None, None]
+            * v2[None, None, :, None] * v3[None, None, None, :])
+
+def count4(mask: np.ndarray) -> np.ndarray:
+    """Сколько чисел группы попадает в маску (26,) -> [26, 26, 26, 26]"""
+    mask = np.asarray(mask, dtype=np.int8)
+    return (mask[:, None, None, None] + mask[None, :, None, None]
+            + mask[None, None, :, None] + mask[None, None, None, :])
+
+def number_mask(numbers) -> np.ndarray:
+    """Маска длины 26 для списка чисел 1-26"""
+    mask = np.zeros(26, dtype=bool)
+    numbers = [n for n in numbers if 1 <= n <= 26]
+    if numbers:
+        mask[np.asarray(numbers, dtype=np.int64) - 1] = True
+    return mask
+
+def top_k_groups(scores: np.ndarray, k: int) -> List[Tuple[Tuple[int, int, int, int], float]]:
+    """Точный top-k среди валидных групп (argpartition + сортировка выбранных)"""
+    k = min(k, VALID_COUNT)
+    if k <= 0:
+        return []
+    
+    flat = np.where(VALID_MASK, scores, -np.inf).ravel()
+    indices = np.argpartition(flat, -k)[-k:]
+    # Сортировка по убыванию score, при равенстве - по номеру группы (детерминированно)
+    indices = indices[np.lexsort((indices, -flat[indices]))]
+    
+    groups = np.stack(np.unravel_index(indices, SPACE_SHAPE), axis=1) + 1
+    return [(tuple(int(x) for x in group), float(score)) for group, score in zip(groups, flat[indices])]
+
+def top_k_product(probs: np.ndarray, k: int) -> List[Tuple[Tuple[int, int, int, int], float]]:
+    """Точный top-k произведения вероятностей по позициям [4, 26] без полного перебора
+    
+    Число на позиции из группы top-k имеет ранг не ниже k+1 в своей позиции
+    (из более вероятных чисел только одно может совпасть с соседом по паре),
+    поэтому достаточно перебрать (k+1)^4 комбинаций.
+    """
+    probs = np.asarray(probs, dtype=np.float64)
+    keep = min(26, k + 1)
+    if keep >= 13:
+        return top_k_groups(outer4(probs[0], probs[1], probs[2], probs[3]), k)
+    
+    # Лучшие числа каждой позиции (при равенстве - меньшее число)
+    selected = np.stack([np.lexsort((NUMBERS, -row))[:keep] for row in probs])
+    scores = outer4(*(probs[i, selected[i]] for i in range(4)))
+    
+    s0, s1, s2, s3 = np.meshgrid(*selected, indexing='ij', sparse=True)
+    valid = (s0 != s1) & (s2 != s3)
+    flat_index = np.ravel_multi_index((s0, s1, s2, s3), SPACE_SHAPE)
+    
+    scores, flat_index = scores[valid], np.broadcast_to(flat_index, valid.shape)[valid]
+    k = min(k, len(scores))
+    order = np.lexsort((flat_index, -scores))[:k]
+    
+    groups = np.stack(np.unravel_index(flat_index[order], SPACE_SHAPE), axis=1) + 1
+    return [(tuple(int(x) for x in group), float(score)) for group, score in zip(groups, scores[order])]
+
+def top_k_pair_product(first: np.ndarray, second: np.ndarray, k: int, floor: float = 0.0) -> List[Tuple[Tuple[int, int, int, int], float]]:
+    """Точный top-k для score = max(first[a, b] * second[c, d], floor) при неотрицательных first, second [26, 26]
+    
+    Плоский индекс группы равен (a*26 + b) * 676 + (c*26 + d), поэтому достаточно
+    взять k лучших валидных пар каждой половины и перебрать k*k произведений.
+    Порядок при равенстве тот же, что у top_k_groups.
+    """
+    k = min(k, VALID_COUNT)
+    if k <= 0:
+        return []
+    
+    pair_valid = (NUMBERS[:, None] != NUMBERS[None, :]).ravel()
+    selected = []
+    for half in (first, second):
+        flat = np.where(pair_valid, np.asarray(half, dtype=np.float64).ravel(), -np.inf)
+        indices = np.arange(len(flat))
+        selected.append(np.lexsort((indices, -flat))[:k])
+    
+    first_idx, second_idx = selected
+    scores = np.maximum(np.outer(np.asarray(first).ravel()[first_idx], np.asarray(second).ravel()[second_idx]), floor).ravel()
+    flat_index = (first_idx[:, None] * 676 + second_idx[None, :]).ravel()
+    order = np.lexsort((flat_index, -scores))[:k]
+    
+    groups = np.stack(np.unravel_index(flat_index[order], SPACE_SHAPE), axis=1) + 1
+    return [(tuple(int(x) for x in group), float(score)) for group, score in zip(groups, scores[order])]
+
+def group_indices(groups) -> np.ndarray:
+    """Группы [K, 4] с числами 1-26 -> плоские индексы в пространстве 26^4"""
+    groups = np.asarray(groups, dtype=np.int64).reshape(-1, 4)
+    return np.ravel_multi_index(tuple((groups - 1).T), SPACE_SHAPE)
+
+_static_tables = {}
+
+def static_tables() -> dict:
+    """Статические таблицы по всем группам (плоский индекс 26^4), считаются один раз"""
+    if not _static_tables:
+        even_count = count4(NUMBERS % 2 == 0).ravel()
+        low_count = count4(NUMBERS <= 13).ravel()
+        distinct = DISTINCT_MASK.ravel()
+        
+        # Множители _calculate_enhanced_pattern_score: четность, диапазоны, уникальность
+        pattern = np.ones(even_count.shape)
+        pattern[even_count == 2] *= 1.2
+        pattern[low_count == 2] *= 1.3
+        pattern[distinct] *= 1.2
+        
+        # Множители _calculate_quality_score: повторы, однородность четности и диапазона
+        quality = np.ones(even_count.shape)
+        quality[~distinct] *= 0.5
+        quality[(even_count == 0) | (even_count == 4)] *= 0.7
+        quality[(low_count == 0) | (low_count == 4)] *= 0.8
+        
+        _static_tables.update(
+            pattern=pattern,
+            quality=quality,
+            mean=(_a + _b + _c + _d).ravel() / 4.0,
+        )
+    return _static_tables
+
+class PatternScoreTables:
+    """Таблицы pattern/quality score для одного предсказания
+    
+    Статические множители берутся из общих таблиц по группам, динамические
+    (горячие/холодные/недавние числа) - из масок длины 26. Оценка любого
+    набора кандидатов сводится к выборке по индексу и перемножению.
+    """
+    
+    def __init__(self, pattern_analysis: dict):
+        self.hot_mask = number_mask(pattern_analysis.get('hot_numbers', []))
+        self.cold_mask = number_mask(pattern_analysis.get('cold_numbers', []))
+        self.recent_mask = number_mask(pattern_analysis.get('recent_numbers', []))
+        
+        temporal_patterns = pattern_analysis.get('temporal_patterns', {})
+        autocorr = temporal_patterns.get('autocorrelation', {})
+        # При высокой автокорреляции предпочитаем группы с числами из истории
+        self.use_history_overlap = bool(autocorr) and sum(autocorr.values()) / len(autocorr) > 0.3
+        
+        self.hurst = temporal_patterns.get('hurst_exponent', 0.5)
+        recent = pattern_analysis.get('recent_numbers', [13.5])
+        self.recent_avg = float(np.mean(recent)) if len(recent) else np.nan
+    
+    def _pattern(self, cold_count, hot_count, overlap, static) -> np.ndarray:
+        score = (1 + cold_count * 0.3) * np.where(hot_count >= 3, 0.7, 1.0) * static
+        if self.use_history_overlap:
+            score = score * (1 + overlap * 0.2)
+        return score
+    
+    def _quality(self, group_mean, static) -> np.ndarray:
+        if self.hurst > 0.7:
+            static = static * np.where(np.abs(group_mean - self.recent_avg) < 3, 1.2, 1.0)
+        return static
+    
+    def pattern_tensor(self) -> np.ndarray:
+        """Pattern score всех групп 26^4 -> [26, 26, 26, 26]"""
+        tables = static_tables()
+        return self._pattern(count4(self.cold_mask), count4(self.hot_mask), count4(self.recent_mask),
+                             tables['pattern'].reshape(SPACE_SHAPE))
+    
+    def pattern_scores(self, groups) -> np.ndarray:
+        """Pattern score для набора групп [K, 4]"""
+        groups = np.asarray(groups, dtype=np.int64).reshape(-1, 4)
+        return self._pattern(self.cold_mask[groups - 1].sum(axis=1), self.hot_mask[groups - 1].sum(axis=1),
+                             self.recent_mask[groups - 1].sum(axis=1), static_tables()['pattern'][group_indices(groups)])
+    
+    def quality_scores(self, groups) -> np.ndarray:
+        """Quality score для набора групп [K, 4]"""
+        indices = group_indices(groups)
+        tables = static_tables()
+        return self._quality(tables['mean'][indices], tables['quality'][indices])
@@ -5,19 +5,28 @@
 
 import numpy as np
 from typing import List, Tuple
+from numpy.lib.stride_tricks import sliding_window_view
 from .features import FeatureExtractor
+from .feature_cache import FeatureCache
+
+# Режимы нарезки обучающих окон
+WINDOWING_NUMBER = 'number'  # окно сдвигается на одно число, цель может захватывать две группы
+WINDOWING_GROUP = 'group'    # окно заканчивается на границе группы, цель - следующая целая группа
+WINDOWING_MODES = (WINDOWING_NUMBER, WINDOWING_GROUP)
 
 class DataProcessor:
-    def __init__(self, history_size: int = 20):
+    def __init__(self, history_size: int = 20, cache_dir: str = None, windowing: str = WINDOWING_NUMBER):
+        if windowing not in WINDOWING_MODES:
+            raise ValueError(f"Неизвестный режим окон: {windowing} (доступны: {', '.join(WINDOWING_MODES)})")
+        
         self.feature_extractor = FeatureExtractor(history_size)
         self.history_size = history_size
+        self.windowing = windowing
+        self.cache = FeatureCache(cache_dir) if cache_dir else None
     
-    def prepare_training_data(self, groups: List[str]) -> Tuple[np.ndarray, np.ndarray]:
-        """Подготовка данных для обучения"""
-        print("📊 Подготовка данных для упрощенной нейросети...")
-        
+    def parse_numbers(self, groups: List[str]) -> np.ndarray:
+        """Плоский поток чисел из валидных групп"""
         all_numbers = []
-        valid_groups = 0
         
         for group_str in groups:
             if not isinstance(group_str, str):
@@ -26,27 +35,93 @@ class DataProcessor:
                 numbers = [int(x) for x in group_str.strip().split()]
                 if len(numbers) == 4 and all(1 <= x <= 26 for x in numbers):
                     all_numbers.extend(numbers)
-                    valid_groups += 1
             except:
                 continue
         
-        print(f"✅ Обработано {valid_groups} групп, {len(all_numbers)} чисел")
+        return np.array(all_numbers, dtype=np.int64)
+    
+    def sample_count(self, numbers: np.ndarray) -> int:
+        """Количество обучающих примеров для потока чисел"""
+        return len(self.sample_indices(numbers))
+    
+    def sample_indices(self, numbers: np.ndarray) -> np.ndarray:
+        """Индексы начала окон истории в порядке времени
+        
+        В режиме group окно из history_size чисел заканчивается на границе группы
+        (как при предсказании), поэтому примеров примерно в 4 раза меньше.
+        """
+        total = max(0, len(numbers) - 3 - self.history_size)
+        first = (-self.history_size) % 4 if self.windowing == WINDOWING_GROUP else 0
+        step = 4 if self.windowing == WINDOWING_GROUP else 1
+        return np.arange(first, total, step, dtype=np.int64)
+    
+    def validation_split(self, sample_count: int, validation_size: int) -> Tuple[int, int]:
+        """Хронологическое разбиение примеров: (конец обучающей части, начало валидации)
+        
+        Валидация - последние по времени примеры. В режиме number цели соседних окон
+        перекрываются, поэтому 3 примера перед валидацией выбрасываются.
+        """
+        validation_size = min(max(0, validation_size), sample_count)
+        val_start = sample_count - validation_size
+        gap = 3 if self.windowing == WINDOWING_NUMBER and validation_size > 0 else 0
+        return max(0, val_start - gap), val_start
+    
+    def prepare_samples(self, numbers: np.ndarray, indices: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Features и цели только для выбранных примеров (индекс = начало окна истории)"""
+        indices = np.asarray(indices, dtype=np.int64)
+        windows = self.feature_extractor.sliding_windows(numbers)[indices]
+        targets = sliding_window_view(numbers[self.history_size:], 4)[indices]
+        
+        features = self.feature_extractor.extract_features_batch(windows)
+        return features, np.ascontiguousarray(targets, dtype=np.int64)
+    
+    def prepare_training_data(self, groups: List[str], memory_map: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+        """Подготовка данных для обучения
+        
+        memory_map=True - при наличии кэша результат возвращается как np.memmap
+        файлов кэша (только чтение), матрица features не держится в памяти.
+        """
+        print("📊 Подготовка данных для упрощенной нейросети...")
+        
+        numbers = self.parse_numbers(groups)
         
-        if len(all_numbers) < self.history_size + 4:
+        print(f"✅ Обработано {len(numbers) // 4} групп, {len(numbers)} чисел")
+        
+        if len(numbers) < self.history_size + 4:
             print(f"❌ Недостаточно данных для создания примеров")
             return np.array([]), np.array([])
         
-        features = []
-        targets = []
+        all_indices = self.sample_indices(numbers)
+        sample_count = len(all_indices)
+        
+        # Строки для неизменившегося префикса датасета берем из кэша
+        cached = self.cache.load(numbers, self.history_size, self.windowing) if self.cache else None
+        cached_count = len(cached[0]) if cached is not None else 0
+        
+        if cached is not None and cached_count == sample_count:
+            print(f"✅ Создано {sample_count} обучающих примеров (из кэша)")
+            if memory_map:
+                return cached
+            return np.array(cached[0]), np.array(cached[1])
+        
+        # Новые окна истории обрабатываются одним пакетом вместо цикла по позициям
+        indices = all_indices[cached_count:]
+        features, targets = self.prepare_samples(numbers, indices)
+        
+        # В кэш дописываются только новые строки, старые на диске не переписываются
+        if self.cache:
+            self.cache.save(numbers, self.history_size, features, targets, self.windowing, start=cached_count)
         
-        for i in range(self.history_size, len(all_numbers) - 3):
-            history = all_numbers[i - self.history_size:i]
-            next_group = all_numbers[i:i + 4]
-            
-            feature_vector = self.feature_extractor.extract_features(history)
-            features.append(feature_vector)
-            targets.append(next_group)
+        if cached is not None:
+            print(f"✅ Из кэша: {cached_count} примеров, рассчитано новых: {len(indices)}")
+        print(f"✅ Создано {sample_count} обучающих примеров")
         
-        print(f"✅ Создано {len(features)} обучающих примеров")
+        if memory_map and self.cache:
+            mapped = self.cache.load(numbers, self.history_size, self.windowing)
+            if mapped is not None:
+                return mapped
         
-        return np.array(features, dtype=np.float32), np.array(targets, dtype=np.int64)
\ No newline at end of file
+        if cached is not None:
+            features = np.concatenate([cached[0], features])
+            targets = np.concatenate([cached[1], targets])
+        return features, targets
@@ -0,0 +1,87 @@
+# [file name]: model/simple_nn/distributed.py
+"""
+Data-parallel обучение на CPU: torch.distributed с бэкендом gloo
+
+Каждый процесс считает градиент по своей доле общего батча, градиенты
+складываются all-reduce, чекпоинт пишет только rank 0.
+
+Локально (процессы запускает сам тренер):
+    EnhancedTrainer().train(groups, workers=4)
+
+На нескольких хостах - через torchrun, на каждом хосте:
+    torchrun --nnodes 2 --nproc-per-node 4 --rdzv-backend c10d --rdzv-endpoint host1:29500 \
+        -m model.simple_nn.distributed --epochs 20
+"""
+
+import os
+import socket
+import torch
+import torch.distributed as dist
+import torch.multiprocessing as mp
+from typing import List, Tuple
+
+BACKEND = 'gloo'
+
+def _free_port() -> int:
+    """Свободный TCP-порт на localhost для rendezvous локальных процессов"""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def run_worker(trainer_options: dict, groups: List[str], train_options: dict) -> List[Tuple[Tuple[int, int, int, int], float]]:
+    """Обучение в процессе уже инициализированной группы torch.distributed"""
+    from .trainer import EnhancedTrainer
+    
+    # Потоки делятся между процессами хоста, иначе процессы мешают друг другу
+    local_world_size = int(os.environ.get('LOCAL_WORLD_SIZE', dist.get_world_size()))
+    torch.set_num_threads(max(1, (os.cpu_count() or 1) // local_world_size))
+    
+    trainer = EnhancedTrainer(**trainer_options)
+    trainer.join_process_group()
+    return trainer.train(groups, **train_options)
+
+def _spawned_worker(rank: int, world_size: int, init_method: str, trainer_options: dict,
+                    groups: List[str], train_options: dict):
+    dist.init_process_group(BACKEND, init_method=init_method, rank=rank, world_size=world_size)
+    try:
+        run_worker(trainer_options, groups, train_options)
+    finally:
+        dist.destroy_process_group()
+
+def spawn_training(trainer, groups: List[str], workers: int, return_predictions: bool = True,
+                   **train_options) -> List[Tuple[Tuple[int, int, int, int], float]]:
+    """Обучение в workers локальных процессах, модель и прогнозы - в вызывающем тренере"""
+    trainer._report_progress(f"🧵 Data-parallel обучение: {workers} процессов ({BACKEND})")
+    init_method = f"tcp://127.0.0.1:{_free_port()}"
+    train_options['return_predictions'] = False
+    
+    mp.spawn(_spawned_worker, args=(workers, init_method, trainer.process_options(), groups, train_options),
+             nprocs=workers, join=True)
+    
+    # Обученную модель rank 0 записал в model_path
+    if not trainer._load_checkpoint():
+        trainer._report_progress("❌ После data-parallel обучения чекпоинт не найден")
+        return []
+    return trainer._generate_predictions(groups) if return_predictions else []
+
+def main():
+    """Запуск под torchrun: RANK, WORLD_SIZE, MASTER_ADDR/PORT берутся из окружения"""
+    import argparse
+    from ..data_loader import load_dataset
+    
+    parser = argparse.ArgumentParser(description='Data-parallel training (torch.distributed, gloo)')
+    parser.add_argument('--model-path', default='data/simple_model.pth', help='Checkpoint path (written by rank 0)')
+    parser.add_argument('--epochs', type=int, default=20, help='Epochs')
+    parser.add_argument('--batch-size', type=int, default=64, help='Global batch size')
+    
+    args = parser.parse_args()
+    
+    dist.init_process_group(BACKEND)
+    try:
+        run_worker({'model_path': args.model_path}, load_dataset(),
+                   {'epochs': args.epochs, 'batch_size': args.batch_size})
+    finally:
+        dist.destroy_process_group()
+
+if __name__ == "__main__":
+    main()
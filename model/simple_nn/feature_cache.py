@@ -0,0 +1,137 @@
+# [file name]: model/simple_nn/feature_cache.py
+"""
+Постоянный кэш обучающих features с привязкой к префиксу датасета
+"""
+
+import os
+import json
+import hashlib
+import numpy as np
+from typing import Optional, Tuple
+
+# 2: строки дописываются в сырые features.bin/targets.bin, форма и dtype в meta.json
+CACHE_VERSION = 2
+
+class FeatureCache:
+    """Кэш матрицы features/targets на диске.
+    
+    Хранит features.bin, targets.bin (строки подряд, без заголовка) и meta.json с
+    хэшем потока чисел, по которому посчитаны строки. Если сохраненный префикс
+    совпадает с началом текущего потока, кэшированные строки переиспользуются,
+    иначе кэш считается недействительным.
+    
+    Строки новых групп дописываются в конец файлов, meta.json обновляется последним:
+    пока он не записан, действительны только прежние samples_count строк, а
+    недописанный хвост отрезается при следующем сохранении.
+    """
+    
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        self.features_path = os.path.join(cache_dir, 'features.bin')
+        self.targets_path = os.path.join(cache_dir, 'targets.bin')
+        self.meta_path = os.path.join(cache_dir, 'meta.json')
+    
+    @staticmethod
+    def prefix_hash(numbers: np.ndarray) -> str:
+        """Хэш потока чисел"""
+        return hashlib.sha1(np.asarray(numbers, dtype=np.uint8).tobytes()).hexdigest()
+    
+    @staticmethod
+    def _map(path: str, dtype: str, shape: list, count: int) -> np.memmap:
+        """Первые count строк файла как np.memmap только для чтения"""
+        dtype = np.dtype(dtype)
+        row_bytes = dtype.itemsize * int(np.prod(shape))
+        if os.path.getsize(path) < count * row_bytes:
+            raise ValueError(f"{os.path.basename(path)} короче {count} строк")
+        return np.memmap(path, dtype=dtype, mode='r', shape=(count, *shape))
+    
+    def load(self, numbers: np.ndarray, history_size: int, windowing: str = 'number') -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """Загрузка кэшированных строк, если они соответствуют началу потока чисел"""
+        if not os.path.exists(self.meta_path):
+            return None
+        
+        try:
+            with open(self.meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            
+            if meta.get('version') != CACHE_VERSION:
+                print("⚠️  Кэш features старого формата, пересчитываем")
+                return None
+            
+            cached_numbers = meta['numbers_count']
+            if (meta['history_size'] != history_size
+                    or meta.get('windowing', 'number') != windowing
+                    or cached_numbers > len(numbers)
+                    or meta['prefix_sha1'] != self.prefix_hash(numbers[:cached_numbers])):
+                print("⚠️  Кэш features устарел: история или режим окон изменились, пересчитываем")
+                return None
+            
+            count = meta['samples_count']
+            try:
+                features = self._map(self.features_path, meta['features_dtype'], meta['features_shape'], count)
+                targets = self._map(self.targets_path, meta['targets_dtype'], meta['targets_shape'], count)
+            except (OSError, ValueError):
+                print("⚠️  Кэш features поврежден, пересчитываем")
+                return None
+            
+            return features, targets
+        except Exception as e:
+            print(f"⚠️  Ошибка чтения кэша features: {e}")
+            return None
+    
+    def save(self, numbers: np.ndarray, history_size: int, features: np.ndarray, targets: np.ndarray,
+             windowing: str = 'number', start: int = 0) -> None:
+        """Сохранение кэша для текущего потока чисел
+        
+        features/targets - строки начиная с номера start. При start > 0 они дописываются
+        к первым start строкам кэша (start - длина результата load() для этого потока),
+        при start == 0 файлы записываются заново.
+        """
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            
+            if start:
+                with open(self.meta_path, 'r', encoding='utf-8') as f:
+                    meta = json.load(f)
+                features = np.ascontiguousarray(features, dtype=meta['features_dtype'])
+                targets = np.ascontiguousarray(targets, dtype=meta['targets_dtype'])
+                for path, array in ((self.features_path, features), (self.targets_path, targets)):
+                    with open(path, 'r+b') as f:
+                        # Хвост прерванного дописывания отрезается
+                        f.truncate(start * (array.itemsize * int(np.prod(array.shape[1:]))))
+                        f.seek(0, os.SEEK_END)
+                        f.write(array.tobytes())
+                        f.flush()
+                        os.fsync(f.fileno())
+            else:
+                # Сначала снимаем meta.json: пока файлы переписываются, кэш недействителен
+                if os.path.exists(self.meta_path):
+                    os.remove(self.meta_path)
+                features = np.ascontiguousarray(features)
+                targets = np.ascontiguousarray(targets)
+                for path, array in ((self.features_path, features), (self.targets_path, targets)):
+                    tmp_path = f"{path}.{os.getpid()}.tmp"
+                    with open(tmp_path, 'wb') as f:
+                        f.write(array.tobytes())
+                    os.replace(tmp_path, path)
+                meta = {
+                    'version': CACHE_VERSION,
+                    'history_size': history_size,
+                    'windowing': windowing,
+                    'features_dtype': features.dtype.str,
+                    'features_shape': list(features.shape[1:]),
+                    'targets_dtype': targets.dtype.str,
+                    'targets_shape': list(targets.shape[1:]),
+                }
+            
+            meta.update({
+                'numbers_count': int(len(numbers)),
+                'samples_count': int(start + len(features)),
+                'prefix_sha1': self.prefix_hash(numbers),
+            })
+            tmp_meta = f"{self.meta_path}.{os.getpid()}.tmp"
+            with open(tmp_meta, 'w', encoding='utf-8') as f:
+                json.dump(meta, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_meta, self.meta_path)
+        except Exception as e:
+            print(f"⚠️  Ошибка сохранения кэша features: {e}")
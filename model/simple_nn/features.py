@@ -3,8 +3,15 @@
 Извлечение features из истории чисел
 """
 
+import math
 import numpy as np
-from typing import List
+from collections import deque
+from typing import Iterable, List, Optional
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Тип результата скалярной арифметики float32 / int зависит от версии NumPy
+# (float64 в 1.x, float32 в 2.x) - пакетный путь повторяет его для побитового совпадения
+_SCALAR_DIV_DTYPE = (np.float32(1) / 1).dtype
 
 class FeatureExtractor:
     def __init__(self, history_size: int = 20):
@@ -100,4 +107,298 @@ class FeatureExtractor:
         while len(features) < 50:
             features.append(0.0)
         
-        return np.array(features[:50], dtype=np.float32)
\ No newline at end of file
+        return np.array(features[:50], dtype=np.float32)
+    
+    def sliding_windows(self, numbers: np.ndarray, count: int = None) -> np.ndarray:
+        """2-D представление потока чисел скользящими окнами history_size (без копирования)"""
+        numbers = np.asarray(numbers, dtype=np.float32)
+        windows = sliding_window_view(numbers, self.history_size)
+        return windows if count is None else windows[:count]
+    
+    def extract_features_batch(self, windows: np.ndarray) -> np.ndarray:
+        """Пакетное извлечение 50 features для каждой строки окна истории
+        
+        Результат побитово совпадает с построчным вызовом extract_features.
+        """
+        windows = np.asarray(windows, dtype=np.float32)
+        if windows.ndim != 2:
+            raise ValueError(f"Ожидается 2-D массив окон, получено измерений: {windows.ndim}")
+        
+        n_windows = windows.shape[0]
+        if windows.shape[1] == 0:
+            return np.zeros((n_windows, 50), dtype=np.float32)
+        
+        # Непрерывная копия: редукции по оси 1 идут в том же порядке, что и в 1-D случае
+        history = np.ascontiguousarray(windows[:, -self.history_size:])
+        n = history.shape[1]
+        features = np.zeros((n_windows, 50), dtype=np.float32)
+        
+        # Частоты одним bincount по плоскому индексу (окно, число)
+        ints = history.astype(np.int64)
+        rows, cols = np.nonzero((ints >= 1) & (ints <= 26))
+        flat_index = rows * 26 + ints[rows, cols] - 1
+        freq = np.bincount(flat_index, minlength=n_windows * 26).reshape(n_windows, 26).astype(np.float64)
+        
+        # 1. Базовые статистики (6 features)
+        features[:, 0] = np.mean(history, axis=1) / 26.0
+        features[:, 1] = np.std(history, axis=1) / 26.0
+        features[:, 2] = np.min(history, axis=1) / 26.0
+        features[:, 3] = np.max(history, axis=1) / 26.0
+        features[:, 4] = np.median(history, axis=1) / 26.0
+        features[:, 5] = self._count_unique(history) / n
+        
+        # 2. Частоты чисел 1-26 (26 features)
+        features[:, 6:32] = freq / n
+        
+        # 3. Скользящие статистики (6 features)
+        for offset, size in ((32, 5), (35, 10)):
+            if n >= size:
+                recent = np.ascontiguousarray(history[:, -size:])
+                features[:, offset] = np.mean(recent, axis=1) / 26.0
+                features[:, offset + 1] = np.std(recent, axis=1) / 26.0
+                features[:, offset + 2] = np.median(recent, axis=1) / 26.0
+        
+        # 4. Тренды и паттерны (8 features)
+        if n > 1:
+            diffs = np.diff(history, axis=1)
+            m = diffs.shape[1]
+            features[:, 38] = np.mean(diffs, axis=1) / 25.0
+            features[:, 39] = np.std(diffs, axis=1) / 25.0
+            features[:, 40] = np.sum(diffs > 0, axis=1) / m
+            features[:, 41] = np.sum(diffs < 0, axis=1) / m
+            features[:, 42] = np.sum(np.abs(diffs) > 10, axis=1) / m
+            
+            if n >= 3:
+                features[:, 43] = self._lag1_autocorr_batch(history)
+            
+            volatility = np.sum(np.abs(diffs), axis=1).astype(_SCALAR_DIV_DTYPE) / m / 25.0
+            features[:, 44] = volatility
+            features[:, 45] = 1.0 - volatility
+        
+        # 5. Категориальные features (4 features)
+        even_share = np.sum(history % 2 == 0, axis=1) / n
+        features[:, 46] = even_share
+        features[:, 47] = 1 - even_share
+        features[:, 48] = np.sum(history <= 13, axis=1) / n
+        features[:, 49] = np.sum(history > 13, axis=1) / n
+        
+        return features
+    
+    @staticmethod
+    def _count_unique(history: np.ndarray) -> np.ndarray:
+        """Количество уникальных значений в каждой строке"""
+        ordered = np.sort(history, axis=1)
+        return 1 + np.count_nonzero(ordered[:, 1:] != ordered[:, :-1], axis=1)
+    
+    @staticmethod
+    def _lag1_autocorr_batch(history: np.ndarray) -> np.ndarray:
+        """Автокорреляция lag-1 по строкам (как np.corrcoef, отрицательные и NaN -> 0)"""
+        # Пары (x[:-1], x[1:]) как стек матриц 2 x (n-1) - та же раскладка, что в np.cov
+        pairs = np.stack([history[:, :-1], history[:, 1:]], axis=1).astype(np.float64)
+        pairs -= np.mean(pairs, axis=2, keepdims=True)
+        
+        cov = np.matmul(pairs, pairs.transpose(0, 2, 1))
+        cov *= np.true_divide(1, pairs.shape[2] - 1)
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            corr = cov[:, 0, 1] / np.sqrt(cov[:, 0, 0]) / np.sqrt(cov[:, 1, 1])
+        corr = np.clip(corr, -1, 1)
+        return np.where(np.isnan(corr), 0.0, np.maximum(corr, 0.0))
+
+class _RollingWindow:
+    """Последние size чисел 1-26: сумма, сумма квадратов и гистограмма, обновление O(1)"""
+    
+    def __init__(self, size: int):
+        self.size = size
+        self.values = deque()
+        self.total = 0
+        self.squares = 0
+        self.counts = [0] * 27  # индекс - само число
+    
+    def push(self, number: int) -> Optional[int]:
+        """Добавление числа, возвращает вытесненное из окна (или None)"""
+        self.values.append(number)
+        self.total += number
+        self.squares += number * number
+        self.counts[number] += 1
+        
+        if len(self.values) <= self.size:
+            return None
+        
+        old = self.values.popleft()
+        self.total -= old
+        self.squares -= old * old
+        self.counts[old] -= 1
+        return old
+    
+    def mean(self) -> np.float32:
+        # Сумма целых в float32 точна - результат побитово как у np.mean
+        return np.float32(np.float32(self.total) / len(self.values))
+    
+    def std(self) -> np.float32:
+        # np.std считает отклонения в float32, здесь точное значение: расхождение в последнем знаке
+        n = len(self.values)
+        return np.float32(math.sqrt(n * self.squares - self.total * self.total) / n)
+    
+    def median(self) -> np.float32:
+        """Медиана по гистограмме: проход по 26 значениям вместо сортировки окна"""
+        n = len(self.values)
+        lower, upper = (n - 1) // 2, n // 2
+        seen, low_value = 0, None
+        for number in range(1, 27):
+            seen += self.counts[number]
+            if low_value is None and seen > lower:
+                low_value = number
+            if seen > upper:
+                return np.float32((low_value + number) / 2)
+        return np.float32(0.0)
+
+class RollingFeatureState:
+    """Features последнего окна истории, обновляемые по одному числу
+    
+    Держит суммы, гистограммы окна и последних 5/10 чисел, статистики разностей
+    и сумму произведений соседних чисел. push() - O(1), features() - O(26) и
+    не зависит от длины окна. Результат совпадает с FeatureExtractor.extract_features
+    для того же окна: побитово, кроме трех std и автокорреляции (точные суммы
+    вместо float32, расхождение не больше 1e-6).
+    """
+    
+    def __init__(self, history_size: int = 20):
+        self.history_size = history_size
+        self.reset()
+    
+    def reset(self):
+        """Пустое окно"""
+        self._window = _RollingWindow(self.history_size)
+        self._recent5 = _RollingWindow(5)
+        self._recent10 = _RollingWindow(10)
+        self._even = 0
+        self._low = 0
+        # Разности соседних чисел окна
+        self._diff_squares = 0
+        self._diff_abs = 0
+        self._rises = 0
+        self._falls = 0
+        self._jumps = 0
+        # Сумма x[i] * x[i + 1] для автокорреляции
+        self._cross = 0
+    
+    @property
+    def window(self) -> List[int]:
+        """Текущее окно истории"""
+        return list(self._window.values)
+    
+    def _count(self, number: int, sign: int):
+        self._even += sign * (number % 2 == 0)
+        self._low += sign * (number <= 13)
+    
+    def _count_diff(self, first: int, second: int, sign: int):
+        diff = second - first
+        self._diff_squares += sign * diff * diff
+        self._diff_abs += sign * abs(diff)
+        self._rises += sign * (diff > 0)
+        self._falls += sign * (diff < 0)
+        self._jumps += sign * (abs(diff) > 10)
+        self._cross += sign * first * second
+    
+    def push(self, number: int):
+        """Новое число входит в окно, самое старое (если окно полное) выходит"""
+        number = int(number)
+        if not 1 <= number <= 26:
+            raise ValueError(f"Число вне диапазона 1-26: {number}")
+        
+        values = self._window.values
+        if values:
+            self._count_diff(values[-1], number, 1)
+        
+        old = self._window.push(number)
+        self._count(number, 1)
+        if old is not None:
+            self._count(old, -1)
+            self._count_diff(old, values[0], -1)
+        
+        self._recent5.push(number)
+        self._recent10.push(number)
+    
+    def extend(self, numbers: Iterable[int]):
+        """push для последовательности чисел"""
+        for number in numbers:
+            self.push(number)
+    
+    def features(self) -> np.ndarray:
+        """50 features текущего окна (как FeatureExtractor.extract_features)"""
+        window = self._window
+        values = window.values
+        n = len(values)
+        if n == 0:
+            return np.zeros(50, dtype=np.float32)
+        
+        counts = window.counts
+        minimum = next(number for number in range(1, 27) if counts[number])
+        maximum = next(number for number in range(26, 0, -1) if counts[number])
+        
+        # 1. Базовые статистики (6 features)
+        features = [
+            window.mean() / 26.0,
+            window.std() / 26.0,
+            np.float32(minimum) / 26.0,
+            np.float32(maximum) / 26.0,
+            window.median() / 26.0,
+            sum(1 for number in range(1, 27) if counts[number]) / n,
+        ]
+        
+        # 2. Частоты чисел 1-26 (26 features)
+        features.extend(counts[number] / n for number in range(1, 27))
+        
+        # 3. Скользящие статистики (6 features)
+        for recent, size in ((self._recent5, 5), (self._recent10, 10)):
+            if n >= size:
+                features.extend([recent.mean() / 26.0, recent.std() / 26.0, recent.median() / 26.0])
+            else:
+                features.extend([0.0] * 3)
+        
+        # 4. Тренды и паттерны (8 features)
+        if n > 1:
+            m = n - 1
+            diff_total = values[-1] - values[0]
+            diff_mean = np.float32(np.float32(diff_total) / m)
+            diff_std = np.float32(math.sqrt(m * self._diff_squares - diff_total * diff_total) / m)
+            features.extend([
+                diff_mean / 25.0,
+                diff_std / 25.0,
+                self._rises / m,
+                self._falls / m,
+                self._jumps / m,
+            ])
+            features.append(self._autocorr() if n >= 3 else 0.0)
+            
+            volatility = np.float32(self._diff_abs) / m / 25.0
+            features.extend([volatility, 1.0 - volatility])
+        else:
+            features.extend([0.0] * 8)
+        
+        # 5. Категориальные features (4 features)
+        features.extend([
+            self._even / n,
+            1 - (self._even / n),
+            self._low / n,
+            (n - self._low) / n,
+        ])
+        
+        return np.array(features, dtype=np.float32)
+    
+    def _autocorr(self) -> float:
+        """Автокорреляция lag-1 по суммам (как np.corrcoef, отрицательная и NaN -> 0)"""
+        values, window = self._window.values, self._window
+        pairs = len(values) - 1
+        first, last = values[0], values[-1]
+        
+        sum_a, sum_b = window.total - last, window.total - first
+        var_a = pairs * (window.squares - last * last) - sum_a * sum_a
+        var_b = pairs * (window.squares - first * first) - sum_b * sum_b
+        if var_a <= 0 or var_b <= 0:
+            return 0.0
+        
+        corr = (pairs * self._cross - sum_a * sum_b) / math.sqrt(var_a * var_b)
+        return max(0.0, min(1.0, corr))
+
@@ -0,0 +1,153 @@
+# [file name]: model/simple_nn/frozen.py
+"""
+Замороженный TorchScript граф модели для инференса
+
+Артефакт simple_model.frozen.pt пишется тренером после обучения рядом с
+simple_model.pth: eval-граф без dropout, веса вшиты константами, Linear
+слои свернуты (torch.jit.optimize_for_inference). Загрузка не создает
+Python-модуль и не читает state_dict. Граф привязан к fp32 чекпоинту по
+sha1 - EnhancedPredictor.load_model берет его, только если он собран из
+текущего чекпоинта, иначе загружает fp32 как раньше.
+
+ONNX не используется: onnxruntime в окружении нет, а TorchScript
+исполняется самим torch.
+
+Запуск:
+    python -m model.simple_nn.frozen export
+    python -m model.simple_nn.frozen benchmark
+"""
+
+import os
+import json
+import time
+import warnings
+import numpy as np
+import torch
+import torch.nn as nn
+from typing import Dict, Optional
+
+from .quantization import file_sha1, _load_fp32
+
+FROZEN_SUFFIX = '.frozen.pt'
+# Метаданные артефакта хранятся внутри архива TorchScript
+_META_FILE = 'meta.json'
+# Допустимое расхождение логитов с fp32 моделью
+PARITY_ATOL = 1e-4
+
+def frozen_model_path(model_path: str) -> str:
+    """Путь замороженного графа рядом с fp32 чекпоинтом"""
+    return os.path.splitext(model_path)[0] + FROZEN_SUFFIX
+
+class FrozenModel(nn.Module):
+    """Замороженный граф с интерфейсом обычной модели
+    
+    Профилирующий исполнитель TorchScript тратит ~50 мс на первые вызовы,
+    специализируя граф; для такой маленькой сети интерпретатор без
+    профилирования так же быстр, поэтому граф вызывается без него.
+    """
+    
+    def __init__(self, graph: torch.jit.ScriptModule):
+        super(FrozenModel, self).__init__()
+        self.graph = graph
+    
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        with torch.jit.optimized_execution(False):
+            return self.graph(x)
+
+def freeze_model(model: nn.Module) -> torch.jit.ScriptModule:
+    """eval-граф модели с вшитыми весами"""
+    # torch.jit помечен как устаревший в пользу torch.compile/torch.export, которые не сохраняются в один файл
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        scripted = torch.jit.script(model.eval())
+        try:
+            return torch.jit.optimize_for_inference(scripted)
+        except Exception:
+            return torch.jit.freeze(scripted)
+
+def export_frozen(model_path: str, output_path: str = None, samples: int = 64) -> bool:
+    """Сборка замороженного графа из fp32 чекпоинта с проверкой совпадения выходов"""
+    output_path = output_path or frozen_model_path(model_path)
+    model, config = _load_fp32(model_path)
+    graph = freeze_model(model)
+    
+    features = torch.rand(samples, config['input_size'])
+    with torch.no_grad():
+        max_diff = float((FrozenModel(graph)(features) - model(features)).abs().max())
+    if max_diff > PARITY_ATOL:
+        print(f"❌ Замороженный граф расходится с fp32 ({max_diff:.2e} > {PARITY_ATOL}), артефакт не записан")
+        return False
+    
+    meta = {'model_config': config, 'source_sha1': file_sha1(model_path)}
+    # Граф могут пересобирать несколько процессов сразу - запись атомарная
+    tmp_path = f"{output_path}.{os.getpid()}.tmp"
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        torch.jit.save(graph, tmp_path, _extra_files={_META_FILE: json.dumps(meta)})
+    os.replace(tmp_path, output_path)
+    
+    print(f"✅ Замороженный граф сохранен: {output_path}")
+    return True
+
+def load_frozen(model_path: str) -> Optional[tuple]:
+    """(замороженная модель, config), если граф есть и собран из текущего fp32 чекпоинта"""
+    path = frozen_model_path(model_path)
+    if not os.path.exists(path) or not os.path.exists(model_path):
+        return None
+    
+    extra_files = {_META_FILE: ''}
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        graph = torch.jit.load(path, map_location='cpu', _extra_files=extra_files)
+    meta = json.loads(extra_files[_META_FILE])
+    if meta.get('source_sha1') != file_sha1(model_path):
+        return None
+    
+    return FrozenModel(graph).eval(), meta['model_config']
+
+def benchmark(model_path: str = "data/simple_model.pth", repeats: int = 500) -> Dict:
+    """Загрузка, первый вызов и задержка (batch 1, 64): fp32 модуль против замороженного графа"""
+    if load_frozen(model_path) is None:
+        export_frozen(model_path)
+    
+    torch.set_num_threads(1)
+    loaders = (('fp32', lambda: _load_fp32(model_path)), ('frozen', lambda: load_frozen(model_path)))
+    
+    results = {}
+    for kind, loader in loaders:
+        began = time.perf_counter()
+        model, config = loader()
+        result = {'load_ms': (time.perf_counter() - began) * 1e3}
+        
+        with torch.no_grad():
+            began = time.perf_counter()
+            model(torch.rand(1, config['input_size']))
+            result['first_call_ms'] = (time.perf_counter() - began) * 1e3
+            for batch_size in (1, 64):
+                batch = torch.rand(batch_size, config['input_size'])
+                timings = []
+                for _ in range(repeats):
+                    began = time.perf_counter()
+                    model(batch)
+                    timings.append((time.perf_counter() - began) * 1e6)
+                result[f'batch{batch_size}_us'] = float(np.median(timings))
+        results[kind] = result
+    
+    print("🏁 Инференс fp32 против замороженного графа (1 поток):")
+    for kind, r in results.items():
+        print(f"   {kind}: загрузка {r['load_ms']:5.1f} мс, первый вызов {r['first_call_ms']:5.2f} мс, "
+              f"batch 1 {r['batch1_us']:5.0f} мкс, batch 64 {r['batch64_us']:5.0f} мкс")
+    return results
+
+if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Frozen TorchScript graph of the inference model')
+    parser.add_argument('command', choices=('export', 'benchmark'), help='Build the frozen graph or compare with fp32')
+    parser.add_argument('--model-path', default='data/simple_model.pth', help='fp32 checkpoint')
+    
+    args = parser.parse_args()
+    if args.command == 'export':
+        export_frozen(args.model_path)
+    else:
+        benchmark(args.model_path)
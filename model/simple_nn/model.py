@@ -3,72 +3,119 @@
 УСИЛЕННАЯ нейросеть для предсказания чисел 1-26
 """
 
+import math
 import torch
 import torch.nn as nn
+import torch.nn.functional as F
+
+# Слои головы: Linear(in, 256) -> ReLU -> Dropout(0.2) -> Linear(256, 128) -> ReLU -> Linear(128, 26)
+HEAD_SIZES = (256, 128, 26)
+# Индексы Linear в старых nn.Sequential головах head1..head4
+_LEGACY_HEAD_LINEARS = (0, 3, 5)
+
+class GroupedHeads(nn.Module):
+    """Четыре головы позиций одним модулем: веса каждого слоя хранятся стеком по головам
+    
+    Первый слой всех голов - одно умножение [B, in] x [in, 4*256] (вход общий),
+    следующие - по одному batched matmul на слой. Результат эквивалентен четырем
+    отдельным nn.Sequential, включая инициализацию как у nn.Linear.
+    """
+    
+    def __init__(self, in_features: int, heads: int = 4, dropout: float = 0.2):
+        super(GroupedHeads, self).__init__()
+        hidden1, hidden2, out = HEAD_SIZES
+        self.heads = heads
+        
+        self.weight1 = nn.Parameter(torch.empty(in_features, heads, hidden1))
+        self.bias1 = nn.Parameter(torch.empty(heads, hidden1))
+        self.weight2 = nn.Parameter(torch.empty(heads, hidden1, hidden2))
+        self.bias2 = nn.Parameter(torch.empty(heads, hidden2))
+        self.weight3 = nn.Parameter(torch.empty(heads, hidden2, out))
+        self.bias3 = nn.Parameter(torch.empty(heads, out))
+        self.dropout = nn.Dropout(dropout)
+        
+        self.reset_parameters()
+    
+    def reset_parameters(self):
+        """Инициализация как у nn.Linear: U(-1/sqrt(fan_in), 1/sqrt(fan_in))"""
+        for weight, bias in ((self.weight1, self.bias1), (self.weight2, self.bias2), (self.weight3, self.bias3)):
+            fan_in = weight.shape[0] if weight is self.weight1 else weight.shape[1]
+            bound = 1 / math.sqrt(fan_in)
+            nn.init.uniform_(weight, -bound, bound)
+            nn.init.uniform_(bias, -bound, bound)
+    
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        batch_size = x.shape[0]
+        
+        # [B, 4*256] -> [4, B, 256]
+        h = torch.addmm(self.bias1.reshape(-1), x, self.weight1.reshape(x.shape[1], -1))
+        h = self.dropout(F.relu(h.view(batch_size, self.heads, -1).transpose(0, 1)))
+        
+        h = F.relu(torch.baddbmm(self.bias2.unsqueeze(1), h, self.weight2))
+        h = torch.baddbmm(self.bias3.unsqueeze(1), h, self.weight3)
+        
+        # [4, B, 26] -> [B, 4, 26]
+        return h.transpose(0, 1)
+
+def convert_legacy_state_dict(state_dict: dict, prefix: str = '') -> dict:
+    """state_dict с головами head1..head4 (nn.Sequential) -> формат GroupedHeads"""
+    converted = dict(state_dict)
+    legacy_keys = [f'{prefix}head{k}.{i}.{kind}' for k in range(1, 5)
+                   for i in _LEGACY_HEAD_LINEARS for kind in ('weight', 'bias')]
+    if not all(key in state_dict for key in legacy_keys):
+        return converted
+    
+    for layer, index in enumerate(_LEGACY_HEAD_LINEARS, start=1):
+        # nn.Linear хранит [out, in], стек голов - [4, in, out]
+        weights = torch.stack([state_dict[f'{prefix}head{k}.{index}.weight'].t() for k in range(1, 5)])
+        biases = torch.stack([state_dict[f'{prefix}head{k}.{index}.bias'] for k in range(1, 5)])
+        if layer == 1:
+            weights = weights.permute(1, 0, 2)
+        converted[f'{prefix}heads.weight{layer}'] = weights.contiguous()
+        converted[f'{prefix}heads.bias{layer}'] = biases.contiguous()
+    
+    for key in legacy_keys:
+        del converted[key]
+    return converted
+
+def is_legacy_state_dict(state_dict: dict) -> bool:
+    """Чекпоинт сохранен со старыми головами head1..head4"""
+    return 'head1.0.weight' in state_dict
+
+def _convert_legacy_heads(state_dict, prefix, local_metadata, strict, missing_keys, unexpected_keys, error_msgs):
+    """pre-hook load_state_dict: подмена старых ключей голов на месте"""
+    if f'{prefix}head1.0.weight' in state_dict:
+        converted = convert_legacy_state_dict(state_dict, prefix)
+        state_dict.clear()
+        state_dict.update(converted)
 
 class EnhancedNumberPredictor(nn.Module):
-    def __init__(self, input_size: int = 50, hidden_size: int = 256):
+    def __init__(self, input_size: int = 50, hidden_size: int = 256, dropout: float = 0.3, head_dropout: float = 0.2):
         super(EnhancedNumberPredictor, self).__init__()
         
         # Усиленная архитектура с residual connections
         self.feature_extractor = nn.Sequential(
             nn.Linear(input_size, hidden_size),
             nn.ReLU(),
-            nn.Dropout(0.3),
+            nn.Dropout(dropout),
             
             nn.Linear(hidden_size, hidden_size),
             nn.ReLU(),
-            nn.Dropout(0.3),
+            nn.Dropout(dropout),
             
             nn.Linear(hidden_size, hidden_size // 2),
             nn.ReLU(),
-            nn.Dropout(0.2),
+            nn.Dropout(head_dropout),
         )
         
-        # Отдельные головы для каждой позиции с разными весами
-        self.head1 = nn.Sequential(
-            nn.Linear(hidden_size // 2, 256),
-            nn.ReLU(),
-            nn.Dropout(0.2),
-            nn.Linear(256, 128),
-            nn.ReLU(),
-            nn.Linear(128, 26)
-        )
-        
-        self.head2 = nn.Sequential(
-            nn.Linear(hidden_size // 2, 256),
-            nn.ReLU(),
-            nn.Dropout(0.2),
-            nn.Linear(256, 128),
-            nn.ReLU(),
-            nn.Linear(128, 26)
-        )
+        # Головы четырех позиций с отдельными весами, хранятся стеками (см. GroupedHeads)
+        self.heads = GroupedHeads(hidden_size // 2, heads=4, dropout=head_dropout)
         
-        self.head3 = nn.Sequential(
-            nn.Linear(hidden_size // 2, 256),
-            nn.ReLU(),
-            nn.Dropout(0.2),
-            nn.Linear(256, 128),
-            nn.ReLU(),
-            nn.Linear(128, 26)
-        )
-        
-        self.head4 = nn.Sequential(
-            nn.Linear(hidden_size // 2, 256),
-            nn.ReLU(),
-            nn.Dropout(0.2),
-            nn.Linear(256, 128),
-            nn.ReLU(),
-            nn.Linear(128, 26)
-        )
+        # Чекпоинты со старыми head1..head4 конвертируются при загрузке
+        self._register_load_state_dict_pre_hook(_convert_legacy_heads)
     
     def forward(self, x):
         features = self.feature_extractor(x)
         
-        out1 = self.head1(features)
-        out2 = self.head2(features)
-        out3 = self.head3(features)
-        out4 = self.head4(features)
-        
         # Возвращаем тензор размерности [batch_size, 4, 26]
-        return torch.stack([out1, out2, out3, out4], dim=1)
\ No newline at end of file
+        return self.heads(features)
\ No newline at end of file
@@ -15,20 +15,39 @@ if current_dir not in sys.path:
     sys.path.insert(0, current_dir)
 
 from .model import EnhancedNumberPredictor
-from .features import FeatureExtractor
+from .features import FeatureExtractor, RollingFeatureState
+from .candidate_scoring import PatternScoreTables, outer4, top_k_groups, top_k_product
+from .recurrent import BACKENDS, BACKEND_FEEDFORWARD, BACKEND_RECURRENT, RecurrentPredictor
 
 class EnhancedPredictor:
-    def __init__(self, model_path: str = "data/simple_model.pth"):
+    # Стадии PredictionContext, которые читает predict_context
+    CONTEXT_STAGES = ('pattern_analysis', 'probabilities', 'frequency_candidates')
+    
+    def __init__(self, model_path: str = "data/simple_model.pth", quantized: bool = False,
+                 backend: str = BACKEND_FEEDFORWARD):
+        if backend not in BACKENDS:
+            raise ValueError(f"Неизвестный бэкенд: {backend} (доступны: {', '.join(BACKENDS)})")
+        
         self.model_path = model_path
         self.device = torch.device('cpu')
         self.model = None
         self.feature_extractor = FeatureExtractor(history_size=25)
         self.is_trained = False
+        # Режим окон, на которых обучена загруженная модель
+        self.windowing = None
         
         # Ленивая загрузка ансамблевой системы
         self._ensemble_predictor = None
         self._pattern_analyzer = None
         self.use_ensemble = True
+        # int8 модель вместо fp32 (см. quantization.py)
+        self.use_quantized = quantized
+        # recurrent - GRU по группам с сохраняемым состоянием (см. recurrent.py)
+        self.backend = backend
+        self._recurrent = RecurrentPredictor(model_path) if backend == BACKEND_RECURRENT else None
+        # Features окна в конце датасета, досчитываются по новым группам (см. sync_state)
+        self._feature_state = None
+        self._feature_state_groups = 0
     
     def _get_ensemble_predictor(self):
         """Ленивая загрузка ансамблевого предсказателя"""
@@ -45,34 +64,54 @@ class EnhancedPredictor:
         """Ленивая загрузка анализатора паттернов"""
         if self._pattern_analyzer is None:
             try:
-                from model.advanced_features import AdvancedPatternAnalyzer
-                self._pattern_analyzer = AdvancedPatternAnalyzer()
+                from model.advanced_features import get_pattern_analyzer
+                self._pattern_analyzer = get_pattern_analyzer()
             except ImportError as e:
                 print(f"⚠️  Не удалось загрузить анализатор паттернов: {e}")
                 self._pattern_analyzer = None
         return self._pattern_analyzer
     
-    def load_model(self) -> bool:
-        """Загрузка обученной модели"""
+    def load_model(self, update_ensemble: bool = True) -> bool:
+        """Загрузка обученной модели
+        
+        update_ensemble=False не трогает ансамбль и его частотный снимок
+        (нужно для бэктеста, где история ограничена прошлым).
+        """
         if not os.path.exists(self.model_path):
             print(f"❌ Файл модели не найден: {self.model_path}")
             return False
-            
+        
         try:
-            checkpoint = torch.load(self.model_path, map_location='cpu')
-            config = checkpoint['model_config']
-            self.model = EnhancedNumberPredictor(
-                input_size=config['input_size'],
-                hidden_size=config['hidden_size']
-            )
-            self.model.load_state_dict(checkpoint['model_state_dict'])
+            if self._recurrent is not None:
+                if not self._recurrent.load_model():
+                    return False
+                loaded = (self._recurrent.model, dict(self._recurrent.config, windowing='group'))
+            else:
+                loaded = self._load_quantized() if self.use_quantized else None
+            if loaded is None:
+                # Замороженный граф после обучения пишет тренер; устаревший граф не используется
+                from .frozen import load_frozen
+                loaded = load_frozen(self.model_path)
+            if loaded is not None:
+                self.model, config = loaded
+            else:
+                checkpoint = torch.load(self.model_path, map_location='cpu')
+                config = checkpoint['model_config']
+                self.model = EnhancedNumberPredictor(
+                    input_size=config['input_size'],
+                    hidden_size=config['hidden_size']
+                )
+                self.model.load_state_dict(checkpoint['model_state_dict'])
             self.model.to(self.device)
             self.model.eval()
+            # Длина окна истории подбирается при обучении, старые чекпоинты - 25 чисел
+            self.feature_extractor = FeatureExtractor(history_size=config.get('history_size', 25))
             
             self.is_trained = True
+            self.windowing = config.get('windowing', 'number')
             
             # Обновляем ансамбль если доступен
-            ensemble = self._get_ensemble_predictor()
+            ensemble = self._get_ensemble_predictor() if update_ensemble else None
             if ensemble:
                 ensemble.set_neural_predictor(self)
                 try:
@@ -84,20 +123,106 @@ class EnhancedPredictor:
             
             print(f"✅ УСИЛЕННАЯ нейросеть загружена: {self.model_path}")
             return True
-            
+        
         except Exception as e:
             print(f"❌ Ошибка загрузки модели: {e}")
             return False
     
+    def sync_state(self, dataset) -> int:
+        """Досчет состояния по новым группам датасета: GRU или окно features, возвращает число групп"""
+        if self._recurrent is not None:
+            return self._recurrent.sync(dataset)
+        return self._sync_feature_state(dataset)
+    
+    def _sync_feature_state(self, dataset) -> int:
+        """Окно features в конце датасета: новые числа входят по одному, иначе окно строится заново
+        
+        Нужны только последние history_size чисел, поэтому и полная пересборка
+        не зависит от длины датасета.
+        """
+        from .recurrent import parse_groups
+        
+        history_size = self.feature_extractor.history_size
+        state = self._feature_state
+        if state is None or state.history_size != history_size:
+            state = self._feature_state = RollingFeatureState(history_size)
+            self._feature_state_groups = 0
+        
+        tail = parse_groups(dataset[-(history_size // 4 + 1):]).ravel().tolist()[-history_size:]
+        new_numbers = 4 * (len(dataset) - self._feature_state_groups)
+        window = state.window
+        
+        if new_numbers == 0 and window == tail:
+            return 0
+        if 0 < new_numbers < len(tail) and window[new_numbers:] == tail[:-new_numbers] and len(window) == len(tail):
+            state.extend(tail[-new_numbers:])
+        else:
+            state.reset()
+            state.extend(tail)
+        
+        processed = len(dataset) - self._feature_state_groups
+        self._feature_state_groups = len(dataset)
+        return processed
+    
+    def _min_history(self) -> int:
+        """Минимальная длина истории для прогноза модели"""
+        return 4 if self._recurrent is not None else self.feature_extractor.history_size
+    
+    def _features(self, histories: List[List[int]]) -> np.ndarray:
+        """features окон [N, F] для историй не короче _min_history()"""
+        history_size = self.feature_extractor.history_size
+        warm = self._feature_state
+        if (len(histories) == 1 and warm is not None and warm.history_size == history_size
+                and warm.window == list(histories[0][-history_size:])):
+            # Живой прогноз по концу датасета: features уже досчитаны в sync_state
+            features = warm.features()[None]
+        else:
+            windows = np.array([history[-history_size:] for history in histories], dtype=np.float32)
+            features = self.feature_extractor.extract_features_batch(windows)
+        return features
+    
+    def _probabilities(self, histories: List[List[int]], features: np.ndarray = None) -> torch.Tensor:
+        """softmax модели [N, 4, 26] для историй не короче _min_history()
+        
+        features - уже посчитанные features этих историй (стадия контекста).
+        """
+        if self._recurrent is not None:
+            return torch.from_numpy(np.stack([self._recurrent.probabilities_for(history) for history in histories]))
+        
+        if features is None:
+            features = self._features(histories)
+        with torch.no_grad():
+            outputs = self.model(torch.from_numpy(features).to(self.device))
+            return torch.softmax(outputs, dim=-1).cpu()
+    
+    def _load_quantized(self):
+        """int8 модель и config; устаревший артефакт пересобирается из fp32 чекпоинта"""
+        from .quantization import load_quantized, export_quantized
+        
+        loaded = load_quantized(self.model_path)
+        if loaded is None:
+            print("🔄 int8 модель отсутствует или устарела, собираем из fp32 чекпоинта")
+            if export_quantized(self.model_path):
+                loaded = load_quantized(self.model_path)
+        if loaded is None:
+            print("⚠️ int8 модель недоступна, используем fp32")
+        return loaded
+    
     def predict_group(self, number_history: List[int], top_k: int = 10) -> List[Tuple[Tuple[int, int, int, int], float]]:
-        """УСИЛЕННОЕ предсказание следующей группы чисел с ансамблевыми методами"""
+        """УСИЛЕННОЕ предсказание следующей группы чисел с ансамблевыми методами
+        
+        Контекст прогноза строится один раз: ансамбль и запасной вариант
+        работают с одними и теми же результатами стадий.
+        """
+        use_ensemble = self.use_ensemble and len(number_history) >= 30
+        context = self.build_context(number_history, with_ensemble=use_ensemble)
         
         # Используем ансамбль если включен и есть достаточно данных
-        if self.use_ensemble and len(number_history) >= 30:
+        if use_ensemble:
             try:
                 ensemble = self._get_ensemble_predictor()
                 if ensemble:
-                    predictions = ensemble.predict_ensemble(number_history, top_k)
+                    predictions = ensemble.predict_ensemble(number_history, top_k, context=context)
                     if predictions:
                         print(f"🎯 Ансамбль сгенерировал {len(predictions)} предсказаний")
                         return predictions
@@ -105,39 +230,96 @@ class EnhancedPredictor:
                 print(f"⚠️  Ошибка ансамблевого предсказания, используем базовую модель: {e}")
         
         # Резервный вариант: оригинальная модель
-        return self._predict_original(number_history, top_k)
+        return self.predict_context(context, top_k)
     
     def _predict_original(self, number_history: List[int], top_k: int = 10) -> List[Tuple[Tuple[int, int, int, int], float]]:
         """Оригинальный метод предсказания (как запасной вариант)"""
+        return self.predict_context(self.build_context(number_history, with_ensemble=False), top_k)
+    
+    def build_context(self, number_history: List[int], with_ensemble: bool = True):
+        """PredictionContext для истории: стадии нейросети и (with_ensemble) членов ансамбля"""
+        from model.prediction_context import build_context
+        
+        stages = set(self.CONTEXT_STAGES)
+        ensemble = self._get_ensemble_predictor() if with_ensemble else None
+        if ensemble:
+            stages |= ensemble.context_stages()
+        
+        return build_context(number_history, stages, analyzer=self._get_pattern_analyzer(), neural=self,
+                             frequency=self._get_frequency_predictor())
+    
+    def context_features(self, number_history) -> np.ndarray:
+        """Стадия features: None, если модель недоступна или история короче окна (и для GRU)"""
         if not self.is_trained or self.model is None:
             if not self.load_model():
-                return []
+                return None
         
-        if len(number_history) < 25:
+        if len(number_history) < self._min_history():
             print("❌ Недостаточно данных в истории")
+            return None
+        
+        return None if self._recurrent is not None else self._features([number_history])[0]
+    
+    def context_probabilities(self, number_history, features: np.ndarray = None) -> np.ndarray:
+        """Стадия probabilities: softmax [4, 26] по features контекста"""
+        if not self.is_trained or self.model is None or len(number_history) < self._min_history():
+            return None
+        
+        return self._probabilities([number_history], None if features is None else features[None])[0].numpy()
+    
+    def predict_context(self, context, top_k: int = 10) -> List[Tuple[Tuple[int, int, int, int], float]]:
+        """Предсказание нейросети по готовому контексту (член ансамбля)"""
+        if context.probabilities is None:
             return []
         
-        features = self.feature_extractor.extract_features(number_history)
-        features_tensor = torch.tensor(features, dtype=torch.float32).unsqueeze(0)
+        # Генерация кандидатов
+        return self._generate_enhanced_candidates(torch.tensor(context.probabilities), top_k, list(context.history),
+                                                  context.pattern_analysis, list(context.frequency_candidates))
+    
+    def predict_batch(self, histories: List[List[int]], top_k: int = 10, use_patterns: bool = True) -> List[List[Tuple[Tuple[int, int, int, int], float]]]:
+        """Пакетное предсказание для множества историй одним проходом сети
         
-        with torch.no_grad():
-            outputs = self.model(features_tensor)
-            probabilities = torch.softmax(outputs, dim=-1)
-            
-            # Генерация кандидатов
-            candidates = self._generate_enhanced_candidates(probabilities[0], top_k, number_history)
-            return candidates
+        Возвращает список кандидатов для каждой истории (пустой для историй
+        короче окна истории модели). Ранжирование детерминированное: модельные кандидаты
+        с pattern/quality score (use_patterns=True) или чистое произведение softmax.
+        """
+        if not self.is_trained or self.model is None:
+            if not self.load_model():
+                return [[] for _ in histories]
+        
+        results = [[] for _ in histories]
+        valid = [i for i, history in enumerate(histories) if len(history) >= self._min_history()]
+        if not valid:
+            return results
+        
+        probabilities = self._probabilities([histories[i] for i in valid])
+        
+        for row, i in enumerate(valid):
+            results[i] = self._rank_model_candidates(probabilities[row], histories[i], top_k, use_patterns)
+        
+        return results
+    
+    def _rank_model_candidates(self, probabilities: torch.Tensor, history: List[int], top_k: int, use_patterns: bool) -> List[Tuple[Tuple[int, int, int, int], float]]:
+        """Детерминированный top-k модельных кандидатов для одной истории"""
+        if not use_patterns:
+            return top_k_product(probabilities.numpy(), top_k)
+        
+        score_tables = PatternScoreTables(self._deep_pattern_analysis(history))
+        candidates = self._generate_model_based_candidates(probabilities, top_k, score_tables)
+        # Без порога отсечения: модельные score без паттерн-кандидатов заведомо малы
+        return self._filter_candidates_by_quality(candidates[:top_k * 2], score_tables, min_score=0.0)[:top_k]
     
-    def _generate_enhanced_candidates(self, probabilities: torch.Tensor, top_k: int, history: List[int]) -> List[Tuple[Tuple[int, int, int, int], float]]:
+    def _generate_enhanced_candidates(self, probabilities: torch.Tensor, top_k: int, history: List[int],
+                                      pattern_analysis: dict, frequency_candidates: List[tuple]) -> List[Tuple[Tuple[int, int, int, int], float]]:
         print(f"🔍 DEBUG: Начало генерации кандидатов, top_k={top_k}")
         """УСИЛЕННАЯ генерация кандидатных групп с улучшенной логикой"""
         candidates = []
         
-        # Глубокий анализ истории
-        pattern_analysis = self._deep_pattern_analysis(history)
+        # Таблицы pattern/quality score считаются один раз на предсказание
+        score_tables = PatternScoreTables(pattern_analysis)
         
         # Генерация на основе модели
-        model_candidates = self._generate_model_based_candidates(probabilities, 20, pattern_analysis)
+        model_candidates = self._generate_model_based_candidates(probabilities, 20, score_tables)
         print(f"🔍 DEBUG: Модельные кандидаты: {len(model_candidates)}")
         candidates.extend(model_candidates)
         
@@ -146,12 +328,8 @@ class EnhancedPredictor:
         candidates.extend(pattern_candidates)
         
         # Добавляем частотные кандидаты
-        try:
-            frequency_candidates = self._generate_frequency_based_candidates(history, 10)
-            print(f"🔍 DEBUG: Частотные кандидаты: {len(frequency_candidates)}")
-            candidates.extend(frequency_candidates)
-        except Exception as e:
-            print(f"⚠️  Ошибка генерации частотных кандидатов: {e}")
+        print(f"🔍 DEBUG: Частотные кандидаты: {len(frequency_candidates)}")
+        candidates.extend(frequency_candidates)
         
         # Сортировка и фильтрация
         candidates.sort(key=lambda x: x[1], reverse=True)
@@ -167,79 +345,37 @@ class EnhancedPredictor:
                 break
         
         # Фильтрация по качеству
-        filtered_candidates = self._filter_candidates_by_quality(unique_candidates, pattern_analysis)
+        filtered_candidates = self._filter_candidates_by_quality(unique_candidates, score_tables)
         
         return filtered_candidates[:top_k]
     
-    def _generate_frequency_based_candidates(self, history: List[int], count: int) -> List[tuple]:
-        """Генерация кандидатов на основе частотного анализа"""
+    def _get_frequency_predictor(self):
+        """Частотный предсказатель ансамбля, синхронизированный с датасетом (стадия frequency_candidates)"""
         try:
             from model.data_loader import load_dataset
-            from model.advanced_features import FrequencyBasedPredictor
             
             dataset = load_dataset()
             if not dataset:
-                return []
-                
-            freq_predictor = FrequencyBasedPredictor()
-            freq_predictor.update_frequencies(dataset)
-            
-            candidates = []
-            import random
-            
-            # Генерация групп с высокими вероятностными scores
-            for _ in range(count * 5):
-                group = (
-                    random.randint(1, 26),
-                    random.randint(1, 26),
-                    random.randint(1, 26), 
-                    random.randint(1, 26)
-                )
-                
-                # Проверяем валидность
-                if group[0] != group[1] and group[2] != group[3]:
-                    score = freq_predictor.get_probability_scores(group)
-                    if score > 1e-8:
-                        candidates.append((group, score))
-            
-            # Возвращаем лучшие
-            candidates.sort(key=lambda x: x[1], reverse=True)
-            return candidates[:count]
+                return None
             
+            # Общий частотный предсказатель ансамбля: пересчитываются только новые группы
+            ensemble = self._get_ensemble_predictor()
+            freq_predictor = ensemble._get_frequency_predictor() if ensemble else None
+            if freq_predictor is None:
+                return None
+            freq_predictor.sync(dataset)
+            return freq_predictor
+        
         except Exception as e:
             print(f"❌ Ошибка в частотной генерации: {e}")
-            return []
+            return None
     
     def _deep_pattern_analysis(self, history: List[int]) -> dict:
         """Глубокий анализ паттернов в истории"""
+        from model.prediction_context import analyze_patterns
+        
         if len(history) < 10:
             return {}
-            
-        recent = history[-20:]
-        
-        # Анализ частот
-        freq = {}
-        for num in recent:
-            freq[num] = freq.get(num, 0) + 1
-        
-        # "Горячие" и "холодные" числа
-        avg_freq = len(recent) / 26
-        hot_numbers = [num for num, count in freq.items() if count > avg_freq * 1.5]
-        cold_numbers = [num for num in range(1, 27) if num not in freq or freq[num] < avg_freq * 0.5]
-        
-        # Анализ последовательностей
-        sequences = []
-        current_seq = [recent[0]]
-        for i in range(1, len(recent)):
-            if abs(recent[i] - recent[i-1]) <= 2:
-                current_seq.append(recent[i])
-            else:
-                if len(current_seq) >= 3:
-                    sequences.append(current_seq)
-                current_seq = [recent[i]]
-        
-        if len(current_seq) >= 3:
-            sequences.append(current_seq)
         
         # Временной анализ
         temporal_patterns = {}
@@ -250,101 +386,27 @@ class EnhancedPredictor:
             except Exception as e:
                 print(f"⚠️  Ошибка анализа временных паттернов: {e}")
         
-        return {
-            'hot_numbers': hot_numbers,
-            'cold_numbers': cold_numbers,
-            'sequences': sequences,
-            'frequencies': freq,
-            'recent_numbers': recent,
-            'temporal_patterns': temporal_patterns
-        }
-    
-    def _generate_model_based_candidates(self, probabilities: torch.Tensor, count: int, pattern_analysis: dict) -> List[Tuple[Tuple[int, int, int, int], float]]:
-        """Генерация кандидатов на основе модели с учетом паттернов"""
-        candidates = []
+        return analyze_patterns(history, temporal_patterns)
+    
+    def _generate_model_based_candidates(self, probabilities: torch.Tensor, count: int, score_tables: PatternScoreTables) -> List[Tuple[Tuple[int, int, int, int], float]]:
+        """Генерация кандидатов на основе модели с учетом паттернов
         
-        # Берем топ-7 чисел для каждой позиции
-        top_numbers = []
-        for pos in range(4):
-            probs = probabilities[pos]
-            top_probs, top_indices = torch.topk(probs, 7)
-            top_numbers.append([
-                (idx.item() + 1, prob.item()) for idx, prob in zip(top_indices, top_probs)
-            ])
-        
-        # Генерируем комбинации с приоритетом для "холодных" чисел
-        generated = 0
-        for i, (n1, p1) in enumerate(top_numbers[0]):
-            for j, (n2, p2) in enumerate(top_numbers[1]):
-                if n1 == n2:
-                    continue
-                for k, (n3, p3) in enumerate(top_numbers[2]):
-                    if n3 in [n1, n2]:
-                        continue
-                    for l, (n4, p4) in enumerate(top_numbers[3]):
-                        if n4 in [n1, n2, n3]:
-                            continue
-                        
-                        group = (n1, n2, n3, n4)
-                        
-                        # Корректируем score на основе паттернов
-                        base_score = p1 * p2 * p3 * p4
-                        pattern_score = self._calculate_enhanced_pattern_score(group, pattern_analysis)
-                        adjusted_score = base_score * pattern_score
-                        
-                        # Усиливаем хорошие предсказания
-                        if adjusted_score > 0.0001:
-                            adjusted_score *= 2
-                        
-                        candidates.append((group, adjusted_score))
-                        generated += 1
-                        
-                        if generated >= count * 10:
-                            return candidates
+        Оцениваются все валидные группы сразу: произведение softmax по позициям
+        умножается на pattern score, затем берется точный top.
+        """
+        probs = probabilities.detach().cpu().numpy().astype(np.float64)
         
-        return candidates
+        base_scores = outer4(probs[0], probs[1], probs[2], probs[3])
+        adjusted = base_scores * score_tables.pattern_tensor()
+        
+        # Усиливаем хорошие предсказания
+        adjusted = np.where(adjusted > 0.0001, adjusted * 2, adjusted)
+        
+        return top_k_groups(adjusted, count * 10)
     
     def _calculate_enhanced_pattern_score(self, group: Tuple[int, int, int, int], pattern_analysis: dict) -> float:
         """Расчет усиленного pattern score с новыми факторами"""
-        score = 1.0
-        hot_numbers = pattern_analysis.get('hot_numbers', [])
-        cold_numbers = pattern_analysis.get('cold_numbers', [])
-        temporal_patterns = pattern_analysis.get('temporal_patterns', {})
-        
-        # Бонус за холодные числа
-        cold_count = sum(1 for num in group if num in cold_numbers)
-        score *= (1 + cold_count * 0.3)
-        
-        # Штраф за слишком много горячих чисел
-        hot_count = sum(1 for num in group if num in hot_numbers)
-        if hot_count >= 3:
-            score *= 0.7
-        
-        # Бонус за сбалансированность
-        even_count = sum(1 for num in group if num % 2 == 0)
-        if even_count == 2:
-            score *= 1.2
-        
-        # Бонус за разнообразие диапазонов
-        low_count = sum(1 for num in group if num <= 13)
-        high_count = sum(1 for num in group if num > 13)
-        if low_count == 2 and high_count == 2:
-            score *= 1.3
-        
-        # Бонус за уникальность всех чисел
-        if len(set(group)) == 4:
-            score *= 1.2
-        
-        # Учет временных паттернов
-        autocorr = temporal_patterns.get('autocorrelation', {})
-        if autocorr:
-            avg_autocorr = sum(autocorr.values()) / len(autocorr)
-            if avg_autocorr > 0.3:
-                # При высокой автокорреляции предпочитаем группы с числами из истории
-                history_overlap = sum(1 for num in group if num in pattern_analysis.get('recent_numbers', []))
-                score *= (1 + history_overlap * 0.2)
-        
-        return score
+        return float(PatternScoreTables(pattern_analysis).pattern_scores([group])[0])
     
     def _generate_intelligent_patterns(self, history: List[int], count: int, pattern_analysis: dict) -> List[Tuple[Tuple[int, int, int, int], float]]:
         """Генерация интеллектуальных паттернов с улучшениями"""
@@ -478,45 +540,22 @@ class EnhancedPredictor:
         
         return (first_pair[0], first_pair[1], second_pair[0], second_pair[1])
     
-    def _filter_candidates_by_quality(self, candidates: List[tuple], pattern_analysis: dict) -> List[tuple]:
+    def _filter_candidates_by_quality(self, candidates: List[tuple], score_tables: PatternScoreTables, min_score: float = 0.00005) -> List[tuple]:
         """Фильтрация кандидатов по качеству"""
-        filtered = []
+        if not candidates:
+            return []
         
-        for group, score in candidates:
-            quality_score = self._calculate_quality_score(group, pattern_analysis)
-            final_score = score * quality_score
-            
-            if final_score > 0.00005:
-                filtered.append((group, final_score))
+        groups = [group for group, _ in candidates]
+        scores = np.array([score for _, score in candidates], dtype=np.float64)
+        final_scores = scores * score_tables.quality_scores(groups)
         
+        filtered = [(group, float(score)) for group, score in zip(groups, final_scores) if score > min_score]
         filtered.sort(key=lambda x: x[1], reverse=True)
         return filtered
     
     def _calculate_quality_score(self, group: Tuple[int, int, int, int], pattern_analysis: dict) -> float:
         """Расчет score качества группы"""
-        score = 1.0
-        
-        if len(set(group)) < 4:
-            score *= 0.5
-        
-        even_count = sum(1 for num in group if num % 2 == 0)
-        if even_count == 0 or even_count == 4:
-            score *= 0.7
-        
-        low_count = sum(1 for num in group if num <= 13)
-        if low_count == 0 or low_count == 4:
-            score *= 0.8
-        
-        temporal_patterns = pattern_analysis.get('temporal_patterns', {})
-        hurst = temporal_patterns.get('hurst_exponent', 0.5)
-        
-        if hurst > 0.7:
-            recent_avg = np.mean(pattern_analysis.get('recent_numbers', [13.5]))
-            group_avg = np.mean(group)
-            if abs(group_avg - recent_avg) < 3:
-                score *= 1.2
-        
-        return score
+        return float(PatternScoreTables(pattern_analysis).quality_scores([group])[0])
     
     def enable_ensemble(self, enable: bool = True):
         """Включение/выключение ансамблевого режима"""
@@ -0,0 +1,267 @@
+# [file name]: model/simple_nn/quantization.py
+"""
+Динамическая int8 квантизация модели для инференса
+
+Артефакт simple_model.int8.pth лежит рядом с simple_model.pth и привязан к нему
+по sha1. EnhancedPredictor(quantized=True) загружает int8 модель вместо fp32 и
+пересобирает артефакт, если fp32 чекпоинт переобучен.
+
+На малых батчах (одиночный прогноз) динамическая квантизация медленнее fp32:
+каждый Linear квантует активации на лету. Выигрыш - размер весов и большие батчи.
+
+Запуск:
+    python -m model.simple_nn.quantization export
+    python -m model.simple_nn.quantization benchmark
+"""
+
+import os
+import io
+import copy
+import time
+import hashlib
+import warnings
+import numpy as np
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+from typing import Dict, Optional
+
+from .model import EnhancedNumberPredictor, GroupedHeads, HEAD_SIZES
+
+QUANTIZED_SUFFIX = '.int8.pth'
+
+# Порог согласия с fp32: доля совпадающих top-1 чисел по позициям
+PARITY_MIN_TOP1 = 0.97
+PARITY_SAMPLES = 512
+
+def quantized_model_path(model_path: str) -> str:
+    """Путь int8 артефакта рядом с fp32 чекпоинтом"""
+    return os.path.splitext(model_path)[0] + QUANTIZED_SUFFIX
+
+def file_sha1(path: str) -> str:
+    """sha1 файла чекпоинта"""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class LinearHeads(nn.Module):
+    """GroupedHeads на обычных nn.Linear - квантизуемая форма тех же весов
+    
+    Первый слой всех голов - один Linear(in, 4*256), следующие - по Linear на голову.
+    Только для инференса (dropout не нужен).
+    """
+    
+    def __init__(self, in_features: int, heads: int = 4):
+        super(LinearHeads, self).__init__()
+        hidden1, hidden2, out = HEAD_SIZES
+        self.heads = heads
+        self.first = nn.Linear(in_features, heads * hidden1)
+        self.second = nn.ModuleList(nn.Linear(hidden1, hidden2) for _ in range(heads))
+        self.third = nn.ModuleList(nn.Linear(hidden2, out) for _ in range(heads))
+    
+    @classmethod
+    def from_grouped(cls, grouped: GroupedHeads) -> 'LinearHeads':
+        heads = cls(grouped.weight1.shape[0], grouped.heads)
+        with torch.no_grad():
+            heads.first.weight.copy_(grouped.weight1.reshape(grouped.weight1.shape[0], -1).t())
+            heads.first.bias.copy_(grouped.bias1.reshape(-1))
+            for k in range(grouped.heads):
+                heads.second[k].weight.copy_(grouped.weight2[k].t())
+                heads.second[k].bias.copy_(grouped.bias2[k])
+                heads.third[k].weight.copy_(grouped.weight3[k].t())
+                heads.third[k].bias.copy_(grouped.bias3[k])
+        return heads
+    
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        h = F.relu(self.first(x)).view(x.shape[0], self.heads, -1)
+        outputs = [self.third[k](F.relu(self.second[k](h[:, k]))) for k in range(self.heads)]
+        return torch.stack(outputs, dim=1)
+
+def quantize_model(model: EnhancedNumberPredictor) -> nn.Module:
+    """Копия модели с int8 весами всех Linear (активации квантуются на лету)"""
+    model = copy.deepcopy(model).eval()
+    model.heads = LinearHeads.from_grouped(model.heads)
+    # torch.ao.quantization помечен как устаревший в пользу torchao, которого здесь нет
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        return torch.ao.quantization.quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8)
+
+def _build_quantized(config: dict) -> nn.Module:
+    """Пустая int8 модель нужной архитектуры для загрузки state_dict"""
+    return quantize_model(EnhancedNumberPredictor(input_size=config['input_size'], hidden_size=config['hidden_size']))
+
+def _load_fp32(model_path: str):
+    checkpoint = torch.load(model_path, map_location='cpu')
+    config = checkpoint['model_config']
+    model = EnhancedNumberPredictor(input_size=config['input_size'], hidden_size=config['hidden_size'])
+    model.load_state_dict(checkpoint['model_state_dict'])
+    return model.eval(), config
+
+def parity_features(config: dict, samples: int = PARITY_SAMPLES) -> torch.Tensor:
+    """Features последних окон датасета (как на инференсе) для сравнения с fp32"""
+    from model.data_loader import get_dataset_view
+    from .data_processor import DataProcessor
+    
+    processor = DataProcessor(history_size=config.get('history_size', 25))
+    numbers = np.asarray(get_dataset_view(), dtype=np.int64).ravel()
+    indices = processor.sample_indices(numbers)[-samples:]
+    features, _ = processor.prepare_samples(numbers, indices)
+    return torch.tensor(features, dtype=torch.float32)
+
+def parity_report(reference: nn.Module, quantized: nn.Module, features: torch.Tensor, top_k: int = 10) -> Dict:
+    """Согласие int8 модели с fp32 по softmax, top-1 числам и top-k группам"""
+    from .candidate_scoring import top_k_product
+    
+    with torch.no_grad():
+        expected = torch.softmax(reference(features), dim=-1)
+        actual = torch.softmax(quantized(features), dim=-1)
+    
+    diff = (expected - actual).abs()
+    overlap = []
+    for row_expected, row_actual in zip(expected.numpy(), actual.numpy()):
+        groups_expected = {group for group, _ in top_k_product(row_expected, top_k)}
+        groups_actual = {group for group, _ in top_k_product(row_actual, top_k)}
+        overlap.append(len(groups_expected & groups_actual) / max(1, len(groups_expected)))
+    
+    return {
+        'samples': len(features),
+        'max_abs_diff': float(diff.max()),
+        'mean_abs_diff': float(diff.mean()),
+        'top1_agreement': float((expected.argmax(-1) == actual.argmax(-1)).float().mean()),
+        f'top{top_k}_group_overlap': float(np.mean(overlap)),
+    }
+
+def export_quantized(model_path: str, output_path: str = None, features: torch.Tensor = None,
+                     min_top1: float = PARITY_MIN_TOP1) -> Optional[Dict]:
+    """Сборка int8 артефакта из fp32 чекпоинта с проверкой согласия
+    
+    Если top-1 согласие с fp32 ниже min_top1, артефакт не записывается (None).
+    """
+    output_path = output_path or quantized_model_path(model_path)
+    model, config = _load_fp32(model_path)
+    quantized = quantize_model(model)
+    
+    parity = parity_report(model, quantized, parity_features(config) if features is None else features)
+    if parity['top1_agreement'] < min_top1:
+        print(f"❌ int8 модель расходится с fp32 (top-1 согласие {parity['top1_agreement']:.3f} < {min_top1}), "
+              f"артефакт не записан")
+        return None
+    
+    artifact = {
+        'model_config': config,
+        'quantized_state_dict': quantized.state_dict(),
+        'source_sha1': file_sha1(model_path),
+        'parity': parity,
+    }
+    # Модель могут пересобирать несколько процессов сразу - запись атомарная
+    tmp_path = f"{output_path}.{os.getpid()}.tmp"
+    torch.save(artifact, tmp_path)
+    os.replace(tmp_path, output_path)
+    
+    print(f"✅ int8 модель сохранена: {output_path} (top-1 согласие {parity['top1_agreement']:.3f}, "
+          f"макс. расхождение softmax {parity['max_abs_diff']:.4f})")
+    return parity
+
+def load_quantized(model_path: str) -> Optional[tuple]:
+    """(int8 модель, config), если артефакт есть и собран из текущего fp32 чекпоинта"""
+    path = quantized_model_path(model_path)
+    if not os.path.exists(path) or not os.path.exists(model_path):
+        return None
+    
+    # Упакованные int8 веса - не обычные тензоры, weights_only их не пропускает
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        artifact = torch.load(path, map_location='cpu', weights_only=False)
+    if artifact.get('source_sha1') != file_sha1(model_path):
+        return None
+    
+    model = _build_quantized(artifact['model_config'])
+    model.load_state_dict(artifact['quantized_state_dict'])
+    return model.eval(), artifact['model_config']
+
+def _serialized_mb(model: nn.Module) -> float:
+    buffer = io.BytesIO()
+    torch.save(model.state_dict(), buffer)
+    return buffer.tell() / (1024 * 1024)
+
+def _current_rss_mb() -> float:
+    """Текущая резидентная память процесса (Linux /proc, иначе пиковая)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def _measure_rss(model_path: str, kind: str, queue):
+    """Память процесса до и после загрузки одной модели и предсказания"""
+    torch.set_num_threads(1)
+    before = _current_rss_mb()
+    model = load_quantized(model_path)[0] if kind == 'int8' else _load_fp32(model_path)[0]
+    with torch.no_grad():
+        model(torch.rand(64, model.feature_extractor[0].in_features))
+    queue.put((before, _current_rss_mb()))
+
+def benchmark(model_path: str = "data/simple_model.pth", repeats: int = 200) -> Dict:
+    """Задержка (batch 1, 64, 512), размер весов и память процесса: fp32 против int8"""
+    import multiprocessing as mp
+    
+    if load_quantized(model_path) is None:
+        export_quantized(model_path)
+    
+    torch.set_num_threads(1)
+    reference, config = _load_fp32(model_path)
+    quantized = load_quantized(model_path)[0]
+    features = parity_features(config)
+    
+    results = {'parity': parity_report(reference, quantized, features)}
+    context = mp.get_context('spawn')
+    for kind, model in (('fp32', reference), ('int8', quantized)):
+        latency = {}
+        for batch_size in (1, 64, 512):
+            batch = features[:batch_size]
+            with torch.no_grad():
+                for _ in range(10):
+                    model(batch)
+                timings = []
+                for _ in range(repeats):
+                    began = time.perf_counter()
+                    model(batch)
+                    timings.append((time.perf_counter() - began) * 1e6)
+            latency[f'batch{batch_size}_us'] = float(np.median(timings))
+        
+        queue = context.Queue()
+        process = context.Process(target=_measure_rss, args=(model_path, kind, queue))
+        process.start()
+        rss_before, rss_after = queue.get()
+        process.join()
+        
+        results[kind] = dict(latency, weights_mb=_serialized_mb(model),
+                             process_rss_mb=rss_after, model_rss_mb=rss_after - rss_before)
+    
+    print("🏁 Инференс fp32 против int8 (1 поток):")
+    for kind in ('fp32', 'int8'):
+        r = results[kind]
+        print(f"   {kind}: batch 1 {r['batch1_us']:6.0f} мкс, batch 64 {r['batch64_us']:6.0f} мкс, "
+              f"batch 512 {r['batch512_us']:6.0f} мкс, "
+              f"веса {r['weights_mb']:.2f} МБ, процесс {r['process_rss_mb']:.0f} МБ (+{r['model_rss_mb']:.0f} МБ на модель)")
+    parity = results['parity']
+    print(f"🎯 Согласие: top-1 {parity['top1_agreement']:.3f}, top-10 групп {parity['top10_group_overlap']:.3f}, "
+          f"макс. расхождение softmax {parity['max_abs_diff']:.4f}")
+    return results
+
+if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Dynamic int8 quantization of the inference model')
+    parser.add_argument('command', choices=('export', 'benchmark'), help='Build the int8 artifact or compare with fp32')
+    parser.add_argument('--model-path', default='data/simple_model.pth', help='fp32 checkpoint')
+    parser.add_argument('--min-top1', type=float, default=PARITY_MIN_TOP1, help='Required top-1 agreement with fp32')
+    
+    args = parser.parse_args()
+    if args.command == 'export':
+        export_quantized(args.model_path, min_top1=args.min_top1)
+    else:
+        benchmark(args.model_path)
@@ -0,0 +1,424 @@
+# [file name]: model/simple_nn/recurrent.py
+"""
+Рекуррентный предсказатель: GRU по последовательности групп с сохраняемым состоянием
+
+В отличие от EnhancedNumberPredictor, который на каждом прогнозе заново считает
+50 features по окну истории, GRU читает сырые группы по одной. Скрытое состояние
+после последней группы датасета хранится на диске (simple_recurrent.state.pt),
+поэтому новая группа - один рекуррентный шаг, а прогноз - готовый softmax.
+
+Обучение - один проход по потоку групп за эпоху (truncated BPTT по streams
+параллельным отрезкам истории), features не строятся.
+
+Бэкенд выбирается в EnhancedPredictor(model_path, backend='recurrent');
+EnsemblePredictor синхронизирует состояние в update_ensemble.
+
+Запуск:
+    python -m model.simple_nn.recurrent train --epochs 10
+    python -m model.simple_nn.recurrent benchmark
+"""
+
+import os
+import time
+import copy
+import numpy as np
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+import torch.optim as optim
+from typing import Dict, List, Optional, Tuple
+
+from .candidate_scoring import top_k_product
+
+BACKEND_FEEDFORWARD = 'feedforward'
+BACKEND_RECURRENT = 'recurrent'
+BACKENDS = (BACKEND_FEEDFORWARD, BACKEND_RECURRENT)
+
+RECURRENT_MODEL_PATH = "data/simple_recurrent.pth"
+STATE_SUFFIX = '.state.pt'
+# Сколько последних групп хранит состояние, чтобы узнать в истории запроса конец датасета
+TAIL_GROUPS = 8
+
+def parse_groups(groups) -> np.ndarray:
+    """Группы (строки, плоский поток чисел или массив [N, 4]) -> массив валидных групп [N, 4]"""
+    if isinstance(groups, np.ndarray):
+        return groups.reshape(-1, 4).astype(np.int64)
+    
+    rows = []
+    for group in groups:
+        try:
+            numbers = [int(x) for x in group.strip().split()] if isinstance(group, str) else [int(x) for x in group]
+        except (ValueError, TypeError):
+            continue
+        if len(numbers) == 4 and all(1 <= x <= 26 for x in numbers):
+            rows.append(numbers)
+    return np.array(rows, dtype=np.int64).reshape(-1, 4)
+
+def history_groups(history: List[int]) -> np.ndarray:
+    """Плоская история чисел -> целые группы [N, 4] (история заканчивается на границе группы)"""
+    usable = len(history) - len(history) % 4
+    return np.asarray(history[len(history) - usable:], dtype=np.int64).reshape(-1, 4)
+
+class RecurrentNumberPredictor(nn.Module):
+    """GRU по группам: вход шага - эмбеддинги четырех чисел группы, выход - [4, 26] следующей группы"""
+    
+    def __init__(self, embedding_size: int = 16, hidden_size: int = 128, dropout: float = 0.1):
+        super(RecurrentNumberPredictor, self).__init__()
+        
+        # Общий эмбеддинг чисел, позиция в группе задается местом в конкатенации
+        self.embedding = nn.Embedding(26, embedding_size)
+        self.gru = nn.GRU(4 * embedding_size, hidden_size, batch_first=True)
+        self.dropout = nn.Dropout(dropout)
+        self.head = nn.Linear(hidden_size, 4 * 26)
+    
+    def forward(self, groups: torch.Tensor, hidden: Optional[torch.Tensor] = None) -> Tuple[torch.Tensor, torch.Tensor]:
+        """groups [B, T, 4] (числа 1-26) -> логиты [B, T, 4, 26] и состояние после последнего шага"""
+        x = self.embedding(groups - 1).flatten(2)
+        output, hidden = self.gru(x, hidden)
+        logits = self.head(self.dropout(output))
+        return logits.view(groups.shape[0], groups.shape[1], 4, 26), hidden
+
+def _load_checkpoint(model_path: str) -> Tuple[RecurrentNumberPredictor, dict]:
+    checkpoint = torch.load(model_path, map_location='cpu')
+    config = checkpoint['model_config']
+    model = RecurrentNumberPredictor(embedding_size=config['embedding_size'], hidden_size=config['hidden_size'])
+    model.load_state_dict(checkpoint['model_state_dict'])
+    return model.eval(), config
+
+class RecurrentPredictor:
+    """Рекуррентная модель и ее состояние после последней учтенной группы датасета
+    
+    sync(dataset) досчитывает только новые группы - по одному шагу GRU на группу -
+    и сохраняет состояние на диск. Прогноз для истории, которая заканчивается
+    учтенными группами, берется из состояния без вычислений; для другой истории
+    (бэктест, произвольный запрос) GRU прогоняется по ней с нулевого состояния.
+    """
+    
+    def __init__(self, model_path: str = RECURRENT_MODEL_PATH):
+        self.model_path = model_path
+        self.state_path = os.path.splitext(model_path)[0] + STATE_SUFFIX
+        self.model = None
+        self.config = None
+        self.is_trained = False
+        self._model_sha1 = None
+        self.reset()
+    
+    def reset(self):
+        """Состояние до первой группы"""
+        self.hidden = None
+        self.probabilities = None
+        self.groups_seen = 0
+        self.tail = []
+    
+    def load_model(self) -> bool:
+        """Загрузка модели и, если оно посчитано этой моделью, сохраненного состояния"""
+        from .quantization import file_sha1
+        
+        if not os.path.exists(self.model_path):
+            print(f"❌ Файл рекуррентной модели не найден: {self.model_path}")
+            return False
+        
+        try:
+            self.model, self.config = _load_checkpoint(self.model_path)
+            self._model_sha1 = file_sha1(self.model_path)
+            self.is_trained = True
+        except Exception as e:
+            print(f"❌ Ошибка загрузки рекуррентной модели: {e}")
+            return False
+        
+        self.reset()
+        self._load_state()
+        return True
+    
+    def _load_state(self) -> bool:
+        if not os.path.exists(self.state_path):
+            return False
+        
+        try:
+            state = torch.load(self.state_path, map_location='cpu')
+        except Exception as e:
+            print(f"⚠️  Ошибка загрузки состояния GRU: {e}")
+            return False
+        # Состояние другой (переобученной) модели не годится
+        if state.get('model_sha1') != self._model_sha1:
+            return False
+        
+        self.hidden = state['hidden']
+        self.probabilities = state['probabilities'].numpy()
+        self.groups_seen = state['groups_seen']
+        self.tail = [tuple(group) for group in state['tail']]
+        return True
+    
+    def save_state(self):
+        """Сохранение состояния, чтобы после перезапуска не прогонять GRU по всей истории"""
+        if self.hidden is None:
+            return
+        
+        try:
+            state = {
+                'hidden': self.hidden,
+                'probabilities': torch.from_numpy(self.probabilities),
+                'groups_seen': self.groups_seen,
+                'tail': self.tail,
+                'model_sha1': self._model_sha1,
+            }
+            tmp_path = f"{self.state_path}.{os.getpid()}.tmp"
+            torch.save(state, tmp_path)
+            os.replace(tmp_path, self.state_path)
+        except Exception as e:
+            print(f"⚠️  Ошибка сохранения состояния GRU: {e}")
+    
+    def _run(self, groups: np.ndarray, hidden: Optional[torch.Tensor]) -> Tuple[np.ndarray, torch.Tensor]:
+        """Прогон GRU по группам: softmax после последней группы [4, 26] и новое состояние"""
+        with torch.no_grad():
+            logits, hidden = self.model(torch.from_numpy(groups).unsqueeze(0), hidden)
+            probabilities = torch.softmax(logits[0, -1], dim=-1).numpy()
+        return probabilities, hidden
+    
+    def ingest(self, groups) -> int:
+        """Учет новых групп: один шаг GRU на группу"""
+        array = parse_groups(groups)
+        if len(array) == 0:
+            return 0
+        
+        self.probabilities, self.hidden = self._run(array, self.hidden)
+        self.groups_seen += len(array)
+        self.tail = (self.tail + [tuple(int(x) for x in group) for group in array[-TAIL_GROUPS:]])[-TAIL_GROUPS:]
+        return len(array)
+    
+    def sync(self, dataset) -> int:
+        """Синхронизация состояния с датасетом, возвращает число обработанных групп
+        
+        Как FrequencyBasedPredictor.sync, но сверяются последние TAIL_GROUPS учтенных
+        групп: при несовпадении (история переписана) состояние считается заново.
+        """
+        if self.model is None:
+            return 0
+        
+        count = self.groups_seen
+        seen = parse_groups(dataset[max(0, count - len(self.tail)):count]) if count <= len(dataset) else None
+        if count == 0 or (seen is not None and [tuple(int(x) for x in group) for group in seen] == self.tail):
+            processed = self.ingest(dataset[count:])
+        else:
+            self.reset()
+            processed = self.ingest(dataset)
+        # Счет идет по записям датасета (невалидные строки пропускаются и в ingest)
+        self.groups_seen = len(dataset)
+        
+        if processed:
+            self.save_state()
+        return processed
+    
+    def probabilities_for(self, history: List[int]) -> Optional[np.ndarray]:
+        """softmax следующей группы [4, 26] для плоской истории чисел
+        
+        Сохраненное состояние (конец датасета) используется, только если история
+        заканчивается всеми TAIL_GROUPS учтенными группами: живой прогноз передает
+        окно последних групп, а не весь датасет. Более короткая история прогоняется
+        сама - иначе одна совпавшая группа давала бы прогноз по всему датасету.
+        """
+        groups = history_groups(history)
+        if self.model is None or len(groups) == 0:
+            return None
+        
+        recent = [tuple(int(x) for x in group) for group in groups[-TAIL_GROUPS:]]
+        if (self.probabilities is not None and len(recent) == TAIL_GROUPS
+                and len(self.tail) == TAIL_GROUPS and recent == self.tail):
+            return self.probabilities
+        
+        return self._run(groups, None)[0]
+    
+    def predict_group(self, history: List[int], top_k: int = 10) -> List[Tuple[Tuple[int, int, int, int], float]]:
+        """Top-k групп по произведению вероятностей позиций"""
+        probabilities = self.probabilities_for(history)
+        return top_k_product(probabilities, top_k) if probabilities is not None else []
+
+class RecurrentTrainer:
+    """Обучение RecurrentNumberPredictor на потоке групп"""
+    
+    def __init__(self, model_path: str = RECURRENT_MODEL_PATH, embedding_size: int = 16, hidden_size: int = 128,
+                 learning_rate: float = 0.003, streams: int = 32, bptt: int = 64):
+        self.model_path = model_path
+        self.embedding_size = embedding_size
+        self.hidden_size = hidden_size
+        self.learning_rate = learning_rate
+        # Поток делится на streams параллельных отрезков, градиент идет через bptt групп
+        self.streams = streams
+        self.bptt = bptt
+        self.model = None
+        self.optimizer = None
+        self.progress_callback = None
+    
+    def set_progress_callback(self, callback):
+        """Установка callback для прогресса"""
+        self.progress_callback = callback
+    
+    def _report_progress(self, message):
+        if self.progress_callback:
+            self.progress_callback(message)
+        else:
+            print(f"📢 {message}")
+    
+    def _train_epoch(self, groups: torch.Tensor) -> float:
+        """Эпоха по потоку групп [N, 4], возвращает средний loss"""
+        length = (len(groups) - 1) // self.streams
+        inputs = groups[:self.streams * length].view(self.streams, length, 4)
+        targets = groups[1:self.streams * length + 1].view(self.streams, length, 4) - 1
+        
+        self.model.train()
+        hidden = None
+        total_loss, chunks = 0.0, 0
+        for start in range(0, length, self.bptt):
+            logits, hidden = self.model(inputs[:, start:start + self.bptt], hidden)
+            # Состояние переносится между отрезками, градиент - нет
+            hidden = hidden.detach()
+            loss = F.cross_entropy(logits.reshape(-1, 26), targets[:, start:start + self.bptt].reshape(-1))
+            
+            self.optimizer.zero_grad()
+            loss.backward()
+            nn.utils.clip_grad_norm_(self.model.parameters(), 1.0)
+            self.optimizer.step()
+            
+            total_loss += loss.item()
+            chunks += 1
+        return total_loss / max(1, chunks)
+    
+    def _evaluate(self, groups: torch.Tensor, val_start: int) -> float:
+        """Loss на группах после val_start; состояние набирается по всей предыдущей истории"""
+        self.model.eval()
+        with torch.no_grad():
+            _, hidden = self.model(groups[:val_start - 1].unsqueeze(0))
+            logits, _ = self.model(groups[val_start - 1:-1].unsqueeze(0), hidden)
+            return F.cross_entropy(logits.reshape(-1, 26), (groups[val_start:] - 1).reshape(-1)).item()
+    
+    def train(self, groups: List[str], epochs: int = 10, validation_fraction: float = 0.1, patience: int = 2,
+              min_delta: float = 1e-4) -> List[Tuple[Tuple[int, int, int, int], float]]:
+        """Обучение с ранней остановкой по последним validation_fraction группам
+        
+        Лучшая модель сохраняется в model_path, состояние GRU после всего
+        датасета - рядом. Возвращает прогноз следующей группы.
+        """
+        total_start_time = time.time()
+        array = parse_groups(groups)
+        val_start = len(array) - int(len(array) * validation_fraction)
+        if val_start < self.streams * 2 + 1:
+            self._report_progress(f"❌ Недостаточно данных для рекуррентной модели: {len(array)} групп")
+            return []
+        
+        stream = torch.from_numpy(array)
+        use_validation = val_start < len(array)
+        self.model = RecurrentNumberPredictor(self.embedding_size, self.hidden_size)
+        self.optimizer = optim.AdamW(self.model.parameters(), lr=self.learning_rate, weight_decay=1e-4)
+        self._report_progress(f"🚀 Обучение GRU: {len(array)} групп, {epochs} эпох")
+        
+        best_loss, best_state, patience_counter = float('inf'), None, 0
+        for epoch in range(epochs):
+            epoch_start_time = time.time()
+            train_loss = self._train_epoch(stream[:val_start])
+            monitored_loss = self._evaluate(stream, val_start) if use_validation else train_loss
+            self._report_progress(f"📈 Эпоха {epoch+1}/{epochs}, Loss: {train_loss:.4f}, Val loss: {monitored_loss:.4f}, "
+                                  f"Время: {time.time() - epoch_start_time:.1f} сек")
+            
+            if monitored_loss < best_loss - min_delta:
+                best_loss = monitored_loss
+                best_state = copy.deepcopy(self.model.state_dict())
+                patience_counter = 0
+            else:
+                patience_counter += 1
+                if patience_counter >= patience:
+                    self._report_progress(f"🛑 Ранняя остановка на эпохе {epoch+1}")
+                    break
+        
+        self.model.load_state_dict(best_state)
+        self._save_model()
+        self._report_progress(f"🎉 GRU обучена! Лучший loss: {best_loss:.4f}, общее время: {time.time() - total_start_time:.1f} сек")
+        
+        # Состояние после всей истории - следующий прогноз без прогона по датасету
+        predictor = RecurrentPredictor(self.model_path)
+        if not predictor.load_model():
+            return []
+        predictor.sync(groups)
+        return top_k_product(predictor.probabilities, 10) if predictor.probabilities is not None else []
+    
+    def _save_model(self):
+        os.makedirs(os.path.dirname(self.model_path) or '.', exist_ok=True)
+        torch.save({
+            'model_state_dict': self.model.state_dict(),
+            'optimizer_state_dict': self.optimizer.state_dict(),
+            'model_config': {
+                'backend': BACKEND_RECURRENT,
+                'embedding_size': self.embedding_size,
+                'hidden_size': self.hidden_size,
+            },
+        }, self.model_path)
+        self._report_progress(f"✅ Модель сохранена: {self.model_path}")
+
+def benchmark(groups: List[str] = None, draws: int = 200, epochs: int = 1) -> Dict:
+    """Задержка прогноза после новой группы и время эпохи обучения: feedforward против GRU"""
+    import tempfile
+    from .model import EnhancedNumberPredictor
+    from .features import FeatureExtractor
+    from .trainer import EnhancedTrainer
+    
+    if groups is None:
+        from model.data_loader import load_dataset
+        groups = load_dataset()
+    torch.set_num_threads(1)
+    array = parse_groups(groups)
+    results = {}
+    
+    # Прогноз после каждой из последних draws групп
+    feedforward = EnhancedNumberPredictor(input_size=50, hidden_size=256).eval()
+    extractor = FeatureExtractor(history_size=25)
+    numbers = array.ravel().tolist()
+    timings = []
+    for end in range(len(array) - draws, len(array)):
+        began = time.perf_counter()
+        window = np.asarray([numbers[4 * end - 25:4 * end]], dtype=np.float32)
+        with torch.no_grad():
+            torch.softmax(feedforward(torch.from_numpy(extractor.extract_features_batch(window))), dim=-1)
+        timings.append((time.perf_counter() - began) * 1e6)
+    results['feedforward_draw_us'] = float(np.median(timings))
+    
+    recurrent = RecurrentPredictor()
+    recurrent.model = RecurrentNumberPredictor().eval()
+    recurrent.ingest(array[:-draws])
+    timings = []
+    for group in array[-draws:]:
+        began = time.perf_counter()
+        recurrent.ingest(group[None])
+        timings.append((time.perf_counter() - began) * 1e6)
+    results['recurrent_draw_us'] = float(np.median(timings))
+    
+    with tempfile.TemporaryDirectory() as work_dir:
+        # Пробное обучение не пишет в журнал обучения сервиса
+        trainers = (('feedforward', EnhancedTrainer(os.path.join(work_dir, 'ff', 'model.pth'), log_path=None)),
+                    ('recurrent', RecurrentTrainer(os.path.join(work_dir, 'gru', 'model.pth'))))
+        for kind, trainer in trainers:
+            trainer.set_progress_callback(lambda message: None)
+            began = time.time()
+            if kind == 'feedforward':
+                trainer.train(groups, epochs=epochs, return_predictions=False)
+            else:
+                trainer.train(groups, epochs=epochs)
+            results[f'{kind}_train_s'] = time.time() - began
+    
+    print(f"🏁 Feedforward против GRU ({len(array)} групп, 1 поток):")
+    print(f"   прогноз после новой группы: {results['feedforward_draw_us']:.0f} мкс против {results['recurrent_draw_us']:.0f} мкс")
+    print(f"   обучение ({epochs} эп.): {results['feedforward_train_s']:.1f} сек против {results['recurrent_train_s']:.1f} сек")
+    return results
+
+if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Stateful GRU predictor over the raw draw sequence')
+    parser.add_argument('command', choices=('train', 'benchmark'), help='Train the GRU or compare with the feedforward model')
+    parser.add_argument('--model-path', default=RECURRENT_MODEL_PATH, help='GRU checkpoint')
+    parser.add_argument('--epochs', type=int, default=10, help='Epochs')
+    
+    args = parser.parse_args()
+    from model.data_loader import load_dataset
+    if args.command == 'train':
+        RecurrentTrainer(args.model_path).train(load_dataset(), epochs=args.epochs)
+    else:
+        benchmark(load_dataset())
@@ -0,0 +1,71 @@
+# [file name]: model/simple_nn/sampler.py
+"""
+Перемешанные минибатчи без копии всего обучающего набора
+"""
+
+import numpy as np
+import torch
+from typing import Iterator, Optional, Tuple, Union
+
+Source = Union[torch.Tensor, np.ndarray]
+
+class MinibatchSampler:
+    """Минибатчи в случайном порядке: каждую эпоху перемешиваются только индексы
+    
+    Строки батча собираются по индексу из исходных массивов (тензоры, массивы
+    в памяти или np.memmap кэша features), поэтому перемешанная копия всего
+    набора не создается и в памяти одновременно находится только один батч.
+    Для numpy-источников индексы батча сортируются - чтение из memmap идет
+    по возрастанию смещений. Батчи меньше min_batch пропускаются.
+    """
+    
+    def __init__(self, features: Source, targets: Source, batch_size: int = 64, min_batch: int = 2,
+                 generator: Optional[torch.Generator] = None):
+        if len(features) != len(targets):
+            raise ValueError(f"Разная длина features и targets: {len(features)} != {len(targets)}")
+        
+        self.features = features
+        self.targets = targets
+        self.batch_size = batch_size
+        self.min_batch = min_batch
+        # Свой генератор - одинаковый порядок батчей во всех процессах data-parallel обучения
+        self.generator = generator
+    
+    def __len__(self) -> int:
+        """Количество батчей за эпоху"""
+        full, rest = divmod(len(self.features), self.batch_size)
+        return full + (1 if rest >= self.min_batch else 0)
+    
+    def __iter__(self) -> Iterator[Tuple[torch.Tensor, torch.Tensor]]:
+        for batch_features, batch_targets, _ in self.iter_shards():
+            yield batch_features, batch_targets
+    
+    def iter_shards(self, rank: int = 0, world_size: int = 1) -> Iterator[Tuple[torch.Tensor, torch.Tensor, int]]:
+        """Доля процесса rank в каждом батче: (features, targets, размер всего батча)
+        
+        Строки батча делятся между world_size процессами через одну; при
+        min_batch >= world_size доля каждого процесса не пуста.
+        """
+        order = torch.randperm(len(self.features), generator=self.generator)
+        
+        for start in range(0, len(order), self.batch_size):
+            rows = order[start:start + self.batch_size]
+            if len(rows) < self.min_batch:
+                continue
+            batch_features, batch_targets = self.gather(rows[rank::world_size].numpy())
+            yield batch_features, batch_targets, len(rows)
+    
+    def gather(self, rows) -> Tuple[torch.Tensor, torch.Tensor]:
+        """Строки features и targets по индексам"""
+        rows = np.asarray(rows, dtype=np.int64)
+        if not (isinstance(self.features, torch.Tensor) and isinstance(self.targets, torch.Tensor)):
+            rows = np.sort(rows)
+        return self._take(self.features, rows), self._take(self.targets, rows)
+    
+    @staticmethod
+    def _take(source: Source, rows: np.ndarray) -> torch.Tensor:
+        if isinstance(source, torch.Tensor):
+            return source.index_select(0, torch.from_numpy(rows))
+        
+        # Выборка по индексу из memmap - уже копия в памяти, ее и отдаем в torch
+        return torch.from_numpy(np.ascontiguousarray(source[rows]))
@@ -7,20 +7,224 @@ import torch
 import torch.nn as nn
 import torch.optim as optim
 import numpy as np
-from typing import List, Tuple
+from typing import List, Tuple, Optional
 import os
 import time
 import gc
-from .model import EnhancedNumberPredictor
-from .data_processor import DataProcessor
+import copy
+from .model import EnhancedNumberPredictor, is_legacy_state_dict
+from .data_processor import DataProcessor, WINDOWING_NUMBER
+from .sampler import MinibatchSampler, Source
+
+# Режимы шага обучения
+STEP_LEGACY = 'legacy'  # 4 отдельных CrossEntropy + явный L2 по всем параметрам
+STEP_FUSED = 'fused'    # один CrossEntropy по [B*4, 26], регуляризация только weight_decay AdamW
+STEP_MODES = (STEP_LEGACY, STEP_FUSED)
+
+# Компиляция forward для обучения
+COMPILE_EAGER = 'eager'
+COMPILE_TORCH = 'compile'  # torch.compile (нужен C++ компилятор, первая компиляция долгая)
+COMPILE_SCRIPT = 'script'  # TorchScript
+COMPILE_AUTO = 'auto'      # torch.compile -> TorchScript -> eager, что первым заработает
+COMPILE_MODES = (COMPILE_EAGER, COMPILE_TORCH, COMPILE_SCRIPT, COMPILE_AUTO)
+
+# Журнал обучения сервиса (читается вместе с сообщениями прогресса)
+TRAINING_LOG_PATH = "/opt/project/training_log.txt"
+
+# Гиперпараметры по умолчанию (подбираются model/hyperparameter_search.py)
+DEFAULT_HYPERPARAMS = {
+    'hidden_size': 256,
+    'learning_rate': 0.001,
+    'batch_size': 64,
+    'history_size': 25,
+    'dropout': 0.3,
+    'head_dropout': 0.2,
+}
+
+class TrainingBudget:
+    """Бюджет времени обучения до дедлайна (метка time.time())
+    
+    Время эпохи оценивается по первым батчам и уточняется по факту. reserve -
+    запас до дедлайна на сохранение чекпоинта и генерацию прогнозов.
+    """
+    
+    PROBE_BATCHES = 10
+    
+    def __init__(self, deadline: Optional[float] = None, reserve: float = 30.0):
+        self.deadline = deadline
+        self.reserve = reserve
+        self.epoch_estimate = None
+        self.exhausted = False
+    
+    def remaining(self) -> float:
+        """Секунд до дедлайна за вычетом запаса"""
+        if self.deadline is None:
+            return float('inf')
+        return self.deadline - self.reserve - time.time()
+    
+    def batch_fits(self, batch_time: float) -> bool:
+        """Успеем ли еще один батч"""
+        return self.remaining() > batch_time
+    
+    def epoch_fits(self) -> bool:
+        """Успеем ли еще одну эпоху целиком (по текущей оценке)"""
+        if self.exhausted:
+            return False
+        return self.epoch_estimate is None or self.remaining() > self.epoch_estimate
+    
+    def fitting_epochs(self) -> int:
+        """Сколько полных эпох помещается в оставшееся время (по текущей оценке)"""
+        return max(0, int(self.remaining() / self.epoch_estimate))
 
 class EnhancedTrainer:
-    def __init__(self, model_path: str = "data/simple_model.pth"):
+    def __init__(self, model_path: str = "data/simple_model.pth", windowing: str = WINDOWING_NUMBER,
+                 step_mode: str = STEP_FUSED, compile_mode: str = COMPILE_EAGER, hyperparams: dict = None,
+                 log_path: Optional[str] = TRAINING_LOG_PATH):
+        """hyperparams - переопределение DEFAULT_HYPERPARAMS; без них полное обучение
+        берет гиперпараметры из текущего чекпоинта (сохраненные при продвижении).
+        log_path - файл журнала обучения (None - сообщения в файл не пишутся)."""
+        unknown = set(hyperparams or {}) - set(DEFAULT_HYPERPARAMS)
+        if unknown:
+            raise ValueError(f"Неизвестные гиперпараметры: {', '.join(sorted(unknown))}")
+        if step_mode not in STEP_MODES:
+            raise ValueError(f"Неизвестный режим шага: {step_mode} (доступны: {', '.join(STEP_MODES)})")
+        if compile_mode not in COMPILE_MODES:
+            raise ValueError(f"Неизвестный режим компиляции: {compile_mode} (доступны: {', '.join(COMPILE_MODES)})")
+        
         self.model_path = model_path
+        self.step_mode = step_mode
+        self.compile_mode = compile_mode
+        # Скомпилированный forward для обучения; параметры общие с self.model
+        self._training_forward = None
+        self._training_forward_model = None
+        # Режим окон для полного обучения; режим текущей модели пишется в чекпоинт
+        self.windowing = windowing
+        self.model_windowing = windowing
+        # Гиперпараметры для полного обучения и гиперпараметры текущей модели
+        self.hyperparams = dict(hyperparams) if hyperparams else None
+        self.model_hyperparams = dict(DEFAULT_HYPERPARAMS)
+        # Кэш features рядом с данными (data/feature_cache)
+        self.feature_cache_dir = os.path.join(os.path.dirname(model_path), 'feature_cache')
         self.device = torch.device('cpu')
         self.model = None
+        self.optimizer = None
+        self.scheduler = None
         self.criterion = nn.CrossEntropyLoss()
         self.progress_callback = None
+        self.log_path = log_path
+        # Data-parallel обучение: процесс rank из world_size, пишет файлы только rank 0
+        self.rank = 0
+        self.world_size = 1
+        self.local_rank = 0
+        self._shuffle_generator = None
+    
+    def process_options(self) -> dict:
+        """Параметры конструктора для копии тренера в рабочем процессе"""
+        return {
+            'model_path': self.model_path,
+            'windowing': self.windowing,
+            'step_mode': self.step_mode,
+            'compile_mode': self.compile_mode,
+            'hyperparams': self.resolve_hyperparams(),
+            'log_path': self.log_path,
+        }
+    
+    def resolve_hyperparams(self) -> dict:
+        """Гиперпараметры полного обучения: заданные явно, из чекпоинта или по умолчанию"""
+        params = dict(DEFAULT_HYPERPARAMS)
+        if self.hyperparams:
+            params.update(self.hyperparams)
+        elif os.path.exists(self.model_path):
+            try:
+                config = torch.load(self.model_path, map_location='cpu')['model_config']
+                params.update(config.get('hyperparams', {}))
+            except Exception as e:
+                self._report_progress(f"⚠️ Гиперпараметры чекпоинта не прочитаны, используем по умолчанию: {e}")
+        return params
+    
+    def _build_model(self, input_size: int, params: dict) -> EnhancedNumberPredictor:
+        """Модель и оптимизатор по гиперпараметрам"""
+        self.model = EnhancedNumberPredictor(input_size=input_size, hidden_size=params['hidden_size'],
+                                             dropout=params['dropout'], head_dropout=params['head_dropout'])
+        self.model.to(self.device)
+        self.optimizer = optim.AdamW(self.model.parameters(), lr=params['learning_rate'], weight_decay=1e-4)
+        self.model_hyperparams = dict(params)
+        return self.model
+    
+    def join_process_group(self):
+        """Работа внутри инициализированной группы torch.distributed
+        
+        Все процессы получают seed от rank 0: одинаковый порядок батчей и одинаковая
+        выборка данных, а dropout у каждого процесса свой.
+        """
+        import torch.distributed as dist
+        
+        self.rank = dist.get_rank()
+        self.world_size = dist.get_world_size()
+        self.local_rank = int(os.environ.get('LOCAL_RANK', self.rank))
+        
+        seed = torch.tensor([int(torch.randint(0, 2 ** 31 - 1, (1,)))], dtype=torch.long)
+        dist.broadcast(seed, src=0)
+        seed = int(seed)
+        np.random.seed(seed)
+        torch.manual_seed(seed + self.rank)
+        self._shuffle_generator = torch.Generator().manual_seed(seed)
+    
+    @property
+    def is_writer(self) -> bool:
+        """Процесс, который пишет чекпоинт и лог (единственный при data-parallel обучении)"""
+        return self.rank == 0
+    
+    def _all_reduce_sum(self, *values: float) -> List[float]:
+        """Сумма значений по всем процессам"""
+        if self.world_size == 1:
+            return list(values)
+        
+        import torch.distributed as dist
+        
+        buffer = torch.tensor(values, dtype=torch.float64)
+        dist.all_reduce(buffer)
+        return buffer.tolist()
+    
+    def _barrier(self):
+        """Ожидание всех процессов"""
+        if self.world_size > 1:
+            import torch.distributed as dist
+            dist.barrier()
+    
+    def _any_rank(self, flag: bool) -> bool:
+        """Решение, общее для всех процессов: True, если флаг поднят хотя бы у одного"""
+        return self._all_reduce_sum(float(flag))[0] > 0
+    
+    def _broadcast_parameters(self):
+        """Одинаковые начальные веса во всех процессах (веса rank 0)"""
+        if self.world_size == 1:
+            return
+        
+        import torch.distributed as dist
+        
+        with torch.no_grad():
+            for tensor in self.model.state_dict().values():
+                dist.broadcast(tensor, src=0)
+    
+    def _all_reduce_gradients(self, loss_value: float) -> float:
+        """Сумма градиентов (и loss) по процессам одним all-reduce
+        
+        Loss каждого процесса взвешен долей батча, поэтому сумма градиентов равна
+        градиенту всего батча, как при обучении в одном процессе.
+        """
+        import torch.distributed as dist
+        
+        params = list(self.model.parameters())
+        flat = torch.cat([(p.grad if p.grad is not None else torch.zeros_like(p)).reshape(-1) for p in params]
+                         + [torch.tensor([loss_value], dtype=params[0].dtype)])
+        dist.all_reduce(flat)
+        
+        offset = 0
+        for p in params:
+            p.grad = flat[offset:offset + p.numel()].view_as(p)
+            offset += p.numel()
+        return flat[-1].item()
     
     def set_progress_callback(self, callback):
         """Установка callback для прогресса"""
@@ -28,16 +232,20 @@ class EnhancedTrainer:
     
     def _report_progress(self, message):
         """Отправка сообщения о прогрессе с записью в файл"""
+        if not self.is_writer:
+            return
+        
         import datetime
         timestamp = datetime.datetime.now().strftime('%H:%M:%S')
         formatted_message = f"{timestamp} - {message}"
         
         # Записываем в файл
-        try:
-            with open("/opt/project/training_log.txt", "a", encoding="utf-8") as f:
-                f.write(formatted_message + "\n")
-        except Exception as e:
-            print(f"❌ Ошибка записи в лог: {e}")
+        if self.log_path:
+            try:
+                with open(self.log_path, "a", encoding="utf-8") as f:
+                    f.write(formatted_message + "\n")
+            except Exception as e:
+                print(f"❌ Ошибка записи в лог: {e}")
         
         # Старая логика
         if self.progress_callback:
@@ -45,9 +253,48 @@ class EnhancedTrainer:
         else:
             print(f"📢 {message}")
     
-    def train(self, groups: List[str], epochs: int = 20, batch_size: int = 64) -> List[Tuple[Tuple[int, int, int, int], float]]:
-        """Обучение модели с улучшенными параметрами и детальным логированием"""
+    def train(self, groups: List[str], epochs: int = 20, batch_size: Optional[int] = None, validation_fraction: float = 0.1,
+              patience: int = 1, min_delta: float = 1e-4, deadline: Optional[float] = None,
+              deadline_reserve: float = 30.0, memory_map: bool = True, workers: int = 1,
+              return_predictions: bool = True) -> List[Tuple[Tuple[int, int, int, int], float]]:
+        """Обучение модели с улучшенными параметрами и детальным логированием
+        
+        Последние validation_fraction примеров (по времени) откладываются для валидации:
+        ранняя остановка и выбор лучшего чекпоинта идут по validation loss. Обучение
+        останавливается после patience эпох без улучшения больше чем на min_delta.
+        
+        deadline (метка time.time()) ограничивает обучение по времени: эпох выполняется
+        столько, сколько успевает до deadline - deadline_reserve.
+        
+        memory_map=True - features читаются батчами из memmap кэша features, а не
+        держатся в памяти целиком.
+        
+        workers > 1 - data-parallel обучение в workers локальных процессах (gloo),
+        batch_size остается размером общего батча.
+        
+        Архитектура, learning rate, batch_size (если не задан) и окно истории
+        берутся из resolve_hyperparams() и сохраняются в чекпоинт.
+        return_predictions=False - без генерации прогнозов после обучения.
+        
+        Существующий чекпоинт заменяется только моделью, прошедшей хотя бы одну полную
+        эпоху или лучшей него по validation loss: эпоха, прерванная дедлайном, не
+        затирает рабочую модель.
+        """
+        if TrainingBudget(deadline, deadline_reserve).remaining() <= 0:
+            self._report_progress("⏰ До дедлайна не остается времени на обучение, чекпоинт не изменен")
+            return []
+        
+        if workers > 1 and self.world_size == 1:
+            from .distributed import spawn_training
+            return spawn_training(self, groups, workers, epochs=epochs, batch_size=batch_size,
+                                  validation_fraction=validation_fraction, patience=patience,
+                                  min_delta=min_delta, deadline=deadline, deadline_reserve=deadline_reserve,
+                                  memory_map=memory_map, return_predictions=return_predictions)
+        
         total_start_time = time.time()
+        budget = TrainingBudget(deadline, deadline_reserve)
+        params = self.resolve_hyperparams()
+        batch_size = batch_size or params['batch_size']
         
         self._report_progress(f"🚀 СТАРТ обучения: {len(groups)} групп, {epochs} эпох, batch_size={batch_size}")
         
@@ -55,8 +302,14 @@ class EnhancedTrainer:
         stage1_start = time.time()
         self._report_progress("📊 Этап 1: Подготовка данных...")
         
-        processor = DataProcessor(history_size=25)
-        features, targets = processor.prepare_training_data(groups)
+        processor = DataProcessor(history_size=params['history_size'], cache_dir=self.feature_cache_dir,
+                                  windowing=self.windowing)
+        # Кэш features на хосте пишет один процесс, остальные читают готовый
+        if self.local_rank != 0:
+            self._barrier()
+        features, targets = processor.prepare_training_data(groups, memory_map=memory_map)
+        if self.local_rank == 0:
+            self._barrier()
         
         stage1_time = time.time() - stage1_start
         self._report_progress(f"✅ Этап 1 завершен: {stage1_time:.1f} сек")
@@ -77,8 +330,9 @@ class EnhancedTrainer:
         self._report_progress("🔧 Этап 2: Создание модели...")
         
         # Всегда создаем новую модель для чистого обучения
-        self.model = EnhancedNumberPredictor(input_size=features.shape[1], hidden_size=256)
-        self.model.to(self.device)
+        self._build_model(features.shape[1], params)
+        self._broadcast_parameters()
+        self.model_windowing = self.windowing
         
         # Оптимизация памяти для 4 ГБ RAM
         torch.backends.cudnn.deterministic = True
@@ -91,82 +345,75 @@ class EnhancedTrainer:
         stage3_start = time.time()
         self._report_progress("⚙️ Этап 3: Настройка оптимизатора...")
         
-        # Улучшенный optimizer с learning rate scheduling
-        self.optimizer = optim.AdamW(self.model.parameters(), lr=0.001, weight_decay=1e-4)
+        # Улучшенный optimizer (создан вместе с моделью) с learning rate scheduling
         self.scheduler = optim.lr_scheduler.ReduceLROnPlateau(self.optimizer, mode='min', factor=0.5, patience=3)
         
         stage3_time = time.time() - stage3_start
         self._report_progress(f"✅ Этап 3 завершен: {stage3_time:.1f} сек")
         
-        # Используем CPU тензоры
-        features_tensor = torch.tensor(features, dtype=torch.float32)
-        targets_tensor = torch.tensor(targets, dtype=torch.long) - 1
+        # Features остаются в исходном массиве (memmap кэша или массив в памяти) - батчи
+        # собираются по индексу. Цели компактные, их переводим в тензор целиком
+        targets_tensor = torch.tensor(np.asarray(targets), dtype=torch.long) - 1
+        
+        # Хронологическая валидация: последние примеры не участвуют в обучении
+        train_end, val_start = processor.validation_split(len(features), int(len(features) * validation_fraction))
+        train_features, train_targets = features[:train_end], targets_tensor[:train_end]
+        val_features = torch.tensor(features[val_start:], dtype=torch.float32)
+        val_targets = targets_tensor[val_start:]
+        use_validation = len(val_features) > 0
+        if use_validation:
+            self._report_progress(f"✅ Обучение: {len(train_features)} примеров, валидация: {len(val_features)} последних")
+        else:
+            # Без валидации - прежний критерий по train loss
+            patience = max(patience, 5)
         
         # Этап 4: Обучение модели
         stage4_start = time.time()
         self._report_progress("🧠 Этап 4: Обучение модели...")
         
+        # Loss модели на диске: частичная эпоха сохраняется, только если лучше него
+        if use_validation:
+            checkpoint_loss = self._checkpoint_loss(val_features, val_targets)
+        else:
+            checkpoint_loss = None if os.path.exists(self.model_path) else float('inf')
+        
         self.model.train()
         best_loss = float('inf')
+        best_state = None
         patience_counter = 0
-        patience = 5
         
         for epoch in range(epochs):
-            epoch_start_time = time.time()
+            if self._any_rank(not budget.epoch_fits()):
+                self._report_progress(f"⏰ До дедлайна не успеть эпоху {epoch+1}, обучение остановлено")
+                break
             
-            # Перемешиваем данные каждый эпох
-            indices = torch.randperm(len(features))
-            features_shuffled = features_tensor[indices]
-            targets_shuffled = targets_tensor[indices]
-            
-            total_loss = 0
-            num_batches = 0
-            
-            for i in range(0, len(features), batch_size):
-                batch_start = i
-                batch_end = min(i + batch_size, len(features))
-                
-                if batch_end - batch_start < 2:
-                    continue
-                    
-                batch_features = features_shuffled[batch_start:batch_end]
-                batch_targets = targets_shuffled[batch_start:batch_end]
-                
-                self.optimizer.zero_grad()
-                outputs = self.model(batch_features)
-                
-                loss = 0
-                for j in range(4):
-                    loss += self.criterion(outputs[:, j, :], batch_targets[:, j])
-                loss = loss / 4
-                
-                # L2 регуляризация
-                l2_lambda = 0.001
-                l2_norm = sum(p.pow(2.0).sum() for p in self.model.parameters())
-                loss = loss + l2_lambda * l2_norm
-                
-                loss.backward()
-                torch.nn.utils.clip_grad_norm_(self.model.parameters(), max_norm=1.0)
-                self.optimizer.step()
-                
-                total_loss += loss.item()
-                num_batches += 1
+            epoch_start_time = time.time()
             
-            epoch_time = time.time() - epoch_start_time
+            total_loss, num_batches = self._train_epoch(train_features, train_targets, batch_size, budget)
             
             if num_batches > 0:
                 avg_loss = total_loss / num_batches
+                monitored_loss = self._evaluate(val_features, val_targets) if use_validation else avg_loss
                 current_lr = self.optimizer.param_groups[0]['lr']
+                epoch_time = time.time() - epoch_start_time
+                
+                if not budget.exhausted:
+                    budget.epoch_estimate = epoch_time
                 
-                self._report_progress(f"📈 Эпоха {epoch+1}/{epochs}, Loss: {avg_loss:.4f}, LR: {current_lr:.6f}, Время: {epoch_time:.1f} сек")
+                val_info = f", Val loss: {monitored_loss:.4f}" if use_validation else ""
+                self._report_progress(f"📈 Эпоха {epoch+1}/{epochs}, Loss: {avg_loss:.4f}{val_info}, LR: {current_lr:.6f}, Время: {epoch_time:.1f} сек")
                 
-                self.scheduler.step(avg_loss)
+                self.scheduler.step(monitored_loss)
                 
-                if avg_loss < best_loss:
-                    best_loss = avg_loss
+                improved = monitored_loss < best_loss - min_delta
+                if improved and budget.exhausted and (checkpoint_loss is None or monitored_loss >= checkpoint_loss):
+                    self._report_progress(f"⚠️  Эпоха {epoch+1} прервана дедлайном и не лучше чекпоинта, модель не сохранена")
+                elif improved:
+                    best_loss = checkpoint_loss = monitored_loss
+                    best_state = copy.deepcopy(self.model.state_dict())
                     self._save_model()
                     patience_counter = 0
-                    self._report_progress(f"💾 Сохранена лучшая модель (loss: {avg_loss:.4f})")
+                    self._report_progress(f"💾 Сохранена лучшая модель (loss: {monitored_loss:.4f})")
                 else:
                     patience_counter += 1
                     if patience_counter >= patience:
@@ -175,6 +422,13 @@ class EnhancedTrainer:
             else:
                 self._report_progress(f"⚠️  Эпоха {epoch+1}/{epochs}: нет валидных батчей")
         
+        # В памяти остается лучшая модель, а не последняя эпоха
+        if best_state is not None:
+            self.model.load_state_dict(best_state)
+        else:
+            self._ensure_checkpoint()
+        self._export_frozen()
+        
         stage4_time = time.time() - stage4_start
         self._report_progress(f"✅ Этап 4 завершен: {stage4_time:.1f} сек")
         self._report_progress(f"✅ Обучение завершено! Лучший loss: {best_loss:.4f}")
@@ -183,7 +437,10 @@ class EnhancedTrainer:
         stage5_start = time.time()
         self._report_progress("📊 Этап 5: Анализ производительности...")
         
-        self._analyze_model_performance(features_tensor, targets_tensor)
+        if use_validation:
+            self._analyze_model_performance(val_features, val_targets)
+        else:
+            self._analyze_model_performance(torch.tensor(features[:1000], dtype=torch.float32), targets_tensor[:1000])
         
         stage5_time = time.time() - stage5_start
         self._report_progress(f"✅ Этап 5 завершен: {stage5_time:.1f} сек")
@@ -193,7 +450,7 @@ class EnhancedTrainer:
         self._report_progress("🧹 Этап 6: Очистка памяти...")
         
         # Очистка памяти
-        del features_tensor, targets_tensor, features_shuffled, targets_shuffled
+        del features, targets, targets_tensor, train_features, train_targets, val_features, val_targets
         gc.collect()
         if torch.cuda.is_available():
             torch.cuda.empty_cache()
@@ -204,9 +461,315 @@ class EnhancedTrainer:
         total_time = time.time() - total_start_time
         self._report_progress(f"🎉 ВСЕ ЭТАПЫ ЗАВЕРШЕНЫ! Общее время: {total_time:.1f} сек")
         
+        if not return_predictions:
+            return []
+        
         # Генерация прогнозов после обучения
         self._report_progress("🔮 Генерация прогнозов после обучения...")
         
+        return self._generate_predictions(groups)
+    
+    def fine_tune(self, groups: List[str], new_groups: int = 1, epochs: int = 3, batch_size: int = 64,
+                  replay_size: int = 2048, validation_size: int = 512, patience: int = 1,
+                  min_delta: float = 1e-4, deadline: Optional[float] = None,
+                  deadline_reserve: float = 30.0) -> List[Tuple[Tuple[int, int, int, int], float]]:
+        """Инкрементальное дообучение: теплый старт из чекпоинта на новых окнах и выборке истории
+        
+        Валидация - validation_size последних окон до новых групп (в replay не попадают).
+        Сохраняется эпоха с лучшим validation loss, только если он лучше, чем у
+        исходного чекпоинта; дообучение останавливается, как только loss перестает
+        улучшаться или не успевает до deadline. В памяти остается сохраненная модель.
+        """
+        total_start_time = time.time()
+        budget = TrainingBudget(deadline, deadline_reserve)
+        
+        self._report_progress(f"🚀 СТАРТ дообучения: {new_groups} новых групп, {epochs} эпох, replay={replay_size}")
+        
+        if not self._load_checkpoint():
+            self._report_progress("⚠️ Чекпоинт недоступен, выполняем полное обучение")
+            return self.train(groups, epochs=epochs, batch_size=batch_size,
+                              deadline=deadline, deadline_reserve=deadline_reserve)
+        
+        # Новые окна (цель содержит хотя бы одно новое число) + случайная выборка старой истории
+        # Окна нарезаются так же, как при обучении загруженной модели
+        processor = DataProcessor(history_size=self.model_hyperparams['history_size'], windowing=self.model_windowing)
+        numbers = processor.parse_numbers(groups)
+        all_indices = processor.sample_indices(numbers)
+        
+        is_new = all_indices + processor.history_size + 4 > len(numbers) - new_groups * 4
+        new_indices, old_indices = all_indices[is_new], all_indices[~is_new]
+        new_count = len(new_indices)
+        if new_count == 0:
+            self._report_progress("❌ Нет новых примеров для дообучения")
+            return []
+        
+        train_end, val_start = processor.validation_split(len(old_indices), validation_size)
+        val_indices = old_indices[val_start:]
+        replay_pool = old_indices[:train_end]
+        replay_indices = np.random.choice(replay_pool, size=min(replay_size, len(replay_pool)), replace=False)
+        indices = np.concatenate([replay_indices, new_indices])
+        
+        features, targets = processor.prepare_samples(numbers, np.concatenate([indices, val_indices]))
+        features_tensor = torch.tensor(features[:len(indices)], dtype=torch.float32)
+        targets_tensor = torch.tensor(targets[:len(indices)], dtype=torch.long) - 1
+        val_features = torch.tensor(features[len(indices):], dtype=torch.float32)
+        val_targets = torch.tensor(targets[len(indices):], dtype=torch.long) - 1
+        use_validation = len(val_features) > 0
+        
+        self._report_progress(f"✅ Подготовлено {len(indices)} примеров ({new_count} новых, {len(replay_indices)} из истории), "
+                              f"валидация: {len(val_features)}")
+        # Отсчет от исходного чекпоинта: эпоха хуже него не сохраняется
+        best_loss = float('inf')
+        if use_validation:
+            best_loss = self._evaluate(val_features, val_targets)
+            self._report_progress(f"📊 Val loss до дообучения: {best_loss:.4f}")
+        initial_loss = best_loss
+        best_state = copy.deepcopy(self.model.state_dict())
+        
+        self.model.train()
+        patience_counter = 0
+        
+        for epoch in range(epochs):
+            if not budget.epoch_fits():
+                self._report_progress(f"⏰ До дедлайна не успеть эпоху {epoch+1}, дообучение остановлено")
+                break
+            
+            epoch_start_time = time.time()
+            
+            total_loss, num_batches = self._train_epoch(features_tensor, targets_tensor, batch_size, budget)
+            if num_batches == 0:
+                self._report_progress(f"⚠️  Эпоха {epoch+1}/{epochs}: нет валидных батчей")
+                continue
+            
+            avg_loss = total_loss / num_batches
+            monitored_loss = self._evaluate(val_features, val_targets) if use_validation else avg_loss
+            epoch_time = time.time() - epoch_start_time
+            if not budget.exhausted:
+                budget.epoch_estimate = epoch_time
+            val_info = f", Val loss: {monitored_loss:.4f}" if use_validation else ""
+            self._report_progress(f"📈 Дообучение {epoch+1}/{epochs}, Loss: {avg_loss:.4f}{val_info}, Время: {epoch_time:.1f} сек")
+            
+            if monitored_loss < best_loss - min_delta:
+                best_loss = monitored_loss
+                best_state = copy.deepcopy(self.model.state_dict())
+                self._save_model()
+                patience_counter = 0
+            else:
+                patience_counter += 1
+                if patience_counter >= patience:
+                    self._report_progress(f"🛑 Ранняя остановка дообучения на эпохе {epoch+1}")
+                    break
+        
+        # В памяти остается сохраненная модель, а не последняя (худшая) эпоха
+        self.model.load_state_dict(best_state)
+        if best_loss == initial_loss:
+            self._report_progress("⚠️ Дообучение не улучшило val loss, чекпоинт не изменен")
+        self._export_frozen()
+        
+        del features_tensor, targets_tensor, val_features, val_targets
+        gc.collect()
+        
+        total_time = time.time() - total_start_time
+        self._report_progress(f"🎉 Дообучение завершено! Loss: {best_loss:.4f}, общее время: {total_time:.1f} сек")
+        
+        return self._generate_predictions(groups)
+    
+    def _ensure_checkpoint(self):
+        """Обучение не сохранило ни одной эпохи (дедлайн): на диске должна остаться рабочая модель"""
+        if os.path.exists(self.model_path):
+            self._report_progress("⚠️ Новая модель не сохранена, на диске и в памяти остается прежний чекпоинт")
+            self._load_checkpoint()
+        else:
+            self._report_progress("⚠️ Чекпоинта нет, сохраняем частично обученную модель")
+            self._save_model()
+    
+    def _checkpoint_loss(self, val_features: torch.Tensor, val_targets: torch.Tensor) -> Optional[float]:
+        """Validation loss чекпоинта на диске
+        
+        inf - чекпоинта нет или он не читается (заменяется любой моделью),
+        None - чекпоинт обучен на других features и сравнивать не с чем.
+        """
+        if not os.path.exists(self.model_path):
+            return float('inf')
+        
+        try:
+            checkpoint = torch.load(self.model_path, map_location='cpu')
+            config = checkpoint['model_config']
+            if (config['input_size'] != val_features.shape[1]
+                    or config.get('windowing', WINDOWING_NUMBER) != self.windowing
+                    or config.get('history_size', DEFAULT_HYPERPARAMS['history_size']) != self.model_hyperparams['history_size']):
+                return None
+            
+            params = dict(DEFAULT_HYPERPARAMS)
+            params.update(config.get('hyperparams', {}))
+            saved = EnhancedNumberPredictor(input_size=config['input_size'], hidden_size=config['hidden_size'],
+                                            dropout=params['dropout'], head_dropout=params['head_dropout'])
+            saved.load_state_dict(checkpoint['model_state_dict'])
+            saved.to(self.device)
+        except Exception as e:
+            self._report_progress(f"⚠️ Чекпоинт не читается, будет заменен: {e}")
+            return float('inf')
+        
+        model = self.model
+        self.model = saved
+        try:
+            return self._evaluate(val_features, val_targets)
+        finally:
+            self.model = model
+    
+    def _export_frozen(self):
+        """Замороженный граф для инференса из сохраненного чекпоинта (см. frozen.py)"""
+        if not self.is_writer or not os.path.exists(self.model_path):
+            return
+        
+        try:
+            from .frozen import export_frozen, load_frozen
+            # Чекпоинт не менялся (дообучение без улучшения) - граф уже актуален
+            if load_frozen(self.model_path) is None:
+                export_frozen(self.model_path)
+        except Exception as e:
+            self._report_progress(f"⚠️ Замороженный граф не собран, предсказатель загрузит fp32 чекпоинт: {e}")
+    
+    def _evaluate(self, features_tensor: torch.Tensor, targets_tensor: torch.Tensor, chunk_size: int = 4096) -> float:
+        """Loss на отложенной выборке без градиентов (без L2 слагаемого)
+        
+        Выборка проходит частями по chunk_size, чтобы память под активации не росла
+        вместе с длиной истории. При data-parallel обучении каждый процесс считает
+        свою долю выборки, результат общий.
+        """
+        if self.world_size > 1:
+            features_tensor = features_tensor[self.rank::self.world_size]
+            targets_tensor = targets_tensor[self.rank::self.world_size]
+        
+        self.model.eval()
+        total = 0.0
+        with torch.no_grad():
+            for start in range(0, len(features_tensor), chunk_size):
+                outputs = self.model(features_tensor[start:start + chunk_size])
+                chunk_targets = targets_tensor[start:start + chunk_size].reshape(-1)
+                total += self.criterion(outputs.reshape(-1, 26), chunk_targets).item() * len(chunk_targets)
+        self.model.train()
+        total, count = self._all_reduce_sum(total, targets_tensor.numel())
+        return total / max(1, count)
+    
+    def _step_loss(self, batch_features: torch.Tensor, batch_targets: torch.Tensor, weight: float = 1.0) -> torch.Tensor:
+        """Loss одного шага обучения в выбранном режиме
+        
+        weight - доля общего батча у этого процесса: при data-parallel обучении
+        сумма loss по процессам равна loss всего батча.
+        """
+        if self.step_mode == STEP_LEGACY:
+            outputs = self.model(batch_features)
+            
+            loss = 0
+            for j in range(4):
+                loss += self.criterion(outputs[:, j, :], batch_targets[:, j])
+            loss = loss / 4
+            
+            # L2 регуляризация
+            l2_lambda = 0.001
+            l2_norm = sum(p.pow(2.0).sum() for p in self.model.parameters())
+            return loss * weight + l2_lambda * l2_norm / self.world_size
+        
+        # Среднее по [B*4] совпадает со средним из 4 loss по позициям
+        outputs = self._forward_for_training(batch_features)
+        return self.criterion(outputs.reshape(-1, 26), batch_targets.reshape(-1)) * weight
+    
+    def _forward_for_training(self, batch_features: torch.Tensor) -> torch.Tensor:
+        """Forward через скомпилированную модель; при ошибке компиляции - обычный forward"""
+        if self._training_forward_model is not self.model:
+            self._training_forward = self._compile_model(self.model)
+            self._training_forward_model = self.model
+        
+        if self._training_forward is self.model:
+            return self.model(batch_features)
+        
+        try:
+            return self._training_forward(batch_features)
+        except Exception as e:
+            # torch.compile компилирует лениво, ошибки появляются на первом вызове
+            self._report_progress(f"⚠️ Скомпилированный forward недоступен ({type(e).__name__}), используем запасной вариант")
+            failed_script = isinstance(self._training_forward, torch.jit.ScriptModule)
+            self._training_forward = self.model
+            if self.compile_mode == COMPILE_AUTO and not failed_script:
+                self._training_forward = self._script_model(self.model)
+            return self._training_forward(batch_features)
+    
+    def _compile_model(self, model: nn.Module):
+        """Компиляция модели для обучения по compile_mode (параметры не копируются)"""
+        if self.compile_mode in (COMPILE_TORCH, COMPILE_AUTO) and hasattr(torch, 'compile'):
+            try:
+                return torch.compile(model)
+            except Exception as e:
+                self._report_progress(f"⚠️ torch.compile недоступен: {e}")
+        
+        if self.compile_mode in (COMPILE_SCRIPT, COMPILE_AUTO):
+            return self._script_model(model)
+        
+        return model
+    
+    def _script_model(self, model: nn.Module):
+        """TorchScript-версия модели для обучения или сама модель, если скрипт не собрался"""
+        try:
+            scripted = torch.jit.script(model)
+            # У скриптового модуля свой флаг training
+            scripted.train()
+            return scripted
+        except Exception as e:
+            self._report_progress(f"⚠️ TorchScript недоступен: {e}")
+            return model
+    
+    def _train_epoch(self, features: Source, targets: Source, batch_size: int,
+                     budget: Optional[TrainingBudget] = None) -> Tuple[float, int]:
+        """Одна эпоха обучения, возвращает суммарный loss и число батчей
+        
+        features/targets - тензоры или numpy-массивы (в т.ч. memmap кэша features):
+        батчи собираются по индексу, перемешанная копия всего набора не создается.
+        С бюджетом времени эпоха прерывается, если следующий батч не успевает
+        до дедлайна (budget.exhausted), а по первым батчам оценивается время эпохи.
+        """
+        epoch_start = time.time()
+        # Хвостовой батч меньше числа процессов пропускается - доля каждого процесса не пуста
+        sampler = MinibatchSampler(features, targets, batch_size, min_batch=max(2, self.world_size),
+                                   generator=self._shuffle_generator)
+        total_batches = max(1, len(sampler))
+        
+        total_loss = 0
+        num_batches = 0
+        
+        for batch_features, batch_targets, global_size in sampler.iter_shards(self.rank, self.world_size):
+            self.optimizer.zero_grad()
+            loss = self._step_loss(batch_features, batch_targets, len(batch_features) / global_size)
+            loss.backward()
+            loss_value = loss.item()
+            if self.world_size > 1:
+                loss_value = self._all_reduce_gradients(loss_value)
+            torch.nn.utils.clip_grad_norm_(self.model.parameters(), max_norm=1.0)
+            self.optimizer.step()
+            
+            total_loss += loss_value
+            num_batches += 1
+            
+            if budget is None or budget.deadline is None:
+                continue
+            
+            batch_time = (time.time() - epoch_start) / num_batches
+            if budget.epoch_estimate is None and num_batches == TrainingBudget.PROBE_BATCHES:
+                budget.epoch_estimate = batch_time * total_batches
+                self._report_progress(f"⏱️ Оценка эпохи: {budget.epoch_estimate:.1f} сек, до дедлайна "
+                                      f"{budget.remaining():.0f} сек - помещается эпох: {budget.fitting_epochs()}")
+            if self._any_rank(not budget.batch_fits(batch_time)):
+                budget.exhausted = True
+                self._report_progress(f"⏰ Эпоха прервана по дедлайну после {num_batches}/{total_batches} батчей")
+                break
+        
+        return total_loss, num_batches
+    
+    def _generate_predictions(self, groups: List[str]) -> List[Tuple[Tuple[int, int, int, int], float]]:
+        """Генерация прогнозов сохраненной моделью по последним группам"""
+        if not self.is_writer:
+            return []
+        
         # Создаем временный predictor для генерации прогнозов
         from .predictor import EnhancedPredictor
         predictor = EnhancedPredictor(self.model_path)
@@ -252,20 +815,60 @@ class EnhancedTrainer:
             unique_predictions = len(torch.unique(predictions))
             self._report_progress(f"📊 Уникальных предсказанных чисел: {unique_predictions}/26")
     
+    def _load_checkpoint(self) -> bool:
+        """Загрузка модели и состояния оптимизатора из чекпоинта для теплого старта"""
+        if not os.path.exists(self.model_path):
+            return False
+        
+        try:
+            checkpoint = torch.load(self.model_path, map_location='cpu')
+            config = checkpoint['model_config']
+            # В старых чекпоинтах гиперпараметров нет - они обучены с DEFAULT_HYPERPARAMS
+            params = dict(DEFAULT_HYPERPARAMS)
+            params.update(config.get('hyperparams', {}))
+            params['hidden_size'] = config['hidden_size']
+            self._build_model(config['input_size'], params)
+            self.model.load_state_dict(checkpoint['model_state_dict'])
+            # Старые чекпоинты обучены на окнах со сдвигом на одно число
+            self.model_windowing = config.get('windowing', WINDOWING_NUMBER)
+            
+            if is_legacy_state_dict(checkpoint['model_state_dict']):
+                # Состояние AdamW привязано к старому списку параметров голов
+                self._report_progress("⚠️ Чекпоинт со старыми головами сконвертирован, оптимизатор начинаем с нового")
+            elif 'optimizer_state_dict' in checkpoint:
+                self.optimizer.load_state_dict(checkpoint['optimizer_state_dict'])
+            else:
+                self._report_progress("⚠️ В чекпоинте нет состояния оптимизатора, начинаем с нового")
+            
+            self._report_progress(f"✅ Чекпоинт загружен для дообучения: {self.model_path}")
+            return True
+        except Exception as e:
+            self._report_progress(f"❌ Ошибка загрузки чекпоинта: {e}")
+            return False
+    
     def _save_model(self):
-        """Сохранение модели с логированием"""
+        """Сохранение модели с логированием (единственный писатель - rank 0)"""
+        if not self.is_writer:
+            return
+        
         self._report_progress("💾 Сохранение модели на диск...")
         
         if self.model is not None:
             os.makedirs(os.path.dirname(self.model_path), exist_ok=True)
-            torch.save({
+            checkpoint = {
                 'model_state_dict': self.model.state_dict(),
                 'model_config': {
                     'input_size': self.model.feature_extractor[0].in_features,
-                    'hidden_size': self.model.feature_extractor[0].out_features
+                    'hidden_size': self.model.feature_extractor[0].out_features,
+                    'windowing': self.model_windowing,
+                    'history_size': self.model_hyperparams['history_size'],
+                    'hyperparams': dict(self.model_hyperparams, hidden_size=self.model.feature_extractor[0].out_features),
                 }
-            }, self.model_path)
+            }
+            if self.optimizer is not None:
+                checkpoint['optimizer_state_dict'] = self.optimizer.state_dict()
+            torch.save(checkpoint, self.model_path)
             
             self._report_progress(f"✅ Модель сохранена: {self.model_path}")
         else:
-            self._report_progress("❌ Не удалось сохранить модель: модель не инициализирована")
+            self._report_progress("❌ Не удалось сохранить модель: модель не инициализирована")
\ No newline at end of file
@@ -16,16 +16,18 @@ if current_dir not in sys.path:
 try:
     from .simple_nn.trainer import EnhancedTrainer
     from .simple_nn.predictor import EnhancedPredictor
-    from .data_loader import load_dataset
+    from .data_loader import load_dataset, get_dataset_view, get_recent_numbers
 except ImportError:
     # Альтернативный вариант импорта
     from simple_nn.trainer import EnhancedTrainer
     from simple_nn.predictor import EnhancedPredictor
-    from data_loader import load_dataset
+    from data_loader import load_dataset, get_dataset_view, get_recent_numbers
 
 class SimpleNeuralSystem:
-    def __init__(self):
+    def __init__(self, member_timeout: float = None):
+        """member_timeout - срок ответа члена полного ансамбля, секунды (None - без срока)"""
         self.model_path = "data/simple_model.pth"
+        self.member_timeout = member_timeout
         self.trainer = EnhancedTrainer(self.model_path)
         self.predictor = EnhancedPredictor(self.model_path)
         self.is_trained = False
@@ -43,7 +45,7 @@ class SimpleNeuralSystem:
         if self._full_ensemble is None:
             try:
                 from .ensemble_predictor import EnsemblePredictor
-                self._full_ensemble = EnsemblePredictor()
+                self._full_ensemble = EnsemblePredictor(member_timeout=self.member_timeout)
                 print(f"🔍 DEBUG: m/ss загруузка анс системы")
                 if self.predictor.is_trained:
                     self._full_ensemble.set_neural_predictor(self.predictor)
@@ -102,8 +104,8 @@ class SimpleNeuralSystem:
         else:
             print(f"📢 {message}")
     
-    def train(self, epochs: int = 20) -> List[Tuple[Tuple[int, int, int, int], float]]:
-        """Обучение УСИЛЕННОЙ системы с возвратом прогнозов"""
+    def train(self, epochs: int = 20, deadline: float = None) -> List[Tuple[Tuple[int, int, int, int], float]]:
+        """Обучение УСИЛЕННОЙ системы с возвратом прогнозов (deadline - метка time.time())"""
         groups = load_dataset()
         if not groups:
             self._report_progress("❌ Нет данных для обучения")
@@ -120,7 +122,7 @@ class SimpleNeuralSystem:
             self.trainer.set_progress_callback(self.progress_callback)
         
         # Запускаем обучение и получаем прогнозы
-        result = self.trainer.train(groups, epochs=epochs)
+        result = self.trainer.train(groups, epochs=epochs, deadline=deadline)
         self.is_trained = True
         
         # Перезагружаем модель после обучения
@@ -132,25 +134,28 @@ class SimpleNeuralSystem:
         self._report_progress("✅ Обучение завершено и модель загружена!")
         return result
     
-    def add_data_and_retrain(self, new_group: str, retrain_epochs: int = 5) -> List[Tuple[Tuple[int, int, int, int], float]]:
-        """Добавление данных и дообучение УСИЛЕННОЙ модели с возвратом прогнозов"""
-        from data_loader import load_dataset, save_dataset, validate_group
+    def add_data_and_retrain(self, new_group: str, retrain_epochs: int = 5, full_retrain: bool = False,
+                             deadline: float = None) -> List[Tuple[Tuple[int, int, int, int], float]]:
+        """Добавление данных и дообучение УСИЛЕННОЙ модели с возвратом прогнозов
+        
+        По умолчанию модель дообучается инкрементально (теплый старт из чекпоинта),
+        full_retrain=True включает прежнее полное переобучение с нуля.
+        deadline (метка time.time()) - к этому моменту обучение должно завершиться.
+        """
+        from data_loader import load_dataset, append_group, validate_group
         
         if not validate_group(new_group):
             self._report_progress("❌ Неверный формат группы")
             return []
         
-        # Загружаем текущие данные
-        dataset = load_dataset()
-        old_count = len(dataset)
-        
-        self._report_progress(f"✅ Загружено {old_count} групп из dataset.json")
-        
-        dataset.append(new_group)
-        save_dataset(dataset)
+        # Дописываем группу в хранилище без перезаписи всей истории
+        if not append_group(new_group):
+            self._report_progress("❌ Не удалось сохранить группу")
+            return []
         
+        dataset = load_dataset()
         new_count = len(dataset)
-        self._report_progress(f"✅ Данные сохранены в dataset.json ({new_count} групп)")
+        self._report_progress(f"✅ Данные сохранены в dataset ({new_count} групп)")
         
         predictions = []
         
@@ -174,7 +179,10 @@ class SimpleNeuralSystem:
             if hasattr(self.trainer, 'set_progress_callback'):
                 self.trainer.set_progress_callback(self.progress_callback)
             
-            self.trainer.train(dataset, epochs=retrain_epochs)
+            if full_retrain:
+                self.trainer.train(dataset, epochs=retrain_epochs, deadline=deadline)
+            else:
+                self.trainer.fine_tune(dataset, new_groups=1, epochs=retrain_epochs, deadline=deadline)
             self.predictor.load_model()
             self._report_progress("✅ Модель дообучена!")
             
@@ -184,7 +192,7 @@ class SimpleNeuralSystem:
             
         elif not self.is_trained and len(dataset) >= 50:
             self._report_progress("🎯 Достаточно данных для первого обучения УСИЛЕННОЙ модели!")
-            predictions = self.train(epochs=20)
+            predictions = self.train(epochs=20, deadline=deadline)
         else:
             # Даже если не переобучаем, делаем прогноз на основе ансамбля
             self._report_progress("🔮 Делаем прогноз на основе обновленного ансамбля...")
@@ -194,8 +202,7 @@ class SimpleNeuralSystem:
     
     def _make_prediction(self) -> List[Tuple[Tuple[int, int, int, int], float]]:
         """Внутренний метод для создания прогноза УСИЛЕННОЙ моделью"""
-        groups = load_dataset()
-        if not groups:
+        if len(get_dataset_view()) == 0:
             return []
         
         # Пробуем полный ансамбль сначала
@@ -210,14 +217,7 @@ class SimpleNeuralSystem:
                 self._report_progress(f"⚠️  Ансамблевое предсказание не удалось: {e}")
         
         # Резервный вариант: оригинальная логика
-        recent_numbers = []
-        for group_str in groups[-25:]:
-            try:
-                numbers = [int(x) for x in group_str.strip().split()]
-                if len(numbers) == 4:
-                    recent_numbers.extend(numbers)
-            except:
-                continue
+        recent_numbers = get_recent_numbers(25)
         
         if len(recent_numbers) < 50:
             self._report_progress("❌ Недостаточно данных для предсказания")
@@ -236,19 +236,11 @@ class SimpleNeuralSystem:
     
     def _make_ensemble_prediction(self) -> List[Tuple[Tuple[int, int, int, int], float]]:
         """Прогноз с использованием полного ансамбля"""
-        groups = load_dataset()
-        if not groups:
+        if len(get_dataset_view()) == 0:
             return []
         
         # Подготавливаем историю для ансамбля
-        recent_numbers = []
-        for group_str in groups[-30:]:
-            try:
-                numbers = [int(x) for x in group_str.strip().split()]
-                if len(numbers) == 4:
-                    recent_numbers.extend(numbers)
-            except:
-                continue
+        recent_numbers = get_recent_numbers(30)
 
         print(f"🔍 DEBUG: m/ss история ансамбля {len(recent_numbers)}")
         
@@ -291,7 +283,7 @@ class SimpleNeuralSystem:
     
     def get_status(self) -> dict:
         """Статус системы"""
-        dataset = load_dataset()
+        dataset = get_dataset_view()
         
         # Информация об ансамбле и самообучении
         ensemble_info = {
@@ -310,6 +302,7 @@ class SimpleNeuralSystem:
             'is_trained': self.is_trained,
             'model_loaded': self.predictor.is_trained,
             'model_path': self.predictor.model_path,
+            'windowing': self.predictor.windowing,
             'dataset_size': len(dataset),
             'has_sufficient_data': len(dataset) >= 50,
             'model_type': 'УСИЛЕННАЯ нейросеть с ансамблем и самообучением',
@@ -0,0 +1,49 @@
+# [file name]: tests/model_helpers.py
+"""
+Общие помощники тестов модели
+"""
+
+import os
+import random
+import numpy as np
+import torch
+import torch.optim as optim
+
+from model.simple_nn.model import EnhancedNumberPredictor
+from model.simple_nn.trainer import EnhancedTrainer
+
+def random_numbers(count: int, seed: int = 0) -> list:
+    """Случайный поток чисел 1..26"""
+    rng = random.Random(seed)
+    return [rng.randint(1, 26) for _ in range(count)]
+
+def random_groups(count: int, seed: int = 0, as_strings: bool = True):
+    """Случайные группы из 4 чисел: строки датасета "a b c d" или массив [count, 4]"""
+    numbers = random_numbers(count * 4, seed)
+    rows = [numbers[i:i + 4] for i in range(0, len(numbers), 4)]
+    if as_strings:
+        return [" ".join(map(str, row)) for row in rows]
+    return np.array(rows, dtype=np.int64)
+
+def save_checkpoint(path: str, seed: int = 0) -> EnhancedNumberPredictor:
+    """Чекпоинт небольшой случайно инициализированной модели (eval) в формате тренера"""
+    torch.manual_seed(seed)
+    model = EnhancedNumberPredictor(input_size=50, hidden_size=64).eval()
+    torch.save({'model_state_dict': model.state_dict(),
+                'model_config': {'input_size': 50, 'hidden_size': 64, 'windowing': 'number'}}, path)
+    return model
+
+def make_trainer(directory, **options) -> EnhancedTrainer:
+    """Тренер небольшой модели (50 -> 32) с чекпоинтом и журналом обучения в directory
+    
+    options передаются в EnhancedTrainer (step_mode, compile_mode, ...).
+    """
+    os.makedirs(directory, exist_ok=True)
+    torch.manual_seed(0)
+    trainer = EnhancedTrainer(os.path.join(directory, 'model.pth'),
+                              log_path=os.path.join(directory, 'training_log.txt'), **options)
+    trainer.set_progress_callback(lambda message: None)
+    trainer.model = EnhancedNumberPredictor(input_size=50, hidden_size=32)
+    trainer.optimizer = optim.AdamW(trainer.model.parameters(), lr=0.001, weight_decay=1e-4)
+    trainer.model.train()
+    return trainer
@@ -0,0 +1,42 @@
+# [file name]: tests/test_backtest.py
+#!/usr/bin/env python3
+"""
+ТЕСТЫ walk-forward бэктеста
+"""
+
+import pytest
+
+from model.backtest import WalkForwardBacktest
+from tests.model_helpers import random_groups
+
+def _without_timing(report: dict) -> list:
+    return [(step['index'], step['best_matches'], step['best_exact'], step['candidates'])
+            for step in report['per_step']]
+
+def test_frequency_backtest_report():
+    """Отчет покрывает последние N тиражей, распределение совпадений согласовано"""
+    print("🧪 Тест частотного бэктеста...")
+    
+    groups = random_groups(200, seed=3, as_strings=False)
+    report = WalkForwardBacktest('frequency', draws=50, top_k=5, workers=1).run(groups)
+    
+    assert report['steps'] == 50
+    assert [step['index'] for step in report['per_step']] == list(range(150, 200))
+    assert sum(report['matches_distribution'].values()) == 50
+    assert report['hit_rate']['>=1'] == pytest.approx(1 - report['matches_distribution']['0'] / 50)
+    assert report['empty_predictions'] == 0
+    assert report['peak_rss_mb'] >= 0
+    print("✅ Частотный бэктест корректен")
+
+@pytest.mark.parametrize('predictor', ['frequency', 'statistical'])
+def test_parallel_backtest_matches_serial(predictor):
+    """Разбиение шагов по процессам не меняет результаты"""
+    groups = random_groups(160, seed=3, as_strings=False)
+    serial = WalkForwardBacktest(predictor, draws=40, top_k=5, workers=1).run(groups)
+    parallel = WalkForwardBacktest(predictor, draws=40, top_k=5, workers=2).run(groups)
+    
+    assert _without_timing(serial) == _without_timing(parallel)
+
+def test_unknown_predictor():
+    with pytest.raises(ValueError):
+        WalkForwardBacktest('oracle')
@@ -0,0 +1,67 @@
+# [file name]: tests/test_candidate_scoring.py
+#!/usr/bin/env python3
+"""
+ТЕСТЫ векторизованной оценки пространства групп
+"""
+
+import itertools
+import random
+import numpy as np
+
+from model.simple_nn.candidate_scoring import VALID_COUNT, outer4, top_k_groups
+from model.advanced_features import FrequencyBasedPredictor
+
+def test_top_k_matches_brute_force():
+    """Точный top-k совпадает с полным перебором валидных групп"""
+    print("🧪 Тест точного top-k...")
+    
+    rng = np.random.default_rng(3)
+    probs = rng.dirichlet(np.ones(26), size=4)
+    scores = outer4(probs[0], probs[1], probs[2], probs[3])
+    
+    brute = sorted(
+        ((group, scores[tuple(np.array(group) - 1)])
+         for group in itertools.product(range(1, 27), repeat=4)
+         if group[0] != group[1] and group[2] != group[3]),
+        key=lambda x: x[1], reverse=True
+    )[:25]
+    
+    assert VALID_COUNT == 26 * 25 * 26 * 25
+    assert [group for group, _ in top_k_groups(scores, 25)] == [group for group, _ in brute]
+    print("✅ top-k корректен")
+
+def test_frequency_score_tensor_matches_scalar():
+    """Тензор частотных score совпадает с get_probability_scores"""
+    rng = random.Random(11)
+    groups = [" ".join(str(rng.randint(1, 26)) for _ in range(4)) for _ in range(300)]
+    predictor = FrequencyBasedPredictor()
+    predictor.update_frequencies(groups)
+    
+    tensor = predictor.score_tensor()
+    for _ in range(200):
+        group = tuple(rng.randint(1, 26) for _ in range(4))
+        assert np.isclose(tensor[tuple(np.array(group) - 1)], predictor.get_probability_scores(group), rtol=1e-12)
+
+def test_pattern_tables_gather_matches_tensor():
+    """Выборка по таблицам совпадает с полным тензором и ручным расчетом"""
+    from model.simple_nn.candidate_scoring import PatternScoreTables
+    
+    tables = PatternScoreTables({'hot_numbers': [3, 4, 5], 'cold_numbers': [1], 'recent_numbers': [1, 2]})
+    groups = np.array([[1, 2, 14, 15], [3, 4, 5, 6], [7, 7, 8, 8]])
+    
+    tensor = tables.pattern_tensor()
+    assert np.allclose(tables.pattern_scores(groups), tensor[tuple((groups - 1).T)])
+    # Холодное 1 (x1.3), две четных (x1.2), два малых (x1.3), все разные (x1.2)
+    assert np.isclose(tables.pattern_scores([(1, 2, 14, 15)])[0], 1.3 * 1.2 * 1.3 * 1.2)
+    # Повторы и однородный диапазон: 0.5 * 0.8
+    assert np.isclose(tables.quality_scores([(7, 7, 8, 8)])[0], 0.5 * 0.8)
+
+def test_top_k_product_matches_full_space():
+    """Усеченный перебор произведения дает тот же top-k, что и полный"""
+    from model.simple_nn.candidate_scoring import top_k_product
+    
+    rng = np.random.default_rng(8)
+    for k in (1, 5, 10):
+        probs = rng.dirichlet(np.ones(26) * 0.3, size=4)
+        expected = top_k_groups(outer4(probs[0], probs[1], probs[2], probs[3]), k)
+        assert top_k_product(probs, k) == expected
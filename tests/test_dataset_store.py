@@ -0,0 +1,92 @@
+# [file name]: tests/test_dataset_store.py
+#!/usr/bin/env python3
+"""
+ТЕСТЫ бинарного хранилища датасета
+"""
+
+import os
+import json
+import numpy as np
+import pytest
+
+import model.data_loader as data_loader
+
+@pytest.fixture
+def dataset_dir(tmp_path, monkeypatch):
+    """Изолированная директория данных с исходным dataset.json"""
+    dataset_path = tmp_path / 'dataset.json'
+    with open(dataset_path, 'w', encoding='utf-8') as f:
+        json.dump(["1 2 3 4", "5 6 7 8", "9 10 11 12"], f)
+    
+    monkeypatch.setattr(data_loader, 'DATA_DIR', str(tmp_path))
+    monkeypatch.setattr(data_loader, 'DATASET_PATH', str(dataset_path))
+    return tmp_path
+
+def test_migration_and_load(dataset_dir):
+    """dataset.json переносится в бинарный формат и читается массивом"""
+    print("🧪 Тест миграции датасета...")
+    
+    array = data_loader.load_dataset_array()
+    
+    assert os.path.exists(dataset_dir / 'dataset.bin')
+    assert array.dtype == np.uint8
+    assert array.tolist() == [[1, 2, 3, 4], [5, 6, 7, 8], [9, 10, 11, 12]]
+    assert data_loader.load_dataset() == ["1 2 3 4", "5 6 7 8", "9 10 11 12"]
+    print("✅ Миграция корректна")
+
+def test_append_group(dataset_dir):
+    """Новая группа дописывается, невалидная отклоняется, прерванная запись не сдвигает строки"""
+    assert data_loader.append_group("13 14 15 16")
+    assert not data_loader.append_group("1 2 3")
+    
+    with open(dataset_dir / 'dataset.bin', 'ab') as f:
+        f.write(b'\x01\x02')
+    assert len(data_loader.load_dataset_array()) == 4
+    
+    assert data_loader.append_group("17 18 19 20")
+    assert data_loader.load_dataset()[-2:] == ["13 14 15 16", "17 18 19 20"]
+    assert os.path.getsize(dataset_dir / 'dataset.bin') == 5 * 4
+
+def test_export_json(dataset_dir):
+    """Экспорт в JSON повторяет бинарное хранилище и не вызывает повторную миграцию"""
+    data_loader.append_group("13 14 15 16")
+    
+    assert data_loader.export_dataset_json()
+    with open(dataset_dir / 'dataset.json', 'r', encoding='utf-8') as f:
+        assert json.load(f) == data_loader.load_dataset()
+    
+    data_loader.append_group("17 18 19 20")
+    assert len(data_loader.load_dataset()) == 5
+
+def test_touched_json_does_not_overwrite_appended_groups(dataset_dir):
+    """Обновленный dataset.json (git pull, редактор) не затирает дописанные группы"""
+    print("🧪 Тест сохранности дописанных групп...")
+    
+    data_loader.load_dataset_array()
+    assert data_loader.append_group("13 14 15 16")
+    
+    later = os.path.getmtime(dataset_dir / 'dataset.bin') + 10
+    os.utime(dataset_dir / 'dataset.json', (later, later))
+    
+    assert len(data_loader.load_dataset_array()) == 4
+    assert data_loader.append_group("17 18 19 20")
+    assert data_loader.load_dataset()[-2:] == ["13 14 15 16", "17 18 19 20"]
+    
+    # Явный переимпорт вручную измененного dataset.json
+    assert data_loader.migrate_dataset_to_binary(force=True)
+    assert len(data_loader.load_dataset_array()) == 3
+    print("✅ Дописанные группы сохранены")
+
+def test_dataset_view_cache(dataset_dir):
+    """Кэш датасета переиспользуется и сбрасывается после дописывания группы"""
+    view = data_loader.get_dataset_view()
+    assert data_loader.get_dataset_view() is view
+    assert not view.flags.writeable
+    
+    data_loader.append_group("13 14 15 16")
+    updated = data_loader.get_dataset_view()
+    
+    assert updated is not view
+    assert updated[-1].tolist() == [13, 14, 15, 16]
+    assert data_loader.get_recent_numbers(2) == [9, 10, 11, 12, 13, 14, 15, 16]
+    assert data_loader.load_dataset()[-1] == "13 14 15 16"
@@ -0,0 +1,86 @@
+# [file name]: tests/test_ensemble_deadlines.py
+#!/usr/bin/env python3
+"""
+ТЕСТЫ параллельного выполнения членов ансамбля со сроками ответа
+"""
+
+import threading
+import time
+import pytest
+
+from model.ensemble_predictor import EnsemblePredictor
+
+HISTORY = [(i * 7) % 26 + 1 for i in range(120)]
+
+class _Member:
+    """Член ансамбля с фиксированными кандидатами и задержкой"""
+    
+    def __init__(self, candidates, delay: float = 0.0):
+        self.candidates = candidates
+        self.delay = delay
+        self.release = threading.Event()
+    
+    def predict(self, history, top_k=10):
+        if self.delay:
+            self.release.wait(self.delay)
+        return self.candidates[:top_k]
+
+def _ensemble(neural_delay: float = 0.0, **options) -> EnsemblePredictor:
+    ensemble = EnsemblePredictor(**options)
+    ensemble.predictors.update(
+        frequency=_Member([((1, 2, 3, 4), 1.0)]),
+        pattern=_Member([((5, 6, 7, 8), 1.0)]),
+        statistical=_Member([((1, 2, 3, 4), 1.0)]),
+        neural=_Member([((9, 10, 11, 12), 1.0)], delay=neural_delay),
+    )
+    return ensemble
+
+def test_concurrent_matches_sequential():
+    """Параллельный ансамбль агрегирует то же, что и последовательный"""
+    sequential = _ensemble(concurrent=False).predict_ensemble(HISTORY, 5)
+    concurrent_ensemble = _ensemble()
+    
+    assert concurrent_ensemble.predict_ensemble(HISTORY, 5) == sequential
+    assert sequential[0] == ((1, 2, 3, 4), pytest.approx(0.55))
+    
+    info = concurrent_ensemble.latency_info()
+    assert set(info) == {'frequency', 'pattern', 'statistical', 'neural'}
+    assert all(stats['calls'] == 1 and stats['timeouts'] == 0 for stats in info.values())
+    assert 'context' in concurrent_ensemble.last_latency_ms
+
+def test_late_member_dropped():
+    """Опоздавший член не задерживает ответ, ответившие сохраняют свои веса"""
+    print("🧪 Тест срока ответа членов ансамбля...")
+    
+    ensemble = _ensemble(neural_delay=10.0, member_timeout=0.2)
+    
+    began = time.perf_counter()
+    predictions = dict(ensemble.predict_ensemble(HISTORY, 5))
+    assert time.perf_counter() - began < 2.0
+    
+    assert (9, 10, 11, 12) not in predictions
+    assert predictions[(1, 2, 3, 4)] == pytest.approx(0.35 + 0.20)
+    assert predictions[(5, 6, 7, 8)] == pytest.approx(0.25)
+    assert ensemble.latency_info()['neural']['timeouts'] == 1
+    
+    # Зависший вызов еще выполняется - следующий прогноз не ждет этого члена
+    began = time.perf_counter()
+    ensemble.predict_ensemble(HISTORY, 5)
+    assert time.perf_counter() - began < 0.15
+    assert ensemble.latency_info()['neural']['timeouts'] == 2
+    
+    ensemble.predictors['neural'].release.set()
+    ensemble._late_calls['neural'].result(timeout=5)
+    assert (9, 10, 11, 12) in dict(ensemble.predict_ensemble(HISTORY, 5))
+    print("✅ Опоздавший член отброшен")
+
+def test_cold_member_not_dropped_by_default():
+    """Без заданного срока медленный первый вызов (загрузка модели) дожидается ответа"""
+    ensemble = _ensemble(neural_delay=2.5)
+    assert ensemble.member_timeouts['neural'] is None
+    
+    predictions = dict(ensemble.predict_ensemble(HISTORY, 5))
+    
+    assert predictions[(9, 10, 11, 12)] == pytest.approx(0.20)
+    assert ensemble.latency_info()['neural']['timeouts'] == 0
+    assert ensemble.last_latency_ms['neural'] >= 2500
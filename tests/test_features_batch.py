@@ -0,0 +1,177 @@
+# [file name]: tests/test_features_batch.py
+#!/usr/bin/env python3
+"""
+ТЕСТЫ пакетного извлечения features
+"""
+
+import numpy as np
+import pytest
+
+from model.simple_nn.features import FeatureExtractor, RollingFeatureState
+from model.simple_nn.data_processor import DataProcessor
+from tests.model_helpers import random_numbers
+
+@pytest.mark.parametrize("history_size", [1, 2, 3, 5, 10, 25])
+def test_batch_matches_single_extraction(history_size):
+    """Пакетный путь побитово совпадает с extract_features"""
+    print(f"🧪 Тест пакетных features (history_size={history_size})...")
+    
+    extractor = FeatureExtractor(history_size)
+    numbers = random_numbers(600, seed=42)
+    count = len(numbers) - history_size + 1
+    
+    expected = np.array([
+        extractor.extract_features(numbers[i:i + history_size]) for i in range(count)
+    ])
+    actual = extractor.extract_features_batch(extractor.sliding_windows(numbers))
+    
+    assert actual.dtype == np.float32
+    assert np.array_equal(expected.view(np.uint32), actual.view(np.uint32))
+    print("✅ Пакетные features совпадают")
+
+def test_batch_constant_window():
+    """Окно из одинаковых чисел: автокорреляция NaN заменяется нулем"""
+    extractor = FeatureExtractor(25)
+    windows = np.full((2, 25), 7, dtype=np.float32)
+    
+    actual = extractor.extract_features_batch(windows)
+    
+    assert np.array_equal(actual[0], extractor.extract_features([7] * 25))
+
+def test_prepare_training_data_shapes():
+    """Подготовка данных дает окна по числам и цели из 4 чисел"""
+    numbers = random_numbers(400, seed=42)
+    groups = [" ".join(map(str, numbers[i:i + 4])) for i in range(0, len(numbers), 4)]
+    
+    features, targets = DataProcessor(history_size=25).prepare_training_data(groups)
+    
+    assert features.shape == (len(numbers) - 28, 50)
+    assert targets.shape == (len(numbers) - 28, 4)
+    assert targets[0].tolist() == numbers[25:29]
+
+def test_feature_cache_reuses_prefix(tmp_path):
+    """Кэш features: дописанные группы досчитываются, изменение истории сбрасывает кэш"""
+    print("🧪 Тест кэша features...")
+    
+    numbers = random_numbers(400, seed=42)
+    groups = [" ".join(map(str, numbers[i:i + 4])) for i in range(0, len(numbers), 4)]
+    processor = DataProcessor(history_size=25, cache_dir=str(tmp_path / 'feature_cache'))
+    expected, expected_targets = DataProcessor(history_size=25).prepare_training_data(groups)
+    
+    processor.prepare_training_data(groups[:-10])
+    features, targets = processor.prepare_training_data(groups)
+    assert np.array_equal(features, expected)
+    assert np.array_equal(targets, expected_targets)
+    
+    cached, _ = processor.prepare_training_data(groups, memory_map=True)
+    assert isinstance(cached, np.memmap)
+    
+    # Без memory_map полное попадание в кэш дает обычные изменяемые массивы
+    features, targets = processor.prepare_training_data(groups)
+    assert not isinstance(features, np.memmap) and features.flags.writeable
+    assert not isinstance(targets, np.memmap) and targets.flags.writeable
+    features[0] = 0
+    assert np.array_equal(processor.prepare_training_data(groups)[0], expected)
+    
+    changed = ["1 2 3 4"] + groups[1:]
+    features, _ = processor.prepare_training_data(changed)
+    assert np.array_equal(features, DataProcessor(history_size=25).prepare_training_data(changed)[0])
+    print("✅ Кэш features корректен")
+
+def test_feature_cache_appends_rows(tmp_path):
+    """Новые строки дописываются в файлы кэша, прерванное дописывание не портит кэш"""
+    numbers = random_numbers(400, seed=42)
+    groups = [" ".join(map(str, numbers[i:i + 4])) for i in range(0, len(numbers), 4)]
+    cache_dir = tmp_path / 'feature_cache'
+    processor = DataProcessor(history_size=25, cache_dir=str(cache_dir))
+    expected, expected_targets = DataProcessor(history_size=25).prepare_training_data(groups)
+    
+    processor.prepare_training_data(groups[:-20])
+    features_file = cache_dir / 'features.bin'
+    inode, head = features_file.stat().st_ino, features_file.read_bytes()
+    
+    processor.prepare_training_data(groups[:-10])
+    # Файл не пересоздан, старые строки не переписаны
+    assert features_file.stat().st_ino == inode
+    assert features_file.read_bytes()[:len(head)] == head
+    
+    # Дописывание прервано до обновления meta.json: лишний хвост игнорируется и отрезается
+    with open(features_file, 'ab') as f:
+        f.write(b'\xff' * 1000)
+    features, targets = processor.prepare_training_data(groups, memory_map=True)
+    assert isinstance(features, np.memmap)
+    assert np.array_equal(features, expected)
+    assert np.array_equal(targets, expected_targets)
+    assert features_file.stat().st_size == expected.nbytes
+
+def test_group_windowing():
+    """Режим group: окна заканчиваются на границе группы, цель - следующая группа целиком"""
+    print("🧪 Тест окон по группам...")
+    
+    numbers = random_numbers(400, seed=42)
+    groups = [" ".join(map(str, numbers[i:i + 4])) for i in range(0, len(numbers), 4)]
+    by_number = DataProcessor(history_size=25)
+    by_group = DataProcessor(history_size=25, windowing='group')
+    
+    features, targets = by_group.prepare_training_data(groups)
+    all_features, _ = by_number.prepare_training_data(groups)
+    indices = by_group.sample_indices(np.array(numbers))
+    
+    assert len(features) == len(groups) - 7
+    assert np.all((indices + 25) % 4 == 0)
+    assert targets[0].tolist() == numbers[28:32]
+    assert targets[-1].tolist() == numbers[-4:]
+    assert np.array_equal(features, all_features[indices])
+    
+    with pytest.raises(ValueError):
+        DataProcessor(history_size=25, windowing='draw')
+    print("✅ Окна по группам корректны")
+
+def test_feature_cache_separates_windowing(tmp_path):
+    """Кэш, посчитанный в одном режиме окон, не используется в другом"""
+    numbers = random_numbers(400, seed=42)
+    groups = [" ".join(map(str, numbers[i:i + 4])) for i in range(0, len(numbers), 4)]
+    cache_dir = str(tmp_path / 'feature_cache')
+    
+    DataProcessor(history_size=25, cache_dir=cache_dir).prepare_training_data(groups)
+    features, _ = DataProcessor(history_size=25, cache_dir=cache_dir, windowing='group').prepare_training_data(groups)
+    
+    assert len(features) == len(groups) - 7
+
+def test_validation_split_is_chronological():
+    """Валидация - хвост по времени; в режиме number перекрывающиеся цели выбрасываются"""
+    assert DataProcessor(history_size=25).validation_split(100, 10) == (87, 90)
+    assert DataProcessor(history_size=25, windowing='group').validation_split(100, 10) == (90, 90)
+    assert DataProcessor(history_size=25).validation_split(100, 0) == (100, 100)
+    assert DataProcessor(history_size=25).validation_split(5, 10) == (0, 0)
+
+# std и автокорреляция в RollingFeatureState считаются по точным суммам, а не в float32
+_APPROXIMATE_FEATURES = [1, 33, 36, 39, 43]
+
+# Постоянное окно: np.corrcoef в extract_features делит на нулевую дисперсию
+@pytest.mark.filterwarnings("ignore::RuntimeWarning")
+@pytest.mark.parametrize("history_size", [1, 2, 3, 5, 10, 25])
+def test_rolling_state_matches_extraction(history_size):
+    """Окно, обновляемое по одному числу, дает те же features, что и extract_features"""
+    print(f"🧪 Тест инкрементальных features (history_size={history_size})...")
+    
+    extractor = FeatureExtractor(history_size)
+    state = RollingFeatureState(history_size)
+    numbers = random_numbers(300, seed=42) + [7] * 30
+    exact = [i for i in range(50) if i not in _APPROXIMATE_FEATURES]
+    
+    for end, number in enumerate(numbers, start=1):
+        state.push(number)
+        expected = extractor.extract_features(numbers[:end])
+        actual = state.features()
+        
+        assert state.window == numbers[max(0, end - history_size):end]
+        assert np.array_equal(expected[exact].view(np.uint32), actual[exact].view(np.uint32))
+        assert np.allclose(expected, actual, rtol=0, atol=1e-6)
+    print("✅ Инкрементальные features совпадают")
+
+def test_rolling_state_rejects_out_of_range():
+    """Гистограмма окна рассчитана только на числа 1-26"""
+    with pytest.raises(ValueError):
+        RollingFeatureState(25).push(27)
+
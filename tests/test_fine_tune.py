@@ -0,0 +1,40 @@
+# [file name]: tests/test_fine_tune.py
+#!/usr/bin/env python3
+"""
+ТЕСТЫ инкрементального дообучения
+"""
+
+import torch
+
+from model.simple_nn.quantization import file_sha1
+from model.simple_nn.trainer import EnhancedTrainer
+from tests.model_helpers import random_groups
+
+def test_worse_fine_tune_keeps_checkpoint(tmp_path):
+    """Эпохи хуже исходного чекпоинта не сохраняются, в памяти остается исходная модель"""
+    print("🧪 Тест дообучения без улучшения...")
+    
+    model_path = str(tmp_path / 'data' / 'model.pth')
+    log_path = str(tmp_path / 'training_log.txt')
+    groups = random_groups(300, seed=9)
+    torch.manual_seed(0)
+    EnhancedTrainer(model_path, log_path=log_path).train(groups, epochs=1, return_predictions=False)
+    checkpoint_sha1 = file_sha1(model_path)
+    
+    trainer = EnhancedTrainer(model_path, log_path=log_path)
+    
+    def corrupting_epoch(features, targets, batch_size, budget):
+        # Эпоха, после которой validation loss заведомо хуже
+        with torch.no_grad():
+            for parameter in trainer.model.parameters():
+                parameter.add_(torch.randn_like(parameter) * 5)
+        return 1.0, 1
+    
+    trainer._train_epoch = corrupting_epoch
+    trainer._generate_predictions = lambda groups: []
+    trainer.fine_tune(groups + random_groups(1, seed=10), new_groups=1, epochs=2, replay_size=64, validation_size=64)
+    
+    assert file_sha1(model_path) == checkpoint_sha1
+    saved = torch.load(model_path, map_location='cpu')['model_state_dict']
+    assert all(torch.equal(saved[name], value) for name, value in trainer.model.state_dict().items())
+    print("✅ Чекпоинт не изменен")
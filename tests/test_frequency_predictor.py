@@ -0,0 +1,62 @@
+# [file name]: tests/test_frequency_predictor.py
+#!/usr/bin/env python3
+"""
+ТЕСТЫ инкрементального частотного предсказателя
+"""
+
+import random
+
+from model.advanced_features import FrequencyBasedPredictor
+
+def _random_groups(count: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    groups = []
+    for _ in range(count):
+        a, b = rng.sample(range(1, 27), 2)
+        c, d = rng.sample(range(1, 27), 2)
+        groups.append(f"{a} {b} {c} {d}")
+    return groups
+
+def test_incremental_matches_full_recount():
+    """Досчет новых групп дает те же счетчики и score, что полный пересчет"""
+    print("🧪 Тест инкрементальных частот...")
+    
+    groups = _random_groups(300)
+    incremental = FrequencyBasedPredictor()
+    incremental.sync(groups[:250])
+    assert incremental.sync(groups) == 50
+    
+    full = FrequencyBasedPredictor()
+    full.update_frequencies(groups)
+    
+    assert (incremental.position_counts == full.position_counts).all()
+    assert (incremental.pair_counts == full.pair_counts).all()
+    assert (incremental.number_counts == full.number_counts).all()
+    assert incremental.get_probability_scores((1, 2, 3, 4)) == full.get_probability_scores((1, 2, 3, 4))
+    print("✅ Инкрементальные частоты корректны")
+
+def test_snapshot_survives_restart(tmp_path):
+    """Снимок частот загружается после перезапуска и сбрасывается при изменении истории"""
+    groups = _random_groups(200)
+    snapshot_path = str(tmp_path / 'frequency_snapshot.npz')
+    
+    FrequencyBasedPredictor(snapshot_path).sync(groups)
+    # Временный файл записи (свой у каждого процесса) не остается рядом со снимком
+    assert [path.name for path in tmp_path.iterdir()] == ['frequency_snapshot.npz']
+    
+    restored = FrequencyBasedPredictor(snapshot_path)
+    assert restored.sync(groups + ["1 2 3 4"]) == 1
+    assert restored.total_groups == 201
+    
+    changed = FrequencyBasedPredictor(snapshot_path)
+    assert changed.sync(["5 6 7 8"] + groups[1:]) == 200
+
+def test_top_k_matches_score_tensor():
+    """top_k без тензора 26^4 совпадает с полным перебором score_tensor"""
+    from model.simple_nn.candidate_scoring import top_k_groups
+    
+    predictor = FrequencyBasedPredictor()
+    predictor.update_frequencies(_random_groups(500))
+    
+    for k in (1, 10, 50):
+        assert predictor.top_k(k) == top_k_groups(predictor.score_tensor(), k)
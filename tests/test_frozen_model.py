@@ -0,0 +1,65 @@
+# [file name]: tests/test_frozen_model.py
+#!/usr/bin/env python3
+"""
+ТЕСТЫ замороженного TorchScript графа для инференса
+"""
+
+import os
+import torch
+
+from model.simple_nn.model import EnhancedNumberPredictor
+from model.simple_nn.predictor import EnhancedPredictor
+from model.simple_nn.trainer import EnhancedTrainer
+from model.simple_nn.frozen import FrozenModel, export_frozen, load_frozen, frozen_model_path
+
+from tests.model_helpers import save_checkpoint, random_groups
+
+def test_frozen_graph_matches_eval_model(tmp_path):
+    """Граф совпадает с eval-моделью, не содержит dropout и устаревает вместе с чекпоинтом"""
+    print("🧪 Тест замороженного графа...")
+    
+    model_path = str(tmp_path / 'model.pth')
+    model = save_checkpoint(model_path)
+    assert export_frozen(model_path)
+    
+    frozen, config = load_frozen(model_path)
+    assert config['hidden_size'] == 64
+    
+    features = torch.rand(32, 50)
+    with torch.no_grad():
+        # train() не включает dropout: граф собран из eval-модели
+        frozen.train()
+        assert torch.allclose(frozen(features), model(features), atol=1e-5)
+        assert torch.equal(frozen(features), frozen(features))
+    
+    save_checkpoint(model_path, seed=1)
+    assert load_frozen(model_path) is None
+    print("✅ Граф совпадает с fp32 и привязан к чекпоинту")
+
+def test_predictor_prefers_frozen_graph(tmp_path):
+    """load_model берет актуальный граф, устаревший - пропускает"""
+    model_path = str(tmp_path / 'model.pth')
+    save_checkpoint(model_path)
+    
+    predictor = EnhancedPredictor(model_path)
+    assert predictor.load_model(update_ensemble=False)
+    assert isinstance(predictor.model, EnhancedNumberPredictor)
+    
+    export_frozen(model_path)
+    assert predictor.load_model(update_ensemble=False)
+    assert isinstance(predictor.model, FrozenModel)
+    assert len(predictor.predict_batch([list(range(1, 26)) * 2], top_k=5, use_patterns=False)[0]) == 5
+    
+    save_checkpoint(model_path, seed=1)
+    assert predictor.load_model(update_ensemble=False)
+    assert isinstance(predictor.model, EnhancedNumberPredictor)
+
+def test_training_exports_frozen_graph(tmp_path):
+    """После обучения рядом с чекпоинтом лежит актуальный граф"""
+    groups = random_groups(300, seed=3)
+    model_path = str(tmp_path / 'data' / 'model.pth')
+    
+    EnhancedTrainer(model_path, log_path=str(tmp_path / 'training_log.txt')).train(groups, epochs=1, return_predictions=False)
+    
+    assert os.path.exists(frozen_model_path(model_path))
+    assert load_frozen(model_path) is not None
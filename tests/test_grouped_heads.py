@@ -0,0 +1,65 @@
+# [file name]: tests/test_grouped_heads.py
+#!/usr/bin/env python3
+"""
+ТЕСТЫ объединенных голов EnhancedNumberPredictor
+"""
+
+import torch
+import torch.nn as nn
+
+from model.simple_nn.model import EnhancedNumberPredictor, convert_legacy_state_dict, is_legacy_state_dict
+
+def _legacy_head(in_features: int) -> nn.Sequential:
+    """Голова в старом формате (head1..head4)"""
+    return nn.Sequential(
+        nn.Linear(in_features, 256), nn.ReLU(), nn.Dropout(0.2),
+        nn.Linear(256, 128), nn.ReLU(), nn.Linear(128, 26),
+    )
+
+def _legacy_state_dict(model: EnhancedNumberPredictor, heads: list) -> dict:
+    state = {key: value for key, value in model.state_dict().items() if not key.startswith('heads.')}
+    for k, head in enumerate(heads, start=1):
+        state.update({f'head{k}.{key}': value for key, value in head.state_dict().items()})
+    return state
+
+def test_legacy_checkpoint_loads_with_same_outputs():
+    """Старый чекпоинт загружается без переобучения и дает те же выходы"""
+    print("🧪 Тест конвертации старых голов...")
+    
+    torch.manual_seed(0)
+    model = EnhancedNumberPredictor(input_size=50, hidden_size=64)
+    heads = [_legacy_head(32) for _ in range(4)]
+    legacy = _legacy_state_dict(model, heads)
+    assert is_legacy_state_dict(legacy)
+    
+    loaded = EnhancedNumberPredictor(input_size=50, hidden_size=64)
+    loaded.load_state_dict(legacy)
+    loaded.eval()
+    
+    x = torch.rand(8, 50)
+    with torch.no_grad():
+        features = loaded.feature_extractor(x)
+        for head in heads:
+            head.eval()
+        expected = torch.stack([head(features) for head in heads], dim=1)
+        actual = loaded(x)
+    
+    assert actual.shape == (8, 4, 26)
+    assert torch.allclose(actual, expected, atol=1e-6)
+    assert not is_legacy_state_dict(loaded.state_dict())
+    print("✅ Старые головы сконвертированы")
+
+def test_convert_keeps_new_format():
+    """Словарь в новом формате конвертер не меняет"""
+    state = EnhancedNumberPredictor(input_size=50, hidden_size=64).state_dict()
+    assert convert_legacy_state_dict(state).keys() == state.keys()
+
+def test_heads_are_independent():
+    """Градиент одной позиции не затрагивает веса остальных голов"""
+    model = EnhancedNumberPredictor(input_size=50, hidden_size=64)
+    model.eval()
+    model(torch.rand(4, 50))[:, 2, :].sum().backward()
+    
+    grad = model.heads.weight3.grad
+    assert grad[2].abs().sum() > 0
+    assert grad[[0, 1, 3]].abs().sum() == 0
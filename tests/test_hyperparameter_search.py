@@ -0,0 +1,63 @@
+# [file name]: tests/test_hyperparameter_search.py
+#!/usr/bin/env python3
+"""
+ТЕСТЫ подбора гиперпараметров
+"""
+
+import torch
+
+from model.hyperparameter_search import HyperparameterSearch, sample_configs, best_trial, load_trial_log
+from model.simple_nn.trainer import EnhancedTrainer, DEFAULT_HYPERPARAMS
+from model.simple_nn.predictor import EnhancedPredictor
+from tests.model_helpers import random_groups
+
+def test_sample_configs_starts_with_defaults():
+    """Первая конфигурация - текущие значения, остальные различны"""
+    configs = sample_configs(6, seed=1)
+    
+    assert configs[0] == DEFAULT_HYPERPARAMS
+    assert len({str(sorted(config.items())) for config in configs}) == 6
+    assert sample_configs(3, space={'dropout': [0.3]}) == [DEFAULT_HYPERPARAMS]
+
+def test_rungs_and_best_trial():
+    """Бюджеты раундов растут в eta раз; лучший trial - с наибольшим бюджетом"""
+    assert HyperparameterSearch(eta=3, min_epochs=2, max_epochs=18).rung_epochs() == [2, 6, 18]
+    
+    records = [
+        {'trial': 't00', 'epochs': 2, 'score': 0.9},
+        {'trial': 't01', 'epochs': 6, 'score': 0.7},
+        {'trial': 't02', 'epochs': 6, 'score': 0.8},
+        {'trial': 't03', 'epochs': 6, 'score': None},
+    ]
+    assert best_trial(records)['trial'] == 't02'
+
+def test_search_writes_trial_log(tmp_path):
+    """Поиск в одном процессе: раунды, выбывание и журнал trials"""
+    print("🧪 Тест поиска гиперпараметров...")
+    
+    space = {'hidden_size': [32, 64], 'batch_size': [128], 'history_size': [16, 20]}
+    log_path = str(tmp_path / 'trials.jsonl')
+    search = HyperparameterSearch(trials=2, eta=2, min_epochs=1, max_epochs=2, workers=1,
+                                  validation_draws=20, log_path=log_path, space=space, work_dir=str(tmp_path / 'work'))
+    result = search.run(random_groups(300, seed=5, as_strings=False))
+    
+    records = load_trial_log(log_path)
+    assert [record['rung'] for record in records] == [0, 0, 1]
+    assert result['best'] == best_trial(records)
+    assert result['best']['epochs'] == 2
+    print("✅ Журнал trials записан")
+
+def test_hyperparams_persist_in_checkpoint(tmp_path):
+    """Гиперпараметры сохраняются в чекпоинт и используются следующим обучением и предсказателем"""
+    params = dict(DEFAULT_HYPERPARAMS, hidden_size=64, history_size=16, dropout=0.1, batch_size=128)
+    model_path = str(tmp_path / 'data' / 'model.pth')
+    groups = random_groups(200, seed=5)
+    
+    torch.manual_seed(0)
+    EnhancedTrainer(model_path, hyperparams=params, log_path=str(tmp_path / 'training_log.txt')).train(groups, epochs=1, return_predictions=False)
+    
+    assert EnhancedTrainer(model_path).resolve_hyperparams() == params
+    predictor = EnhancedPredictor(model_path)
+    assert predictor.load_model(update_ensemble=False)
+    assert predictor.feature_extractor.history_size == 16
+    assert len(predictor.predict_batch([list(range(1, 17))], top_k=3, use_patterns=False)[0]) == 3
@@ -0,0 +1,70 @@
+# [file name]: tests/test_minibatch_sampler.py
+#!/usr/bin/env python3
+"""
+ТЕСТЫ выборки минибатчей по индексу
+"""
+
+import numpy as np
+import torch
+
+from model.simple_nn.sampler import MinibatchSampler
+from model.simple_nn.data_processor import DataProcessor
+from tests.model_helpers import random_groups
+
+def _dataset(count: int = 130):
+    features = np.arange(count * 3, dtype=np.float32).reshape(count, 3)
+    targets = np.arange(count * 4, dtype=np.int64).reshape(count, 4)
+    return features, targets
+
+def test_epoch_covers_every_row_once():
+    """За эпоху каждая строка попадает ровно в один батч, features и цели не расходятся"""
+    print("🧪 Тест выборки минибатчей...")
+    
+    features, targets = _dataset()
+    sampler = MinibatchSampler(features, torch.from_numpy(targets), batch_size=32)
+    
+    seen = []
+    for batch_features, batch_targets in sampler:
+        rows = (batch_features[:, 0] / 3).long()
+        assert torch.equal(batch_targets[:, 0], rows * 4)
+        seen.extend(rows.tolist())
+    
+    assert sorted(seen) == list(range(len(features)))
+    assert len(sampler) == 5
+    print("✅ Эпоха покрывает все строки")
+
+def test_tiny_tail_batch_skipped():
+    """Хвостовой батч меньше min_batch пропускается, как и раньше"""
+    features, targets = _dataset(65)
+    sampler = MinibatchSampler(torch.from_numpy(features), torch.from_numpy(targets), batch_size=32)
+    
+    assert len(sampler) == 2
+    assert [len(batch) for batch, _ in sampler] == [32, 32]
+
+def test_memmap_source_matches_tensor_source(tmp_path):
+    """Батчи из memmap совпадают с батчами из тензоров при том же seed"""
+    features, targets = _dataset()
+    np.save(tmp_path / 'features.npy', features)
+    mapped = np.load(tmp_path / 'features.npy', mmap_mode='r')
+    
+    torch.manual_seed(3)
+    from_memmap = [(f, t) for f, t in MinibatchSampler(mapped, targets, batch_size=16)]
+    torch.manual_seed(3)
+    from_tensor = [(f, t) for f, t in MinibatchSampler(torch.from_numpy(features), torch.from_numpy(targets), batch_size=16)]
+    
+    for (mf, mt), (tf, tt) in zip(from_memmap, from_tensor):
+        order = torch.argsort(tf[:, 0])
+        assert torch.equal(mf, tf[order])
+        assert torch.equal(mt, tt[order])
+
+def test_prepare_training_data_memory_map(tmp_path):
+    """memory_map=True возвращает memmap кэша с теми же данными"""
+    groups = random_groups(100, seed=7)
+    processor = DataProcessor(history_size=25, cache_dir=str(tmp_path / 'feature_cache'))
+    
+    expected, expected_targets = DataProcessor(history_size=25).prepare_training_data(groups)
+    features, targets = processor.prepare_training_data(groups, memory_map=True)
+    
+    assert isinstance(features, np.memmap)
+    assert np.array_equal(features, expected)
+    assert np.array_equal(targets, expected_targets)
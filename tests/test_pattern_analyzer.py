@@ -0,0 +1,99 @@
+# [file name]: tests/test_pattern_analyzer.py
+#!/usr/bin/env python3
+"""
+ТЕСТЫ кэша и инкрементального анализа AdvancedPatternAnalyzer
+"""
+
+import numpy as np
+import pytest
+
+from model.advanced_features import AdvancedPatternAnalyzer, get_pattern_analyzer
+from tests.model_helpers import random_numbers
+
+def _reference(history: list) -> dict:
+    """Прежний анализ: corrcoef по лагам, МНК-наклон, Херст через polyfit"""
+    ts = np.array(history, dtype=np.float64)
+    autocorr = {}
+    for lag in [1, 2, 3, 5, 7]:
+        if len(ts) > lag:
+            corr = np.corrcoef(ts[:-lag], ts[lag:])[0, 1]
+            if not np.isnan(corr):
+                autocorr[f"autocorr_lag_{lag}"] = corr
+    
+    lags = range(2, min(20, len(ts) // 2))
+    tau = [np.std(ts[lag:] - ts[:-lag]) for lag in lags]
+    return {
+        'autocorrelation': autocorr,
+        'linear_trend': np.polyfit(np.arange(len(ts)), ts, 1)[0],
+        'volatility': np.std(ts),
+        'hurst_exponent': np.polyfit(np.log(lags), np.log(tau), 1)[0] if len(ts) >= 20 else 0.5,
+        'mean_reversion': float(np.mean(np.abs(ts - np.mean(ts))) / (np.std(ts) + 1e-8)),
+    }
+
+def _assert_matches(actual: dict, expected: dict):
+    assert actual['autocorrelation'].keys() == expected['autocorrelation'].keys()
+    for key, value in expected['autocorrelation'].items():
+        assert actual['autocorrelation'][key] == pytest.approx(value, abs=1e-9)
+    for key in ('linear_trend', 'volatility', 'hurst_exponent', 'mean_reversion'):
+        assert actual[key] == pytest.approx(expected[key], abs=1e-9)
+
+@pytest.mark.filterwarnings("ignore::RuntimeWarning")
+def test_incremental_windows_match_reference():
+    """Сдвиги окна на 4 и на 1 число и дописанная история совпадают с полным пересчетом"""
+    print("🧪 Тест инкрементального анализа...")
+    
+    numbers = random_numbers(800, seed=7)
+    analyzer = AdvancedPatternAnalyzer()
+    
+    ends = list(range(120, 400, 4)) + list(range(400, 440)) + [470]
+    for end in ends:
+        history = numbers[end - 120:end]
+        _assert_matches(analyzer.analyze_time_series(history), _reference(history))
+    
+    # История растет: прежнее окно - ее начало
+    for end in (480, 500, 530):
+        history = numbers[350:end]
+        _assert_matches(analyzer.analyze_time_series(history), _reference(history))
+    
+    info = analyzer.cache_info()
+    assert info['incremental'] >= len(ends) + 1
+    assert info['rebuilds'] <= 3
+    print("✅ Инкрементальный анализ совпадает с полным")
+
+def test_degenerate_histories():
+    """Короткая и постоянная история: как в прежней реализации"""
+    analyzer = AdvancedPatternAnalyzer()
+    
+    assert analyzer.analyze_time_series([3] * 9) == {}
+    assert analyzer.analyze_time_series(random_numbers(15, seed=7))['hurst_exponent'] == 0.5
+    
+    constant = analyzer.analyze_time_series([7] * 40)
+    assert constant['autocorrelation'] == {}
+    assert constant['linear_trend'] == 0
+    assert np.isnan(constant['hurst_exponent'])
+
+def test_cache_hits_return_copies():
+    """Повторная история берется из кэша, изменение результата кэш не портит"""
+    analyzer = AdvancedPatternAnalyzer()
+    history = random_numbers(120, seed=7)
+    
+    first = analyzer.analyze_time_series(history)
+    first['autocorrelation'].clear()
+    first['volatility'] = -1
+    
+    second = analyzer.analyze_time_series(list(history))
+    assert second['autocorrelation'] and second['volatility'] > 0
+    assert analyzer.cache_info()['hits'] == 1
+    
+    for seed in range(AdvancedPatternAnalyzer.CACHE_SIZE + 5):
+        analyzer.analyze_time_series(random_numbers(30, seed=seed + 100))
+    assert analyzer.cache_info()['size'] == AdvancedPatternAnalyzer.CACHE_SIZE
+
+def test_predictors_share_analyzer():
+    """EnhancedPredictor и StatisticalPredictor анализируют историю одним анализатором"""
+    from model.simple_nn.predictor import EnhancedPredictor
+    from model.ensemble_predictor import StatisticalPredictor
+    
+    shared = get_pattern_analyzer()
+    assert EnhancedPredictor()._get_pattern_analyzer() is shared
+    assert StatisticalPredictor()._get_pattern_analyzer() is shared
@@ -0,0 +1,98 @@
+# [file name]: tests/test_prediction_context.py
+#!/usr/bin/env python3
+"""
+ТЕСТЫ общего контекста прогноза (PredictionContext)
+"""
+
+import random
+import numpy as np
+import pytest
+import torch
+
+from model.advanced_features import FrequencyBasedPredictor
+from model.ensemble_predictor import EnsemblePredictor
+from model.prediction_context import build_context, required_stages
+from model.simple_nn.model import EnhancedNumberPredictor
+from model.simple_nn.predictor import EnhancedPredictor
+from tests.model_helpers import random_numbers, random_groups
+
+def _neural() -> EnhancedPredictor:
+    """Нейросеть со случайно инициализированной моделью, стадии считаются"""
+    torch.manual_seed(0)
+    predictor = EnhancedPredictor(model_path="unused.pth")
+    predictor.model = EnhancedNumberPredictor(input_size=50, hidden_size=64)
+    predictor.model.eval()
+    predictor.is_trained = True
+    predictor.stage_calls = {'features': 0, 'probabilities': 0, 'predict_context': 0}
+    
+    def counted(name, method):
+        def wrapper(*args, **kwargs):
+            predictor.stage_calls[name] += 1
+            return method(*args, **kwargs)
+        return wrapper
+    
+    predictor.context_features = counted('features', predictor.context_features)
+    predictor.context_probabilities = counted('probabilities', predictor.context_probabilities)
+    predictor.predict_context = counted('predict_context', predictor.predict_context)
+    return predictor
+
+def test_required_stages_follow_dependencies():
+    """Зависимости стадий добавляются и выполняются раньше зависимых"""
+    assert required_stages(['pattern_analysis']) == ['temporal_patterns', 'pattern_analysis']
+    assert required_stages(['probabilities', 'temporal_patterns']) == ['temporal_patterns', 'features', 'probabilities']
+    assert required_stages([]) == []
+
+def test_context_is_read_only():
+    """Результаты стадий нельзя изменить из предсказателя"""
+    neural = _neural()
+    context = build_context(random_numbers(120, seed=3), analyzer=None, neural=neural)
+    
+    with pytest.raises(AttributeError):
+        context.history = ()
+    with pytest.raises(TypeError):
+        context.pattern_analysis['hot_numbers'] = []
+    with pytest.raises(ValueError):
+        context.probabilities[0, 0] = 1.0
+    
+    assert context.probabilities.shape == (4, 26)
+    assert np.allclose(context.probabilities.sum(axis=1), 1.0, atol=1e-5)
+    assert context.features.shape == (50,)
+    assert set(context.stage_ms) == set(required_stages(['probabilities', 'pattern_analysis', 'frequency_candidates']))
+
+def test_ensemble_runs_each_stage_once_without_recursion():
+    """Ансамбль строит один контекст; нейросеть не вызывает ансамбль обратно"""
+    print("🧪 Тест контекста ансамбля...")
+    
+    groups = random_groups(200, seed=11)
+    neural = _neural()
+    ensemble = EnsemblePredictor()
+    ensemble.predictors['frequency'] = FrequencyBasedPredictor()
+    ensemble.predictors['frequency'].add_groups(groups)
+    ensemble.set_neural_predictor(neural)
+    neural._ensemble_predictor = ensemble
+    
+    random.seed(0)
+    predictions = ensemble.predict_ensemble(random_numbers(120, seed=3), top_k=10)
+    
+    assert predictions
+    assert neural.stage_calls == {'features': 1, 'probabilities': 1, 'predict_context': 1}
+    assert not hasattr(ensemble, '_in_prediction')
+    
+    context = ensemble.build_context(random_numbers(120, seed=3))
+    assert 'frequency_candidates' in context.stage_ms and isinstance(context.frequency_candidates, tuple)
+    assert context.temporal_patterns['autocorrelation'] == context.pattern_analysis['temporal_patterns']['autocorrelation']
+    print("✅ Каждая стадия выполнена один раз")
+
+def test_context_prediction_matches_standalone_members():
+    """Члены ансамбля по контексту дают то же, что и по истории"""
+    from model.advanced_features import get_pattern_analyzer
+    from model.ensemble_predictor import StatisticalPredictor, PatternBasedPredictor
+    
+    history = random_numbers(120, seed=3)
+    context = build_context(history, ['temporal_patterns'], analyzer=get_pattern_analyzer())
+    
+    for member in (StatisticalPredictor(), PatternBasedPredictor()):
+        random.seed(1)
+        expected = member.predict(history, 5)
+        random.seed(1)
+        assert member.predict_context(context, 5) == expected
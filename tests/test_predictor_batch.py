@@ -0,0 +1,67 @@
+# [file name]: tests/test_predictor_batch.py
+#!/usr/bin/env python3
+"""
+ТЕСТЫ пакетного предсказания EnhancedPredictor
+"""
+
+import pytest
+import torch
+
+from model.simple_nn.model import EnhancedNumberPredictor
+from model.simple_nn.predictor import EnhancedPredictor
+from tests.model_helpers import random_numbers, random_groups
+
+def _predictor() -> EnhancedPredictor:
+    """Предсказатель со случайно инициализированной моделью (без файла модели)"""
+    torch.manual_seed(0)
+    predictor = EnhancedPredictor(model_path="unused.pth")
+    predictor.model = EnhancedNumberPredictor(input_size=50, hidden_size=64)
+    predictor.model.eval()
+    predictor.is_trained = True
+    return predictor
+
+def test_predict_batch_matches_single_histories():
+    """Один проход по пакету дает те же кандидаты, что и поштучные вызовы"""
+    print("🧪 Тест пакетного предсказания...")
+    
+    stream = random_numbers(400, seed=5)
+    histories = [stream[:end] for end in (10, 60, 120, 200, 400)]
+    predictor = _predictor()
+    
+    batch = predictor.predict_batch(histories, top_k=5)
+    
+    assert batch[0] == []
+    for history, candidates in zip(histories[1:], batch[1:]):
+        single = predictor.predict_batch([history], top_k=5)[0]
+        # Размер пакета влияет на последние биты float32 в forward pass
+        assert [group for group, _ in candidates] == [group for group, _ in single]
+        assert [score for _, score in candidates] == pytest.approx([score for _, score in single], rel=1e-5)
+        assert len(candidates) == 5
+    
+    raw = predictor.predict_batch(histories[1:], top_k=3, use_patterns=False)
+    assert all(len(candidates) == 3 for candidates in raw)
+    print("✅ Пакетное предсказание корректно")
+
+def test_synced_feature_state_serves_live_prediction():
+    """sync_state держит features конца датасета, прогноз по нему не пересчитывает окно"""
+    groups = random_groups(100, seed=7)
+    predictor = _predictor()
+    
+    assert predictor.sync_state(groups[:-1]) == 99
+    assert predictor.sync_state(groups) == 1
+    assert predictor.sync_state(groups) == 0
+    
+    history = [int(x) for group in groups[-30:] for x in group.split()]
+    assert predictor._feature_state.window == history[-25:]
+    
+    live = predictor.predict_batch([history], top_k=5, use_patterns=False)[0]
+    predictor._feature_state = None
+    recomputed = predictor.predict_batch([history], top_k=5, use_patterns=False)[0]
+    assert [group for group, _ in live] == [group for group, _ in recomputed]
+    assert [score for _, score in live] == pytest.approx([score for _, score in recomputed], rel=1e-4)
+    
+    # Переписанная история: окно строится заново
+    rewritten = groups[:-1] + ["1 2 3 4"]
+    predictor.sync_state(rewritten)
+    assert predictor._feature_state.window[-4:] == [1, 2, 3, 4]
+
@@ -0,0 +1,63 @@
+# [file name]: tests/test_quantization.py
+#!/usr/bin/env python3
+"""
+ТЕСТЫ int8 модели для инференса
+"""
+
+import os
+import torch
+
+from model.simple_nn.model import EnhancedNumberPredictor
+from model.simple_nn.predictor import EnhancedPredictor
+from model.simple_nn.quantization import (LinearHeads, export_quantized, load_quantized, quantized_model_path,
+                                          parity_report)
+
+from tests.model_helpers import save_checkpoint
+
+def test_linear_heads_match_grouped_heads():
+    """Развернутые в nn.Linear головы дают тот же результат"""
+    model = EnhancedNumberPredictor(input_size=50, hidden_size=64).eval()
+    x = torch.rand(16, 50)
+    
+    features = model.feature_extractor(x)
+    with torch.no_grad():
+        assert torch.allclose(LinearHeads.from_grouped(model.heads)(features), model.heads(features), atol=1e-6)
+
+def test_export_and_staleness(tmp_path):
+    """Артефакт согласован с fp32 и перестает использоваться после переобучения"""
+    print("🧪 Тест int8 артефакта...")
+    
+    model_path = str(tmp_path / 'model.pth')
+    model = save_checkpoint(model_path)
+    features = torch.rand(128, 50)
+    
+    parity = export_quantized(model_path, features=features, min_top1=0.0)
+    assert os.path.exists(quantized_model_path(model_path))
+    assert set(parity) >= {'max_abs_diff', 'top1_agreement', 'top10_group_overlap'}
+    
+    quantized, config = load_quantized(model_path)
+    assert config['hidden_size'] == 64
+    assert parity_report(model, quantized, features)['max_abs_diff'] < 0.01
+    
+    save_checkpoint(model_path, seed=1)
+    assert load_quantized(model_path) is None
+    print("✅ int8 артефакт привязан к fp32 чекпоинту")
+
+def test_export_rejects_divergent_model(tmp_path):
+    """При недостаточном согласии с fp32 артефакт не записывается"""
+    model_path = str(tmp_path / 'model.pth')
+    save_checkpoint(model_path)
+    
+    assert export_quantized(model_path, features=torch.rand(8, 50), min_top1=1.01) is None
+    assert not os.path.exists(quantized_model_path(model_path))
+
+def test_predictor_uses_quantized_model(tmp_path):
+    """EnhancedPredictor(quantized=True) собирает и загружает int8 модель"""
+    model_path = str(tmp_path / 'model.pth')
+    save_checkpoint(model_path)
+    export_quantized(model_path, features=torch.rand(64, 50), min_top1=0.0)
+    
+    predictor = EnhancedPredictor(model_path, quantized=True)
+    assert predictor.load_model(update_ensemble=False)
+    assert any(isinstance(module, torch.ao.nn.quantized.dynamic.Linear) for module in predictor.model.modules())
+    assert len(predictor.predict_batch([list(range(1, 26)) * 2], top_k=5, use_patterns=False)[0]) == 5
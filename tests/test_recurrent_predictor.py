@@ -0,0 +1,92 @@
+# [file name]: tests/test_recurrent_predictor.py
+#!/usr/bin/env python3
+"""
+ТЕСТЫ рекуррентного бэкенда с сохраняемым состоянием
+"""
+
+import numpy as np
+import torch
+
+from model.advanced_features import FrequencyBasedPredictor
+from model.ensemble_predictor import EnsemblePredictor
+from model.simple_nn.predictor import EnhancedPredictor
+from model.simple_nn.recurrent import RecurrentPredictor, RecurrentTrainer, parse_groups
+from tests.model_helpers import random_groups
+
+def _trained(tmp_path, groups):
+    model_path = str(tmp_path / 'data' / 'recurrent.pth')
+    trainer = RecurrentTrainer(model_path, hidden_size=32, streams=4, bptt=16)
+    trainer.set_progress_callback(lambda message: None)
+    torch.manual_seed(0)
+    assert len(trainer.train(groups, epochs=1)) == 10
+    return model_path
+
+def test_incremental_state_matches_full_run(tmp_path):
+    """Шаг по новой группе дает то же состояние, что прогон по всей истории"""
+    print("🧪 Тест инкрементального состояния GRU...")
+    
+    groups = random_groups(300, seed=3)
+    model_path = _trained(tmp_path, groups[:-1])
+    
+    predictor = RecurrentPredictor(model_path)
+    assert predictor.load_model()
+    # Состояние после обучения сохранено: прогона по истории нет
+    assert predictor.groups_seen == 299
+    assert predictor.sync(groups[:-1]) == 0
+    assert predictor.sync(groups) == 1
+    
+    full = predictor._run(parse_groups(groups), None)[0]
+    assert np.allclose(predictor.probabilities, full, atol=1e-5)
+    
+    # История переписана - состояние считается заново
+    rewritten = groups[:-2] + ["1 2 3 4", groups[-1]]
+    assert predictor.sync(rewritten) == 300
+    assert np.allclose(predictor.probabilities, predictor._run(parse_groups(rewritten), None)[0], atol=1e-5)
+    print("✅ Состояние совпадает с полным прогоном")
+
+def test_enhanced_predictor_recurrent_backend(tmp_path):
+    """backend='recurrent': прогноз из состояния для конца датасета и прогон для другой истории"""
+    groups = random_groups(300, seed=3)
+    model_path = _trained(tmp_path, groups)
+    
+    predictor = EnhancedPredictor(model_path, backend='recurrent')
+    assert predictor.load_model(update_ensemble=False)
+    
+    history = parse_groups(groups[-30:]).ravel().tolist()
+    other = parse_groups(random_groups(30, seed=4)).ravel().tolist()
+    candidates = predictor.predict_batch([history, other, history[:3]], top_k=5, use_patterns=False)
+    
+    assert [len(c) for c in candidates] == [5, 5, 0]
+    assert predictor._recurrent.probabilities_for(history) is predictor._recurrent.probabilities
+
+def test_short_history_not_served_from_state(tmp_path):
+    """История короче TAIL_GROUPS с тем же концом прогоняется сама, а не берется из состояния"""
+    groups = random_groups(300, seed=3)
+    model_path = _trained(tmp_path, groups)
+    
+    recurrent = RecurrentPredictor(model_path)
+    assert recurrent.load_model()
+    assert recurrent.sync(groups) == 0
+    
+    short = parse_groups(groups[-1:])
+    probabilities = recurrent.probabilities_for(short.ravel().tolist())
+    assert probabilities is not recurrent.probabilities
+    assert np.allclose(probabilities, recurrent._run(short, None)[0], atol=1e-5)
+    
+    window = parse_groups(groups[-8:]).ravel().tolist()
+    assert recurrent.probabilities_for(window) is recurrent.probabilities
+
+def test_ensemble_syncs_recurrent_state(tmp_path):
+    """update_ensemble досчитывает состояние рекуррентной нейросети"""
+    groups = random_groups(300, seed=3)
+    model_path = _trained(tmp_path, groups)
+    
+    predictor = EnhancedPredictor(model_path, backend='recurrent')
+    assert predictor.load_model(update_ensemble=False)
+    ensemble = EnsemblePredictor()
+    ensemble.predictors['frequency'] = FrequencyBasedPredictor()
+    ensemble.set_neural_predictor(predictor)
+    
+    ensemble.update_ensemble(groups + ["5 6 7 8"])
+    assert predictor._recurrent.groups_seen == 301
+    assert predictor._recurrent.tail[-1] == (5, 6, 7, 8)
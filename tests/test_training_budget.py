@@ -0,0 +1,94 @@
+# [file name]: tests/test_training_budget.py
+#!/usr/bin/env python3
+"""
+ТЕСТЫ обучения с ограничением по времени
+"""
+
+import time
+import torch
+
+from model.simple_nn.quantization import file_sha1
+from model.simple_nn.trainer import EnhancedTrainer, TrainingBudget
+from tests.model_helpers import make_trainer, random_groups
+
+def _data(count: int = 1280):
+    features = torch.rand(count, 50)
+    targets = torch.randint(0, 26, (count, 4))
+    return features, targets
+
+def test_epoch_estimated_from_first_batches(tmp_path):
+    """Без давления дедлайна эпоха проходит целиком, время эпохи оценивается по первым батчам"""
+    print("🧪 Тест оценки времени эпохи...")
+    
+    trainer = make_trainer(tmp_path)
+    budget = TrainingBudget(deadline=time.time() + 3600, reserve=0)
+    
+    _, num_batches = trainer._train_epoch(*_data(), batch_size=64, budget=budget)
+    
+    assert num_batches == 20
+    assert not budget.exhausted
+    assert budget.epoch_estimate > 0
+    assert budget.fitting_epochs() > 0
+    print("✅ Оценка времени эпохи корректна")
+
+def test_epoch_interrupted_by_deadline(tmp_path):
+    """Истекший дедлайн прерывает эпоху после первого батча, следующая эпоха не начинается"""
+    trainer = make_trainer(tmp_path)
+    budget = TrainingBudget(deadline=time.time() - 1, reserve=0)
+    
+    _, num_batches = trainer._train_epoch(*_data(), batch_size=64, budget=budget)
+    
+    assert num_batches == 1
+    assert budget.exhausted
+    assert not budget.epoch_fits()
+
+def test_budget_without_deadline():
+    budget = TrainingBudget()
+    assert budget.remaining() == float('inf')
+    assert budget.epoch_fits()
+
+def _checkpoint(tmp_path, groups) -> str:
+    """Обученный чекпоинт в tmp_path/data"""
+    model_path = str(tmp_path / 'data' / 'model.pth')
+    torch.manual_seed(0)
+    EnhancedTrainer(model_path, log_path=str(tmp_path / 'training_log.txt')).train(groups, epochs=1, return_predictions=False)
+    return model_path
+
+def test_expired_deadline_keeps_checkpoint(tmp_path):
+    """Дедлайн уже внутри запаса: обучение не начинается, чекпоинт не переписывается"""
+    print("🧪 Тест истекшего дедлайна...")
+    
+    groups = random_groups(300, seed=3)
+    model_path = _checkpoint(tmp_path, groups)
+    checkpoint_sha1 = file_sha1(model_path)
+    
+    trainer = EnhancedTrainer(model_path, log_path=str(tmp_path / 'training_log.txt'))
+    assert trainer.train(groups, deadline=time.time()) == []
+    assert trainer.train(groups, deadline=time.time() + 10, deadline_reserve=30) == []
+    
+    assert trainer.model is None
+    assert file_sha1(model_path) == checkpoint_sha1
+    print("✅ Чекпоинт не изменен")
+
+def test_interrupted_epoch_keeps_checkpoint(tmp_path):
+    """Эпоха новой модели, прерванная дедлайном и не лучше чекпоинта, его не заменяет"""
+    groups = random_groups(300, seed=3)
+    model_path = _checkpoint(tmp_path, groups)
+    checkpoint_sha1 = file_sha1(model_path)
+    
+    trainer = EnhancedTrainer(model_path, log_path=str(tmp_path / 'training_log.txt'))
+    
+    def interrupted_epoch(features, targets, batch_size, budget):
+        # Один батч, после которого validation loss заведомо хуже чекпоинта
+        with torch.no_grad():
+            for parameter in trainer.model.parameters():
+                parameter.add_(torch.randn_like(parameter) * 5)
+        budget.exhausted = True
+        return 1.0, 1
+    
+    trainer._train_epoch = interrupted_epoch
+    trainer.train(groups, epochs=2, deadline=time.time() + 3600, return_predictions=False)
+    
+    assert file_sha1(model_path) == checkpoint_sha1
+    saved = torch.load(model_path, map_location='cpu')['model_state_dict']
+    assert all(torch.equal(saved[name], value) for name, value in trainer.model.state_dict().items())
@@ -0,0 +1,49 @@
+# [file name]: tests/test_training_step.py
+#!/usr/bin/env python3
+"""
+ТЕСТЫ режимов шага обучения
+"""
+
+import torch
+import torch.nn as nn
+import pytest
+
+from model.simple_nn.model import EnhancedNumberPredictor
+from model.simple_nn.trainer import EnhancedTrainer
+from tests.model_helpers import make_trainer
+
+def test_fused_loss_matches_per_head_loss(tmp_path):
+    """Один CrossEntropy по [B*4, 26] равен среднему из 4 loss по позициям"""
+    print("🧪 Тест объединенного loss...")
+    
+    trainer = make_trainer(tmp_path)
+    trainer.model.eval()
+    features = torch.rand(16, 50)
+    targets = torch.randint(0, 26, (16, 4))
+    
+    outputs = trainer.model(features)
+    per_head = sum(nn.CrossEntropyLoss()(outputs[:, j, :], targets[:, j]) for j in range(4)) / 4
+    
+    assert trainer._step_loss(features, targets).item() == pytest.approx(per_head.item(), rel=1e-6)
+    print("✅ Объединенный loss корректен")
+
+def test_scripted_training_updates_original_model(tmp_path):
+    """TorchScript forward обучает те же параметры, чекпоинт сохраняется с прежними ключами"""
+    trainer = make_trainer(tmp_path, compile_mode='script')
+    trainer.model.train()
+    before = trainer.model.feature_extractor[0].weight.detach().clone()
+    
+    _, num_batches = trainer._train_epoch(torch.rand(256, 50), torch.randint(0, 26, (256, 4)), batch_size=64)
+    trainer._save_model()
+    
+    assert num_batches == 4
+    assert isinstance(trainer._training_forward, torch.jit.ScriptModule)
+    assert not torch.equal(before, trainer.model.feature_extractor[0].weight)
+    state = torch.load(str(tmp_path / 'model.pth'))['model_state_dict']
+    assert set(state) == set(EnhancedNumberPredictor(input_size=50, hidden_size=32).state_dict())
+
+def test_unknown_modes(tmp_path):
+    with pytest.raises(ValueError):
+        EnhancedTrainer(str(tmp_path / 'model.pth'), step_mode='turbo')
+    with pytest.raises(ValueError):
+        EnhancedTrainer(str(tmp_path / 'model.pth'), compile_mode='jit')